@@ -0,0 +1,234 @@
+# finite_automata_benchmarks.py
+
+# Benchmarks for the implementation of a Finite Automata found in
+# finite_automata.py. Run from the root of the repository with
+#
+#   python benchmarks/finite_automata_benchmarks.py
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from formal_language.finite_automata import *
+from formal_language.multi_matcher import *
+from formal_language.regular_expression import compileRegularExpression
+from formal_language.serialization import *
+
+# -*- Helper Functions -*-
+
+def returnRandomFA(n, alphabet, seed = 0):
+    """Returns a random total FA with 'n' states over the given alphabet."""
+    rng = random.Random(seed)
+    states = [str(i) for i in range(n)]
+    transitions = {}
+    for q in states:
+        for c in alphabet:
+            transitions[(q, c)] = rng.choice(states)
+    accept = frozenset(q for q in states if rng.random() < 0.5)
+    return FiniteAutomata(frozenset(states), frozenset(alphabet), '0', accept,
+                          transitions)
+
+def returnRandomString(length, alphabet, seed = 0):
+    """Returns a random string of the given length over the given alphabet."""
+    rng = random.Random(seed)
+    return ''.join(rng.choice(alphabet) for i in xrange(length))
+
+def report(name, seconds, baseline = None):
+    """Prints a line of benchmark output."""
+    line = "{0:<40} {1:>10.4f}s".format(name, seconds)
+    if baseline is not None:
+        line += "  ({0:.1f}x)".format(baseline / seconds)
+    print line
+
+def best(function, repeat = 3):
+    """Returns the best running time of 'function' in seconds."""
+    return min(timeit.repeat(function, number = 1, repeat = repeat))
+
+# -*- Benchmarks -*-
+
+def benchmark_accepts(size = 2 ** 20):
+    """Compares FiniteAutomata.accepts with CompiledFiniteAutomata.accepts on
+    an input of 'size' symbols."""
+    alphabet = 'abcd'
+    fa = returnRandomFA(64, alphabet)
+    s = returnRandomString(size, alphabet)
+    cfa = fa.compile()
+    assert fa.accepts(s) == cfa.accepts(s)
+
+    print "accepts, {0} symbols".format(size)
+    baseline = best(lambda: fa.accepts(s))
+    report("FiniteAutomata.accepts", baseline)
+    report("CompiledFiniteAutomata.accepts", best(lambda: cfa.accepts(s)),
+           baseline)
+    report("compile", best(fa.compile))
+
+def benchmark_acceptsMany(count = 200000):
+    """Compares calling accepts once per string with acceptsMany on 'count'
+    short strings."""
+    alphabet = 'abcd'
+    fa = returnRandomFA(64, alphabet)
+    rng = random.Random(1)
+    strings = [returnRandomString(rng.randint(1, 16), alphabet, i)
+               for i in xrange(count)]
+    cfa = fa.compile()
+    assert list(cfa.acceptsMany(strings)) == [cfa.accepts(s) for s in strings]
+
+    print "acceptsMany, {0} strings".format(count)
+    baseline = best(lambda: [fa.accepts(s) for s in strings])
+    report("FiniteAutomata.accepts per string", baseline)
+    report("CompiledFiniteAutomata.accepts per string",
+           best(lambda: [cfa.accepts(s) for s in strings]), baseline)
+    report("CompiledFiniteAutomata.acceptsMany",
+           best(lambda: cfa.acceptsMany(strings)), baseline)
+
+def returnRedundantFA(n, alphabet, seed = 0):
+    """Returns an FA with 'n' states which minimizes to an FA with about n / 4
+    states, by running a random FA alongside a counter modulo 4 that does not
+    affect acceptance."""
+    fa = returnRandomFA(n // 4, alphabet, seed)
+    states = [q + '.' + str(i) for q in fa.states for i in range(4)]
+    transitions = {}
+    for (q, c), p in fa.transitions.items():
+        for i in range(4):
+            transitions[(q + '.' + str(i), c)] = p + '.' + str((i + 1) % 4)
+    accept = frozenset(q + '.' + str(i) for q in fa.accept for i in range(4))
+    return FiniteAutomata(frozenset(states), fa.alphabet, fa.initial + '.0',
+                          accept, transitions)
+
+def benchmark_minimize(sizes = (1000, 10000, 50000)):
+    """Times minimize on random FAs of increasing size."""
+    print "minimize"
+    for n in sizes:
+        for name, fa in [("random", returnRandomFA(n, 'ab')),
+                         ("redundant", returnRedundantFA(n, 'ab'))]:
+            m = minimize(fa)
+
+            def uncached():
+                # Assigning the transitions clears the cached properties.
+                fa.transitions = fa.transitions
+                return minimize(fa)
+
+            report("{0} states, {1}, {2} left".format(n, name,
+                                                       m.getNumberOfStates()),
+                   best(uncached, repeat = 1))
+
+def benchmark_shortestStrings(n = 100000):
+    """Times getShortestString, acceptedStrings and countAccepted on a random
+    FA with 'n' states."""
+    fa = returnRandomFA(n, 'ab')
+    cfa = fa.compile()
+
+    def firstStrings():
+        generator = cfa.acceptedStrings()
+        return [generator.next() for i in range(100)]
+
+    print "shortest strings, {0} states".format(n)
+    report("getShortestString", best(cfa.getShortestString))
+    report("acceptedStrings, first 100", best(firstStrings))
+    report("countAccepted(20)", best(lambda: cfa.countAccepted(20)))
+
+def benchmark_serialization(n = 200000):
+    """Compares constructing an FA with 'n' states from its dictionaries with
+    loading it from a file."""
+    fa = returnRandomFA(n, 'abcd')
+    handle, path = tempfile.mkstemp(suffix = '.fa')
+    os.close(handle)
+    try:
+        saveFiniteAutomata(fa, path)
+
+        print "serialization, {0} states".format(n)
+        baseline = best(lambda: FiniteAutomata(fa.states, fa.alphabet,
+                                               fa.initial, fa.accept,
+                                               fa.transitions), repeat = 1)
+        report("FiniteAutomata(...)", baseline)
+        report("saveFiniteAutomata", best(lambda: saveFiniteAutomata(fa, path),
+                                          repeat = 1))
+        report("loadFiniteAutomata", best(lambda: loadFiniteAutomata(path),
+                                          repeat = 1))
+        report("loadCompiledFiniteAutomata",
+               best(lambda: loadCompiledFiniteAutomata(path)), baseline)
+    finally:
+        os.remove(path)
+
+def benchmark_multiMatcher(n = 200, count = 2000):
+    """Compares calling accepts on each of 'n' automata with a MultiMatcher,
+    where the automata accept the strings ending in a random keyword."""
+    alphabet = 'abcd'
+    automatas = [compileRegularExpression(
+            '(a+b+c+d)*' + returnRandomString(5, alphabet, i), alphabet)
+                 for i in xrange(n)]
+    cfas = [fa.compile() for fa in automatas]
+    rng = random.Random(1)
+    strings = [returnRandomString(rng.randint(1, 64), alphabet, i)
+               for i in xrange(count)]
+
+    print "MultiMatcher, {0} automata, {1} strings".format(n, count)
+    start = timeit.default_timer()
+    matcher = MultiMatcher(automatas)
+    report("MultiMatcher construction", timeit.default_timer() - start)
+    print "{0} groups, {1} states".format(
+        matcher.getNumberOfGroups(),
+        sum(cfa.numberOfStates for cfa, masks in matcher.groups))
+    assert [matcher.match(s) for s in strings] == \
+        [[i for i, cfa in enumerate(cfas) if cfa.accepts(s)] for s in strings]
+
+    baseline = best(lambda: [[cfa.accepts(s) for cfa in cfas]
+                             for s in strings])
+    report("CompiledFiniteAutomata.accepts", baseline)
+    report("MultiMatcher.matchMask", best(lambda: [matcher.matchMask(s)
+                                                   for s in strings]),
+           baseline)
+
+def benchmark_findAll(size = 2 ** 20):
+    """Times findAll on a random text of 'size' symbols, for a pattern with
+    a required prefix, which is searched for with str.find, and for a pattern
+    without one, which is scanned with the \Sigma* L automaton."""
+    alphabet = 'abcd'
+    text = returnRandomString(size, alphabet)
+
+    print "findAll, {0} symbols".format(size)
+    for pattern in ['dcbad(a+b)*c', '(c+d)cbad(a+b)*c']:
+        fa = compileRegularExpression(pattern, alphabet)
+        fa.findAll('')
+        matches = fa.findAll(text)
+        report("{0}, {1} matches".format(pattern, len(matches)),
+               best(lambda: fa.findAll(text)))
+
+def benchmark_cachedProperties(n = 50000):
+    """Times the first and the repeated queries of the derived properties of
+    a random FA with 'n' states, and the queries after a change."""
+    fa = returnRandomFA(n, 'ab')
+    queries = [("isEmpty", lambda: fa.isEmpty()),
+               ("findLiveStates", lambda: fa.findLiveStates()),
+               ("compile", lambda: fa.compile()),
+               ("minimize", lambda: minimize(fa))]
+
+    print "cached properties, {0} states".format(n)
+    for name, query in queries:
+        first = best(query, repeat = 1)
+        report("{0}, first".format(name), first)
+        report("{0}, repeated".format(name), best(query), first)
+
+    q = iter(fa.states).next()
+    fa.addTransition(q, 'a', fa.transitions[(q, 'b')])
+    report("minimize, after addTransition",
+           best(lambda: minimize(fa), repeat = 1))
+
+if __name__ == '__main__':
+    benchmark_accepts()
+    benchmark_acceptsMany()
+    benchmark_minimize()
+    benchmark_shortestStrings()
+    benchmark_serialization()
+    benchmark_multiMatcher()
+    benchmark_findAll()
+    benchmark_cachedProperties()
+
+# end-of-finite_automata_benchmarks.py
@@ -0,0 +1,165 @@
+# turing_machine_benchmarks.py
+
+# Benchmarks for the implementation of a Turing Machine found in
+# turing_machine.py. Run from the root of the repository with
+#
+#   python benchmarks/turing_machine_benchmarks.py
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from formal_language.batch import *
+from formal_language.turing_machine import *
+
+# -*- Helper Functions -*-
+
+def returnBusyBeaver():
+    """Returns the 4-state busy beaver, which halts after 107 steps leaving 13
+    ones on the tape."""
+    transition_function = [('A','0','B','1','R'), ('A','1','B','1','L'),
+                           ('B','0','A','1','L'), ('B','1','C','0','L'),
+                           ('C','0','H','1','R'), ('C','1','D','1','L'),
+                           ('D','0','D','1','R'), ('D','1','A','0','R')]
+    return TuringMachine(['A','B','C','D','H'], ['0','1'], '0',
+                         transition_function, 'A', ['H'])
+
+def returnCounter(padding = 0):
+    """Returns a machine which counts in binary on the tape from the number
+    written after the leading blank and halts when the counter overflows, i.e.
+    after roughly 4 * 2^k steps for k bits. The rules are preceded by
+    'padding' rules of unused states, as in a larger machine."""
+    transition_function = [('P' + str(i), '0', 'P' + str(i), '0', 'R')
+                           for i in range(padding)]
+    transition_function += [('S','#','R','#','R'),
+                           ('R','0','R','0','R'), ('R','1','R','1','R'),
+                           ('R','#','C','#','L'), ('C','1','C','0','L'),
+                           ('C','0','R','1','R'), ('C','#','H','#','N')]
+    return TuringMachine(['S','R','C','H'], ['0','1','#'], '#',
+                         transition_function, 'S', ['H'])
+
+def returnLeftWriter():
+    """Returns a machine which, for each 1 of its input, erases the 1 and
+    writes a 0 at the left end of the tape, such that the tape grows to the
+    left by one cell per 1 and the machine runs for roughly n^2 steps on n
+    ones."""
+    transition_function = [('A','1','B','x','L'),
+                           ('B','x','B','x','L'), ('B','0','B','0','L'),
+                           ('B','#','C','0','R'),
+                           ('C','0','C','0','R'), ('C','x','C','x','R'),
+                           ('C','1','B','x','L'), ('C','#','H','#','N')]
+    return TuringMachine(['A','B','C','H'], ['0','1','x','#'], '#',
+                         transition_function, 'A', ['H'])
+
+def listRun(tm, tape):
+    """Runs the machine on a list, inserting a blank at the front whenever the
+    head moves past the left end. Returns the tape and the list of (state,
+    symbol) pairs looked up in each step."""
+    tape = list(tape)
+    pairs = []
+    state = tm.init_state
+    head = 0
+    halted = False
+
+    while not halted:
+        symbol = tape[head]
+        pairs.append((state, symbol))
+        transition = tm.lookupAction(state, symbol)
+        state = transition[2]
+        halted = state in tm.accept_states or transition[3] == 'HALT'
+        tape[head] = transition[3]
+
+        if transition[4] == 'R':
+            head += 1
+        elif transition[4] == 'L':
+            head -= 1
+
+        if head < 0:
+            tape.insert(0, tm.blank)
+            head = 0
+        elif head >= len(tape):
+            tape.append(tm.blank)
+
+    return tape, pairs
+
+def linearLookupAction(tm, state, symbol):
+    """The lookup by a scan of the rules, for comparison."""
+    for transition in tm.transition_function:
+        if transition[0] == state and transition[1] == symbol:
+            return transition
+    return (state, symbol, state, 'HALT', 'N')
+
+def report(name, seconds, steps):
+    print '%-48s %8.3f s %12d steps %8.2f Msteps/s' % \
+        (name, seconds, steps, steps / seconds / 1e6)
+
+# -*- Benchmarks -*-
+
+def benchmark_busyBeaver():
+    tm = returnBusyBeaver()
+    tape = tm.run(['0'])
+    assert tape.count('1') == 13
+    assert tape == listRun(tm, ['0'])[0]
+
+def benchmark_lookupAction(k = 20, padding = 0):
+    tm = returnCounter(padding)
+    pairs = listRun(tm, ['#'] + ['0'] * k)[1]
+
+    start = time.time()
+    for state, symbol in pairs:
+        tm.lookupAction(state, symbol)
+    report('lookupAction, indexed, %d rules' % len(tm.transition_function),
+           time.time() - start, len(pairs))
+
+    start = time.time()
+    for state, symbol in pairs:
+        linearLookupAction(tm, state, symbol)
+    report('lookupAction, linear scan, %d rules' %
+           len(tm.transition_function), time.time() - start, len(pairs))
+
+def benchmark_run(name, tm, tape):
+    start = time.time()
+    expected, pairs = listRun(tm, tape)
+    report('list tape, ' + name, time.time() - start, len(pairs))
+
+    start = time.time()
+    assert tm.run(tape) == expected
+    report('run, ' + name, time.time() - start, len(pairs))
+
+    start = time.time()
+    assert tm.run(tape, accelerate = True) == expected
+    report('run, accelerated, ' + name, time.time() - start, len(pairs))
+
+def benchmark_runBatch(n = 5000):
+    tm = returnLeftWriter()
+    tapes = [['1'] * (i % 40 + 1) for i in range(n)]
+    steps = sum(len(listRun(tm, tape)[1]) for tape in tapes[:40]) * n // 40
+
+    start = time.time()
+    expected = [tm.simulate(tape).tape for tape in tapes]
+    report('simulate, %d tapes' % n, time.time() - start, steps)
+
+    for processes in [1, max(2, multiprocessing.cpu_count())]:
+        start = time.time()
+        results = list(runBatch(tm, tapes, processes = processes,
+                                maxSteps = 10 ** 6))
+        report('runBatch, %d tapes, %d processes' % (n, processes),
+               time.time() - start, steps)
+        assert [result.tape for result in results] == expected
+
+if __name__ == '__main__':
+    benchmark_busyBeaver()
+    benchmark_lookupAction()
+    benchmark_lookupAction(padding = 50)
+    benchmark_run('counter with 20 bits', returnCounter(), ['#'] + ['0'] * 20)
+    benchmark_run('left writer with 1500 ones', returnLeftWriter(),
+                  ['1'] * 1500)
+    benchmark_runBatch()
+
+# end-of-turing_machine_benchmarks.py
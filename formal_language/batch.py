@@ -0,0 +1,145 @@
+# batch.py
+
+# Runs a Turing Machine or a Finite Automata on many inputs in parallel over a
+# pool of processes.
+#
+# The machine is handed to each worker process once, by the initializer of the
+# pool, and the inputs are sent to the workers in chunks, so the cost of
+# communicating with the workers is paid per chunk rather than per input.
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+# --*-- Imports --*--
+
+import multiprocessing
+from exceptions import *
+from compiled_finite_automata import CompiledFiniteAutomata
+from compact_finite_automata import CompactFiniteAutomata
+from finite_automata import FiniteAutomata
+from turing_machine import TuringMachine
+
+# --*-- Functions --*--
+
+def runBatch(machine, inputs, processes = None, chunksize = None,
+             ordered = True, maxSteps = None, accelerate = False):
+    """Runs the machine on each of the inputs and generates the results.
+
+    For a Turing Machine the results are RunResults (see
+    TuringMachine.simulate) without checkpoints, and for a Finite Automata they
+    are whether the automaton accepts the input.
+
+    @param machine: The machine to run.
+    @type machine: TuringMachine, FiniteAutomata, CompactFiniteAutomata or
+                   CompiledFiniteAutomata.
+
+    @param inputs: The input tapes or strings.
+    @type inputs: iterable.
+
+    @param processes: The number of worker processes, defaults to the number
+                      of CPUs. With 1 process the inputs are run in this
+                      process.
+    @type processes: int.
+
+    @param chunksize: The number of inputs sent to a worker at a time,
+                      defaults to about a quarter of the inputs per worker.
+    @type chunksize: int.
+
+    @param ordered: Whether to generate the results in the order of the
+                    inputs. Otherwise pairs (i, result) are generated as soon
+                    as the result of the i'th input is done.
+    @type ordered: bool.
+
+    @param maxSteps: The largest number of steps to run a Turing Machine on
+                     each input, so a machine which does not halt on one
+                     input cannot stall the batch.
+    @type maxSteps: int.
+
+    @param accelerate: Whether to run a Turing Machine on a BlockTape.
+    @type accelerate: bool.
+
+    @raise IllegalArgumentError: If the machine is not one of the above or
+                                 there are no processes, when runBatch is
+                                 called rather than when the results are
+                                 generated.
+    """
+    if isinstance(machine, (FiniteAutomata, CompactFiniteAutomata)):
+        machine = machine.compile()
+    elif not isinstance(machine, (TuringMachine, CompiledFiniteAutomata)):
+        raise IllegalArgumentError("Cannot run a batch on " + repr(machine))
+    options = (maxSteps, accelerate)
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if processes < 1:
+        raise IllegalArgumentError("Need at least one process: " \
+                                       + str(processes))
+    if chunksize is None:
+        chunksize = 64
+        if hasattr(inputs, '__len__'):
+            chunksize = max(1, len(inputs) // (4 * processes))
+
+    # The arguments are checked above and the results are generated by a
+    # separate generator, so bad arguments are reported on the call.
+    return _generateResults(machine, options, inputs, processes, chunksize,
+                            ordered)
+
+def _generateResults(machine, options, inputs, processes, chunksize,
+                     ordered):
+    """Generates the results of runBatch."""
+    if processes == 1:
+        for i, word in enumerate(inputs):
+            result = _run(machine, options, word)
+            if ordered:
+                yield result
+            else:
+                yield i, result
+        return
+
+    pool = multiprocessing.Pool(processes, _initializeWorker,
+                                (machine, options))
+    try:
+        if ordered:
+            results = pool.imap(_runTask, enumerate(inputs), chunksize)
+        else:
+            results = pool.imap_unordered(_runTask, enumerate(inputs),
+                                          chunksize)
+        for i, result in results:
+            if ordered:
+                yield result
+            else:
+                yield i, result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+# The machine and options of a worker process, see _initializeWorker. They
+# are only set in the worker processes of a pool.
+_machine = None
+_options = None
+
+def _initializeWorker(machine, options):
+    """Stores the machine and the options in the worker process."""
+    global _machine, _options
+    _machine = machine
+    _options = options
+
+def _runTask(task):
+    """Runs the machine of the worker process on the word of the task (i,
+    word) and returns (i, result)."""
+    i, word = task
+    return i, _run(_machine, _options, word)
+
+def _run(machine, options, word):
+    """Runs the machine on the word, a tape or a string, with the options
+    (maxSteps, accelerate) and returns the result."""
+    if isinstance(machine, TuringMachine):
+        maxSteps, accelerate = options
+        result = machine.simulate(word, maxSteps = maxSteps,
+                                  accelerate = accelerate)
+        result.checkpoint = None
+        return result
+    return machine.accepts(word)
+
+# end-of-batch.py
@@ -0,0 +1,156 @@
+# canonical_form.py
+
+# The canonical form of a (Deterministic) Finite Automata, a content hash of
+# it and a store which interns automatas by their language.
+#
+# Two automatas over the same alphabet accept the same language iff they have
+# the same minimal automaton up to the names of the states. Naming the states
+# of the minimal automaton in the order a BFS from the initial state visits
+# them, trying the symbols in sorted order, removes that freedom, so automatas
+# with equal languages have equal canonical forms and equal hashes.
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+# --*-- Imports --*--
+
+import hashlib
+import sys
+from array import array
+from exceptions import *
+from finite_automata import FiniteAutomata, _copyAutomata, _minimal
+from finite_automata_analysis import _cached, _cachedAutomata
+
+# --*-- Classes --*--
+
+class FiniteAutomataStore(object):
+    """A store of Finite Automatas keyed by the canonical hash of their
+    language.
+
+    Interning an automaton returns the canonical form stored for its language,
+    so the automatas returned for equal languages are the same object and
+    duplicates share their memory. Unlike the result of canonicalize, the
+    stored automatas are shared and must not be changed; a stored automaton
+    which has been changed is replaced the next time its language is
+    interned.
+    """
+
+    # --*-- Constructors --*--
+
+    def __init__(self):
+        """Constructs a new empty store."""
+        # The canonical hashes mapping to pairs of a canonical automaton and
+        # its version when it was stored.
+        self._automatas = {}
+
+    # --*-- Methods --*--
+
+    def __len__(self):
+        """Returns the number of languages in the store."""
+        return len(self._automatas)
+
+    def __contains__(self, fa):
+        """Returns true if the language of the automaton is in the store."""
+        return self.lookup(canonicalHash(fa)) is not None
+
+    def intern(self, fa):
+        """Returns the canonical automaton stored for the language of the given
+        automaton, storing the canonical form of the automaton if the language
+        is new.
+
+        @param fa: The automaton to intern.
+        @type fa: FiniteAutomata.
+        """
+        key = canonicalHash(fa)
+        canonical = self.lookup(key)
+        if canonical is None:
+            canonical = canonicalize(fa)
+            self._automatas[key] = (canonical, canonical.getVersion())
+        return canonical
+
+    def lookup(self, key):
+        """Returns the canonical automaton stored for the given canonical hash,
+        or None if there is none.
+
+        @param key: A canonical hash, see canonicalHash.
+        @type key: str.
+        """
+        entry = self._automatas.get(key)
+        if entry is None:
+            return None
+        canonical, version = entry
+        if canonical.getVersion() != version:
+            del self._automatas[key]
+            return None
+        return canonical
+
+# --*-- Functions --*--
+
+def canonicalize(fa):
+    """Returns a new automaton in the canonical form of the automaton: its
+    minimal automaton with the states named 'q0', 'q1', ... in BFS order from
+    the initial state, trying the symbols in sorted order.
+
+    The canonical form is cached on the automaton like the minimal automaton,
+    and each call returns a copy of it (see minimize).
+    """
+    return _copyAutomata(_cachedAutomata(fa, 'canonical', _canonicalize))
+
+def _canonicalize(fa):
+    """Constructs the canonical form of the automaton, see canonicalize."""
+    minimal = _minimal(fa)
+    order, codes = _numberStates(minimal)
+    names = ['q' + str(i) for i in xrange(len(order))]
+
+    transitions = {}
+    for q in order:
+        for c in fa.alphabet:
+            transitions[(names[codes[q]], c)] = \
+                names[codes[minimal.transitions[(q, c)]]]
+    return FiniteAutomata(frozenset(names), fa.alphabet, 'q0',
+                          frozenset(names[codes[q]] for q in minimal.accept),
+                          transitions, check = False)
+
+def canonicalHash(fa):
+    """Returns a hash of the canonical form of the automaton as a string of 40
+    hexadecimal digits. The hash is the same for automatas over the same
+    alphabet accepting the same language, in any process and on any machine,
+    and different for different languages unless by a SHA-1 collision. It is
+    cached on the automaton."""
+    return _cached(fa, 'canonicalHash', _canonicalHash)
+
+def _canonicalHash(fa):
+    """Computes the hash of the canonical form of the automaton, from the
+    symbols, the number of states, the accepting states and the transitions
+    between the numbers of the states, see canonicalHash."""
+    minimal = _minimal(fa)
+    order, codes = _numberStates(minimal)
+    symbols = sorted(fa.alphabet)
+
+    numbers = array('i', [len(order), len(symbols)])
+    numbers.extend(1 if q in minimal.accept else 0 for q in order)
+    for q in order:
+        numbers.extend(codes[minimal.transitions[(q, c)]] for c in symbols)
+    if sys.byteorder != 'little':
+        numbers.byteswap()
+
+    digest = hashlib.sha1(repr(symbols))
+    digest.update(numbers.tostring())
+    return digest.hexdigest()
+
+def _numberStates(fa):
+    """Returns the list of the states reachable from the initial state in BFS
+    order, trying the symbols in sorted order, and the dictionary of their
+    positions in the list."""
+    symbols = sorted(fa.alphabet)
+    codes = {fa.initial : 0}
+    order = [fa.initial]
+    for q in order:
+        for c in symbols:
+            p = fa.transitions[(q, c)]
+            if p not in codes:
+                codes[p] = len(order)
+                order.append(p)
+    return order, codes
+
+# end-of-canonical_form.py
@@ -0,0 +1,389 @@
+# compact_finite_automata.py
+
+# A compact representation of a (Deterministic) Finite Automata for automatas
+# with millions of transitions.
+#
+# A FiniteAutomata keeps its transition function as a dictionary of tuples,
+# which takes well over a hundred bytes per transition. A Compact Finite
+# Automata numbers the states 0, 1, ..., n-1 and the symbols 0, 1, ..., k-1 in
+# sorted order, and keeps the transition function as an array of n * k
+# machine integers and the accepting states as a bitmap, i.e. about 4 bytes per
+# transition and a bit per state. The names of the states are only kept if
+# they are not the numbers of the states themselves.
+#
+# The attributes 'states', 'accept', 'initial' and 'transitions' of a
+# FiniteAutomata are provided as views computed from the arrays on access, so
+# the functions of finite_automata.py work on a Compact Finite Automata as
+# well.
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+# --*-- Imports --*--
+
+import collections
+from array import array
+from exceptions import *
+from compiled_finite_automata import CompiledFiniteAutomata
+from finite_automata_analysis import *
+from finite_automata_analysis import _cached
+
+# --*-- Classes --*--
+
+class CompactFiniteAutomata(object):
+    """A Finite Automata with integer coded states, see above.
+
+    The transition from the state with code q on the symbol with code c goes
+    to the state with code table[q * k + c], and the state with code q is
+    accepting iff bit 7 - q % 8 of acceptBits[q / 8] is set, as in the file
+    format of serialization.py.
+    """
+
+    __slots__ = ['alphabet', 'symbolList', 'table', 'acceptBits',
+                 'numberOfStates', 'numberOfSymbols', '_initial', '_names',
+                 '_stateIndex', '_symbolIndex', '_cache', '_version']
+
+    # --*-- Constructors --*--
+
+    def __init__(self, numberOfStates, alphabet, initial, accept, table,
+                 names = None):
+        """Constructs a new Compact Finite Automata.
+
+        @param numberOfStates: The number of states, 'n'.
+        @type numberOfStates: int.
+
+        @param alphabet: The set of symbols, '\Sigma'.
+        @type alphabet: frozenset.
+
+        @param initial: The code of the initial state.
+        @type initial: int.
+
+        @param accept: The codes of the accepting states.
+        @type accept: iterable of int.
+
+        @param table: The n * k codes of the next states, row by row, with the
+        symbols in sorted order.
+        @type table: array or iterable of int.
+
+        @param names: The names of the states, the position of a name is the
+        code of the state. Defaults to the codes themselves.
+        @type names: list.
+        """
+        n = numberOfStates
+        self.alphabet = frozenset(alphabet)
+        self.symbolList = sorted(self.alphabet)
+        self.numberOfStates = n
+        self.numberOfSymbols = k = len(self.symbolList)
+        self.table = array('i', table)
+
+        if len(self.table) != n * k:
+            raise AutomatonNotWellDefinedError("Transition function is not " \
+                                                   + "total.")
+        if n * k > 0 and (min(self.table) < 0 or max(self.table) >= n):
+            raise AutomatonNotWellDefinedError("Transition function maps " \
+                                                   + "to unknown states.")
+        if not 0 <= initial < n:
+            raise AutomatonNotWellDefinedError("Initial state is unknown.")
+        if names is not None and len(names) != n:
+            raise IllegalArgumentError(names)
+
+        self.acceptBits = bytearray((n + 7) // 8)
+        for q in accept:
+            if not 0 <= q < n:
+                raise AutomatonNotWellDefinedError("Accepting state is " \
+                                                       + "unknown.")
+            self.acceptBits[q >> 3] |= 0x80 >> (q & 7)
+
+        self._initial = initial
+        self._names = names
+        self._stateIndex = None
+        self._symbolIndex = dict((c, i) for i, c in enumerate(self.symbolList))
+
+        # Cache of derived properties, see FiniteAutomata.getVersion.
+        self._cache = {}
+        self._version = 0
+
+    # --*-- Properties --*--
+
+    @property
+    def states(self):
+        """A view of the set of states, 'Q'."""
+        return _StateView(self)
+
+    @property
+    def accept(self):
+        """A view of the set of accepting states, 'A'."""
+        return _AcceptView(self)
+
+    @property
+    def initial(self):
+        """The initial state, 'q_0'."""
+        return self.stateName(self._initial)
+
+    @property
+    def transitions(self):
+        """A view of the transition function as a dictionary of 2-tuples
+        '(Q_old, \Sigma)' mapping to 'Q_new'."""
+        return _TransitionView(self)
+
+    # --*-- Methods --*--
+
+    def stateName(self, q):
+        """Returns the name of the state with the given code."""
+        if self._names is None:
+            return q
+        return self._names[q]
+
+    def stateCode(self, q):
+        """Returns the code of the state with the given name, or raises a
+        KeyError if there is no such state."""
+        if self._names is None:
+            if isinstance(q, (int, long)) and 0 <= q < self.numberOfStates:
+                return q
+            raise KeyError(q)
+        if self._stateIndex is None:
+            self._stateIndex = dict((name, i) for i, name
+                                    in enumerate(self._names))
+        return self._stateIndex[q]
+
+    def isAcceptingCode(self, q):
+        """Returns true if the state with the given code is accepting."""
+        return self.acceptBits[q >> 3] & (0x80 >> (q & 7)) != 0
+
+    def getNumberOfStates(self):
+        """Returns the number of states of the Finite Automata."""
+        return self.numberOfStates
+
+    def getVersion(self):
+        """Returns the number of changes made to the automaton, see
+        FiniteAutomata.getVersion."""
+        return self._version
+
+    def addTransition(self, q, c, p):
+        """Replaces the transition from state q on the symbol c with a
+        transition to state p. The states must be states of the automaton.
+
+        @raise IllegalArgumentError: If q or p is not a state.
+        @raise IllegalCharacterError: If c is not in the alphabet.
+        """
+        if c not in self._symbolIndex:
+            raise IllegalCharacterError(c)
+        try:
+            i = self.stateCode(q) * self.numberOfSymbols + self._symbolIndex[c]
+            self.table[i] = self.stateCode(p)
+        except KeyError, e:
+            raise IllegalArgumentError(e.args[0])
+        self._cache.clear()
+        self._version += 1
+
+    def delta(self, q, c):
+        """Looks up the transition in the transition function."""
+        if c not in self._symbolIndex:
+            raise IllegalCharacterError(c)
+        return self.transitions[(q, c)]
+
+    def deltaStar(self, q, s):
+        """Runs the given string on the Finite Automata from state q and
+        returns the state it ends up in, see FiniteAutomata.deltaStar."""
+        return self.stateName(self._runCodes(self.stateCode(q), s))
+
+    def accepts(self, s):
+        """Runs the given string on the Finite Automata and returns true if the
+        string is accepted by the automata, false otherwise."""
+        return self.isAcceptingCode(self._runCodes(self._initial, s))
+
+    def _runCodes(self, code, s):
+        """Runs the string from the state with the given code and returns the
+        code of the state it ends up in."""
+        table = self.table
+        k = self.numberOfSymbols
+        symbolIndex = self._symbolIndex
+        for c in s:
+            try:
+                code = table[code * k + symbolIndex[c]]
+            except KeyError:
+                raise IllegalCharacterError(c)
+        return code
+
+    def compile(self):
+        """Compiles the automaton into a CompiledFiniteAutomata, which is
+        cached like the compiled table of a FiniteAutomata."""
+        return _cached(self, 'compiled', _compile)
+
+    def findReachableStates(self):
+        """Finds the set of states that are reachable from the initial state."""
+        return findReachableStates(self)
+
+    def findLiveStates(self):
+        """Finds the set of states that can reach an accept state."""
+        return findLiveStates(self)
+
+    def isFinite(self):
+        """Returns true if the language of this automaton is finite."""
+        return isFinite(self)
+
+    def isEmpty(self):
+        """Returns true if the language of the automaton is empty."""
+        return _cached(self, 'empty', lambda fa:
+                           len(fa.findReachableStates() & fa.accept) == 0)
+
+class _StateView(collections.Set):
+    """The set of states of a Compact Finite Automata."""
+
+    __slots__ = ['_automata']
+
+    def __init__(self, automata):
+        self._automata = automata
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        return frozenset(iterable)
+
+    def __len__(self):
+        return self._automata.numberOfStates
+
+    def __iter__(self):
+        automata = self._automata
+        if automata._names is None:
+            return iter(xrange(automata.numberOfStates))
+        return iter(automata._names)
+
+    def __contains__(self, q):
+        try:
+            self._automata.stateCode(q)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def difference(self, other):
+        return self - other
+
+    def union(self, other):
+        return self | other
+
+    def intersection(self, other):
+        return self & other
+
+class _AcceptView(_StateView):
+    """The set of accepting states of a Compact Finite Automata."""
+
+    __slots__ = []
+
+    def __len__(self):
+        return sum(bin(byte).count('1') for byte in self._automata.acceptBits)
+
+    def __iter__(self):
+        automata = self._automata
+        for q in xrange(automata.numberOfStates):
+            if automata.isAcceptingCode(q):
+                yield automata.stateName(q)
+
+    def __contains__(self, q):
+        try:
+            return self._automata.isAcceptingCode(self._automata.stateCode(q))
+        except (KeyError, TypeError):
+            return False
+
+class _TransitionView(collections.Mapping):
+    """The transition function of a Compact Finite Automata. Copies of the
+    view are dictionaries, such that the copy of the transition function of a
+    Compact Finite Automata can be used for a FiniteAutomata."""
+
+    __slots__ = ['_automata']
+
+    def __init__(self, automata):
+        self._automata = automata
+
+    def __len__(self):
+        return len(self._automata.table)
+
+    def __iter__(self):
+        automata = self._automata
+        for q in xrange(automata.numberOfStates):
+            name = automata.stateName(q)
+            for c in automata.symbolList:
+                yield (name, c)
+
+    def __getitem__(self, key):
+        automata = self._automata
+        q, c = key
+        try:
+            return automata.stateName(automata.table[
+                    automata.stateCode(q) * automata.numberOfSymbols +
+                    automata._symbolIndex[c]])
+        except TypeError:
+            raise KeyError(key)
+
+    def __copy__(self):
+        return self.copy()
+
+    def copy(self):
+        automata = self._automata
+        table = automata.table
+        stateName = automata.stateName
+        transitions = {}
+        i = 0
+        for q in xrange(automata.numberOfStates):
+            name = stateName(q)
+            for c in automata.symbolList:
+                transitions[(name, c)] = stateName(table[i])
+                i += 1
+        return transitions
+
+# --*-- Functions --*--
+
+def compactAutomata(fa):
+    """Returns a Compact Finite Automata with the same states, alphabet,
+    initial state, accepting states and transitions as the given automaton.
+    The states are numbered as in its compiled table (see compileAutomata),
+    and their names are not kept if they are the numbers 0, 1, ..., n-1 in
+    that order.
+
+    @param fa: The automaton to convert.
+    @type fa: FiniteAutomata or CompiledFiniteAutomata.
+    """
+    if not isinstance(fa, CompiledFiniteAutomata):
+        fa = fa.compile()
+    n = fa.numberOfStates
+    k = fa.numberOfSymbols
+
+    names = fa.stateList
+    if names == range(n):
+        names = None
+    else:
+        names = list(names)
+
+    table = array('i', fa.table)
+    for i in xrange(len(table)):
+        table[i] //= k
+
+    # The columns of the table are reordered if the symbols of the compiled
+    # automaton are not in sorted order, as for a loaded automaton.
+    symbolList = sorted(fa.symbolList)
+    if symbolList != fa.symbolList:
+        columns = [fa.symbolIndex[c] for c in symbolList]
+        table = array('i', (table[row + j] for row in xrange(0, n * k, k)
+                            for j in columns))
+
+    accept = [q for q in xrange(n) if fa.acceptMask[q]]
+    return CompactFiniteAutomata(n, symbolList, fa.initial, accept, table,
+                                 names)
+
+def _compile(fa):
+    """Returns the CompiledFiniteAutomata of a Compact Finite Automata, whose
+    states and symbols have the same codes."""
+    k = fa.numberOfSymbols
+    stateList = fa._names
+    if stateList is None:
+        stateList = range(fa.numberOfStates)
+    acceptMask = bytearray(fa.numberOfStates)
+    for q in xrange(fa.numberOfStates):
+        if fa.isAcceptingCode(q):
+            acceptMask[q] = 1
+    table = array('i', fa.table)
+    for i in xrange(len(table)):
+        table[i] *= k
+    return CompiledFiniteAutomata(stateList, list(fa.symbolList), fa._initial,
+                                  acceptMask, table)
+
+# end-of-compact_finite_automata.py
@@ -0,0 +1,461 @@
+# compiled_finite_automata.py
+
+# A compiled, table driven representation of a (Deterministic) Finite Automata.
+# States and symbols are given integer codes and the transition function is
+# packed into a flat array, which makes running long strings considerably
+# faster than going through the dictionary based transition function.
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+# --*-- Imports --*--
+
+import mmap
+from array import array
+from collections import deque
+from exceptions import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# --*-- Classes --*--
+
+class CompiledFiniteAutomata(object):
+    """A Finite Automata compiled into a dense transition table.
+
+    The states are numbered 0, 1, ..., n-1 and the symbols 0, 1, ..., k-1. The
+    transition table is a flat array of n * k entries where row q holds the
+    transitions out of state q. Instead of the number of the next state each
+    entry holds the offset of its row, i.e. table[q * k + c] = \delta(q, c) * k,
+    so running a string only costs a single addition and lookup per symbol.
+    """
+
+    # --*-- Constructors --*--
+
+    def __init__(self, stateList, symbolList, initial, acceptMask, table):
+        """Constructs a new Compiled Finite Automata.
+
+        @param stateList: The states, the position of a state is its code.
+        @type stateList: list.
+
+        @param symbolList: The symbols, the position of a symbol is its code.
+        @type symbolList: list.
+
+        @param initial: The code of the initial state.
+        @type initial: int.
+
+        @param acceptMask: A byte per state, 1 if the state is accepting and 0
+        otherwise.
+        @type acceptMask: bytearray.
+
+        @param table: The transition table of row offsets described above.
+        @type table: array or NumPy array.
+        """
+
+        self.stateList = stateList
+        self.symbolList = symbolList
+        self.initial = initial
+        self.acceptMask = acceptMask
+        self.table = table
+
+        self.numberOfStates = len(stateList)
+        self.numberOfSymbols = len(symbolList)
+        self._stateIndex = None
+        self.symbolIndex = dict((c, i) for i, c in enumerate(symbolList))
+
+        # A translation table for byte strings, used to turn a string into its
+        # symbol codes in a single pass.
+        self._translation = None
+        self._symbolChars = None
+        if all(isinstance(c, str) and len(c) == 1 for c in symbolList):
+            translation = [chr(0)] * 256
+            for c, i in self.symbolIndex.items():
+                translation[ord(c)] = chr(i)
+            self._translation = ''.join(translation)
+            self._symbolChars = ''.join(symbolList)
+
+    # --*-- Properties --*--
+
+    @property
+    def stateIndex(self):
+        """A dictionary from the states to their codes, built on first
+        use."""
+        if self._stateIndex is None:
+            self._stateIndex = dict((q, i) for i, q in enumerate(self.stateList))
+        return self._stateIndex
+
+    # --*-- Methods --*--
+
+    def encode(self, s):
+        """Returns the symbol codes of the given string as a sequence of
+        integers. Raises an IllegalCharacterError if the string contains a
+        symbol which is not in the alphabet.
+
+        @param s: a string of alphabet symbols
+        @type s: str
+        """
+        if self._translation is not None and isinstance(s, (str, bytearray)):
+            illegal = s.translate(None, self._symbolChars)
+            if len(illegal) > 0:
+                raise IllegalCharacterError(illegal[0])
+            return bytearray(s.translate(self._translation))
+
+        symbolIndex = self.symbolIndex
+        try:
+            return [symbolIndex[c] for c in s]
+        except KeyError, e:
+            raise IllegalCharacterError(e.args[0])
+
+    def runCodes(self, offset, codes):
+        """Runs the given symbol codes from the row 'offset' and returns the row
+        offset of the state it ends up in.
+
+        @param offset: the row offset of a state, i.e. its code times k
+        @type offset: int
+
+        @param codes: symbol codes
+        @type codes: sequence of ints
+        """
+        table = self.table
+        if numpy is not None and isinstance(table, numpy.ndarray):
+            # Indexing a NumPy array makes a NumPy scalar per entry, which is
+            # many times slower than item.
+            item = table.item
+            for c in codes:
+                offset = item(offset + c)
+            return offset
+
+        for c in codes:
+            offset = table[offset + c]
+        return offset
+
+    def deltaStar(self, q, s):
+        """Runs the given string from the state 'q' and returns the state it
+        ends up in (see FiniteAutomata.deltaStar).
+
+        @param q: a state
+        @type q: str
+
+        @param s: a string of alphabet symbols
+        @type s: str
+        """
+        k = self.numberOfSymbols
+        offset = self.runCodes(self.stateIndex[q] * k, self.encode(s))
+        return self.stateList[offset // k]
+
+    def accepts(self, s):
+        """Returns true if the given string is accepted by the automaton, false
+        otherwise (see FiniteAutomata.accepts).
+
+        @param s: a string of alphabet symbols
+        @type s: str
+        """
+        k = self.numberOfSymbols
+        offset = self.runCodes(self.initial * k, self.encode(s))
+        return self.acceptMask[offset // k] == 1
+
+    def acceptsMany(self, strings):
+        """Returns for each of the given strings whether it is accepted by the
+        automaton, in the same order as the strings.
+
+        The strings are bucketed by length and each bucket is turned into a
+        matrix of symbol codes with a column per position. All strings of a
+        bucket are then advanced one symbol at a time by a single indexed
+        lookup in the transition table. If NumPy is not available the strings
+        are run one at a time and a list is returned instead of an array.
+
+        @param strings: strings of alphabet symbols
+        @type strings: iterable of str
+        """
+        strings = list(strings)
+        if numpy is None:
+            return [self.accepts(s) for s in strings]
+
+        k = self.numberOfSymbols
+        table = self.table
+        if not isinstance(table, numpy.ndarray):
+            table = numpy.array(table, dtype = numpy.intp)
+        acceptMask = numpy.array(self.acceptMask, dtype = bool)
+        result = numpy.zeros(len(strings), dtype = bool)
+
+        # Sort the strings by length, so that each bucket of equal length
+        # strings is a contiguous slice of a single array of symbol codes.
+        lengths = numpy.fromiter((len(s) for s in strings), dtype = numpy.intp,
+                                 count = len(strings))
+        order = numpy.argsort(lengths, kind = 'mergesort')
+        strings = [strings[i] for i in order.tolist()]
+        if self._translation is not None and \
+                all(isinstance(s, str) for s in strings):
+            codes = numpy.frombuffer(bytes(self.encode(''.join(strings))),
+                                     dtype = numpy.uint8)
+        else:
+            codes = numpy.array([c for s in strings for c in self.encode(s)],
+                                dtype = numpy.intp)
+
+        start = 0
+        position = 0
+        for length, count in zip(*numpy.unique(lengths[order],
+                                               return_counts = True)):
+            end = position + count * length
+            # One row per position, so each step reads a contiguous row.
+            bucket = codes[position:end].reshape(count, length).T.copy()
+            offsets = numpy.empty(count, dtype = numpy.intp)
+            offsets.fill(self.initial * k)
+            for column in bucket:
+                offsets = table[offsets + column]
+
+            result[order[start:start + count]] = acceptMask[offsets // k]
+            start += count
+            position = end
+
+        return result
+
+    def getShortestString(self):
+        """Returns the shortest string that is accepted by the automaton, or
+        None if the language is empty. Among the shortest strings the first
+        one in lexicographic order is returned.
+
+        The states are explored with a BFS from the initial state, trying the
+        symbols in sorted order, which takes O(n k) time.
+        """
+        k = self.numberOfSymbols
+        table = self.table
+        previous = [None] * self.numberOfStates # state -> (state, symbol)
+        previous[self.initial] = (None, None)
+        pending = deque([self.initial])
+
+        while len(pending) > 0:
+            q = pending.popleft()
+            if self.acceptMask[q] == 1:
+                symbols = []
+                while previous[q][0] is not None:
+                    q, c = previous[q]
+                    symbols.append(self.symbolList[c])
+                return ''.join(reversed(symbols))
+
+            row = q * k
+            for c in xrange(k):
+                p = table[row + c] // k
+                if previous[p] is None:
+                    previous[p] = (q, c)
+                    pending.append(p)
+
+        return None
+
+    def acceptedStrings(self, maxLength = None):
+        """Generates the strings accepted by the automaton in length-
+        lexicographic order, i.e. by length and then alphabetically.
+
+        For every length m the set of reachable states from which an accept
+        state can be reached in exactly m steps is computed in O(n k) time.
+        The strings of a length are then found by a DFS which only follows
+        transitions that can still end in an accept state, so no time is spent
+        on dead branches. Unreachable states are left out, so an unreachable
+        cycle through an accept state does not keep the generator going after
+        the last string of a finite language.
+
+        @param maxLength: The length of the longest strings to generate. If
+        None the generator does not stop unless the language is empty.
+        @type maxLength: int
+        """
+        k = self.numberOfSymbols
+        n = self.numberOfStates
+        table = self.table
+        symbolList = self.symbolList
+
+        # The states reachable from the initial state.
+        seen = bytearray(n)
+        seen[self.initial] = 1
+        reachable = [self.initial]
+        for q in reachable:
+            row = q * k
+            for c in xrange(k):
+                p = table[row + c] // k
+                if not seen[p]:
+                    seen[p] = 1
+                    reachable.append(p)
+
+        # layers[m][q] is 1 iff q is reachable and an accept state can be
+        # reached from q in exactly m steps.
+        firstLayer = bytearray(n)
+        for q in reachable:
+            firstLayer[q] = self.acceptMask[q]
+        layers = [firstLayer]
+        length = 0
+        while maxLength is None or length <= maxLength:
+            while len(layers) <= length:
+                layer = layers[-1]
+                nextLayer = bytearray(n)
+                for q in reachable:
+                    row = q * k
+                    for c in xrange(k):
+                        if layer[table[row + c] // k]:
+                            nextLayer[q] = 1
+                            break
+                layers.append(nextLayer)
+                if maxLength is None and not any(nextLayer):
+                    # No longer strings can be accepted from any state.
+                    return
+
+            if layers[length][self.initial]:
+                # work[d] holds the state after d symbols and the code of the
+                # next symbol to try from it.
+                prefix = []
+                work = [[self.initial, 0]]
+                while len(work) > 0:
+                    q, c = work[-1]
+                    remaining = length - len(prefix)
+                    if remaining > 0:
+                        layer = layers[remaining - 1]
+                        row = q * k
+                        while c < k and not layer[table[row + c] // k]:
+                            c += 1
+                        if c < k:
+                            work[-1][1] = c + 1
+                            prefix.append(symbolList[c])
+                            work.append([table[row + c] // k, 0])
+                            continue
+                    else:
+                        yield ''.join(prefix)
+
+                    work.pop()
+                    if len(prefix) > 0:
+                        prefix.pop()
+
+            length += 1
+
+    def countAccepted(self, length):
+        """Returns the number of strings of the given length that are accepted
+        by the automaton.
+
+        The number of strings of each length leading from the initial state to
+        each state is computed by dynamic programming, which takes
+        O(length n k) time in the worst case.
+
+        @param length: a string length
+        @type length: int
+        """
+        k = self.numberOfSymbols
+        table = self.table
+        counts = {self.initial : 1}
+        for i in xrange(length):
+            nextCounts = {}
+            for q, count in counts.iteritems():
+                row = q * k
+                for c in xrange(k):
+                    p = table[row + c] // k
+                    nextCounts[p] = nextCounts.get(p, 0) + count
+            counts = nextCounts
+
+        return sum(count for q, count in counts.iteritems()
+                   if self.acceptMask[q] == 1)
+
+class FiniteAutomataMatcher(object):
+    """A resumable run of a Compiled Finite Automata.
+
+    The input is fed to the matcher a chunk at a time and only the current state
+    is kept between chunks, so arbitrarily large inputs can be checked in
+    constant memory. Large buffers, memory-mapped files and file-like objects
+    are consumed in slices of 'chunkSize' symbols.
+    """
+
+    # --*-- Constructors --*--
+
+    def __init__(self, cfa, chunkSize = 2 ** 16):
+        """Constructs a new matcher positioned at the initial state.
+
+        @param cfa: The automaton to run.
+        @type cfa: CompiledFiniteAutomata.
+
+        @param chunkSize: The number of symbols to process at a time.
+        @type chunkSize: int.
+        """
+        self.automata = cfa
+        self.chunkSize = chunkSize
+        self.reset()
+
+    # --*-- Properties --*--
+
+    @property
+    def state(self):
+        """The state the automaton is currently in."""
+        return self.automata.stateList[self._offset // \
+                                           self.automata.numberOfSymbols]
+
+    # --*-- Methods --*--
+
+    def reset(self):
+        """Moves the matcher back to the initial state."""
+        self._offset = self.automata.initial * self.automata.numberOfSymbols
+        self.consumed = 0
+
+    def feed(self, chunk):
+        """Runs the automaton on the given chunk of input.
+
+        @param chunk: a str, bytearray, memoryview, memory-mapped file or
+        file-like object holding alphabet symbols.
+        @type chunk: str
+        """
+        if not isinstance(chunk, mmap.mmap) and hasattr(chunk, 'read'):
+            data = chunk.read(self.chunkSize)
+            while len(data) > 0:
+                self._feedChunk(data)
+                data = chunk.read(self.chunkSize)
+        elif isinstance(chunk, (memoryview, mmap.mmap)) or \
+                len(chunk) > self.chunkSize:
+            for i in xrange(0, len(chunk), self.chunkSize):
+                data = chunk[i:i + self.chunkSize]
+                if isinstance(data, memoryview):
+                    data = data.tobytes()
+                self._feedChunk(data)
+        else:
+            self._feedChunk(chunk)
+
+        return self
+
+    def _feedChunk(self, data):
+        """Runs the automaton on a chunk that fits in memory."""
+        self._offset = self.automata.runCodes(self._offset,
+                                              self.automata.encode(data))
+        self.consumed += len(data)
+
+    def isAccepting(self):
+        """Returns true if the input fed so far is accepted by the
+        automaton."""
+        return self.automata.acceptMask[self._offset // \
+                                            self.automata.numberOfSymbols] == 1
+
+# --*-- Functions --*--
+
+def compileAutomata(fa):
+    """Compiles the given Finite Automata into a CompiledFiniteAutomata.
+
+    The initial state gets code 0, the remaining states and the symbols are
+    numbered in sorted order.
+    """
+    stateList = [fa.initial] + sorted(fa.states - frozenset([fa.initial]))
+    symbolList = sorted(fa.alphabet)
+
+    stateIndex = dict((q, i) for i, q in enumerate(stateList))
+    k = len(symbolList)
+
+    table = array('i', [0]) * (len(stateList) * k)
+    transitions = fa.transitions
+    for i, q in enumerate(stateList):
+        row = i * k
+        for j, c in enumerate(symbolList):
+            try:
+                table[row + j] = stateIndex[transitions[(q, c)]] * k
+            except KeyError:
+                raise AutomatonNotWellDefinedError("Transition function " \
+                                                       + "is not total.")
+
+    acceptMask = bytearray(len(stateList))
+    for q in fa.accept:
+        acceptMask[stateIndex[q]] = 1
+
+    return CompiledFiniteAutomata(stateList, symbolList, 0, acceptMask, table)
+
+# end-of-compiled_finite_automata.py
@@ -12,8 +12,15 @@
 # --*-- Imports --*--
 
 import copy
+import heapq
 import subprocess
+from collections import deque
 from exceptions import *
+from compiled_finite_automata import *
+from compact_finite_automata import *
+from finite_automata_analysis import *
+from finite_automata_analysis import _cached, _cachedAutomata
+from finite_automata_search import *
 from nondeterministic_finite_automata import *
 
 # --*-- Classes --*--
@@ -37,7 +44,8 @@ class FiniteAutomata(object):
 
     # --*-- Constructors --*--
 
-    def __init__(self, states, alphabet, initial, accept, transitions):
+    def __init__(self, states, alphabet, initial, accept, transitions,
+                 check = True):
         """Constructs a new Finite Automata.
 
         @param states: A set of states, 'Q'.
@@ -55,8 +63,20 @@ class FiniteAutomata(object):
         @param transitions: A dictionary of 2-tuples '(Q_old, \Sigma)' mapping to
         a string symbol 'Q_new'.
         @type transitions: dict.
+
+        @param check: Whether to check that the automaton is well-defined. The
+        automatas constructed by this module from well-defined automatas are
+        well-defined by construction and skip the check.
+        @type check: bool.
         """
 
+        # Cache of derived properties, cleared whenever the automaton changes.
+        self._cache = {}
+        # Number of changes to the automaton, see getVersion.
+        self._version = 0
+        # Summary of the well-definedness of the automaton, see isWellDefined.
+        self._definition = None
+
         # input
         self.states = states
         self.alphabet = alphabet
@@ -64,10 +84,20 @@ class FiniteAutomata(object):
         self.accept = accept
         self.transitions = transitions
 
-        checkWellDefined(self)
+        if check:
+            checkWellDefined(self)
 
     # --*-- Methods --*--
 
+    def __setattr__(self, name, value):
+        """Sets the attribute and clears the cache of derived properties if
+        the attribute is part of the definition of the automaton."""
+        object.__setattr__(self, name, value)
+        if not name.startswith('_'):
+            self._cache.clear()
+            self._definition = None
+            self._version += 1
+
     def getNumberOfStates(self):
         """Returns the number of states of the Finite Automata."""
         return len(self.states)
@@ -77,7 +107,40 @@ class FiniteAutomata(object):
         if c not in self.alphabet:
             raise IllegalCharacterError(c)
 
+        # Update the summary of well-definedness with the new transition only.
+        definition = self._definition
+        if definition is not None:
+            if q in self.states and (q,c) not in self.transitions:
+                definition['missing'] -= 1
+            if q in self.states and p in self.states:
+                definition['invalid'].discard((q,c))
+            else:
+                definition['invalid'].add((q,c))
+
         self.transitions[(q,c)] = p
+        self._cache.clear()
+        self._version += 1
+
+    def getVersion(self):
+        """Returns the number of changes made to the automaton through
+        addTransition and assignments to its attributes. The derived
+        properties cached on the automaton (the reachable and live states, the
+        minimal automaton, the compiled table and so on) are computed once per
+        version, so repeated queries on an unchanged automaton are cheap.
+
+        Changes made directly to the 'transitions' dictionary are not seen,
+        so the cache has to be cleared by assigning the dictionary again."""
+        return self._version
+
+    def isWellDefined(self):
+        """Returns true if the automaton is well-defined (see
+        checkWellDefined). The check is done once and then kept up to date by
+        addTransition, so it is cheap to call after each change."""
+        if self._definition is None:
+            self._definition = _summarizeDefinition(self)
+        definition = self._definition
+        return len(definition['problems']) == 0 and \
+            definition['missing'] == 0 and len(definition['invalid']) == 0
 
     def delta(self, q, c):
         """Looks up the transition in the transition function."""
@@ -144,143 +207,189 @@ class FiniteAutomata(object):
         """
         return self.deltaStar(self.initial, s) in self.accept
 
-    def findReachableStates(self):
-        """Finds the set of states that are reachable from the initial state."""
-
-        reachable = []
-        pending = []
-        pending.append(self.initial)
-
-        while len(pending) > 0:
-            q = pending.pop()
-            reachable.append(q)
-
-            for c in self.alphabet:
-                p = self.delta(q, c)
-                if p not in reachable:
-                    pending.append(p)
-
-        return frozenset(reachable)
-
-    def isFinite(self):
-        """Returns true if the language of this automaton is finite."""
-        # The language is finite iff there is a reachable loop with a path to an
-        # accept state.
-        live = self._findLiveStates()
-        return not self._containsLoop(self.initial, live, set([]))
-
-    def _findLiveStates(self, s):
-        """Finds the set of states among 's' that can reach an accept state.
-
-        @param s: a set of states
-        @type s: set
+    def compile(self):
+        """Compiles the automaton into a dense transition table, see
+        CompiledFiniteAutomata. The compiled automaton is cached, and does not
+        follow later changes to this automaton."""
+        return _cached(self, 'compiled', compileAutomata)
+
+    def compact(self):
+        """Returns a CompactFiniteAutomata with the same definition as this
+        automaton, which takes a few bytes per transition (see
+        compactAutomata). It does not follow later changes to this
+        automaton."""
+        return compactAutomata(self)
+
+    def matcher(self, chunkSize = 2 ** 16):
+        """Returns a FiniteAutomataMatcher which runs this automaton
+        incrementally on chunks of input."""
+        return FiniteAutomataMatcher(self.compile(), chunkSize)
+
+    def acceptsMany(self, strings):
+        """Returns for each of the given strings whether it is accepted by the
+        automaton, see CompiledFiniteAutomata.acceptsMany.
+
+        @param strings: strings of alphabet symbols
+        @type strings: iterable of str
         """
+        return self.compile().acceptsMany(strings)
 
-        back = {} # p in back[q] iff delta(p,c) = q for some c
-        for p in s:
-            back[p] = set([])
-
-        for p in s:
-            for symbol in self.alphabet:
-                q = self.delta(q, symbol)
-                if q in s:
-                    back[q].add(p)
-
-        live = set(self.accept)
-        pending = set(self.accept)
-        while len(pending) > 0:
-            q = pending.__iter__().next()
-            pending.remove(q)
-            for p in back[q]:
-                if p not in live:
-                    live.add(p)
-                    pending.add(p)
-
-        return live
+    def findAll(self, text):
+        """Returns the substrings of the text which are accepted by the
+        automaton, as the list of pairs (i, j) such that text[i:j] is
+        accepted, ordered by j. For each j only the smallest i is included
+        (see FiniteAutomataSearcher).
 
-    def _containsLoop(self, p, s, path):
-        """Check whether there is a loop in the set 's' reachable from the state
-        'p' through the states in path.
-
-        @param p: a state
-        @type p: str
+        @param text: a string of alphabet symbols
+        @type text: str
+        """
+        return getSearcher(self).findAll(text)
 
-        @param s: a set of states
-        @type s: set
+    def search(self, text):
+        """Returns the first pair (i, j) of findAll, or None if no substring of
+        the text is accepted by the automaton.
 
-        @param path: a set of states
-        @type path: set
+        @param text: a string of alphabet symbols
+        @type text: str
         """
+        return getSearcher(self).search(text)
 
-        path.add(p)
-        for symbol in self.alphabet:
-            q = self.delta(p, symbol)
-            if q in s and (q in path or self._containsLoop(self, q, s, path)):
-                return True
+    def findReachableStates(self):
+        """Finds the set of states that are reachable from the initial state."""
+        return findReachableStates(self)
 
-        path.remove(p)
-        return False
+    def findLiveStates(self):
+        """Finds the set of states that can reach an accept state."""
+        return findLiveStates(self)
+
+    def isFinite(self):
+        """Returns true if the language of this automaton is finite."""
+        return isFinite(self)
 
     def isEmpty(self):
         """Returns true if the language of the automaton is empty."""
         # Check if there exists a state in 'accept' that is also reachable.
-        return len(self.findReachableStates() & self.accept) == 0
+        return _cached(self, 'empty', lambda fa:
+                           len(fa.findReachableStates() & fa.accept) == 0)
 
     def getShortestString(self):
         """Returns the shortest string that is accepted by this
         automaton. Returns None if the language is empty."""
-        # TODO Shortest path to accept state.n
-        pass
+        return self.compile().getShortestString()
+
+    def acceptedStrings(self, maxLength = None):
+        """Generates the strings accepted by this automaton in length-
+        lexicographic order (see CompiledFiniteAutomata.acceptedStrings). The
+        generator stops after the last string if the language is finite.
+
+        @param maxLength: The length of the longest strings to generate.
+        @type maxLength: int
+        """
+        if self.isFinite():
+            # All strings of a finite language are shorter than the number of
+            # states.
+            if maxLength is None or maxLength >= len(self.states):
+                maxLength = len(self.states) - 1
+        return self.compile().acceptedStrings(maxLength)
+
+    def countAccepted(self, length):
+        """Returns the number of strings of the given length that are accepted
+        by this automaton.
+
+        @param length: a string length
+        @type length: int
+        """
+        return self.compile().countAccepted(length)
 
 # --*-- Functions --*--
 
 def checkWellDefined(fa):
     """Checks that the given automaton is well-defined. In particular, this
-    method checks that the transition function is total."""
-    illegalSymbols = frozenset(['#','%','+','*','(',')'])
+    method checks that the transition function is total.
+
+    Problems with the alphabet raise an IllegalCharacterError or
+    IllegalArgumentError. All other problems are reported together in a
+    single AutomatonNotWellDefinedError (see findDefinitionProblems)."""
+    if fa.alphabet is None:
+        raise AutomatonNotWellDefinedError("An argument was set to None.")
+
+    # The metacharacters of regular expressions, see toRegularExpression.
+    illegalSymbols = frozenset(['#','%','+','&','~','*','(',')'])
 
     if len(illegalSymbols & fa.alphabet) > 0:
-        raise IllegalCharacterError("'#', '%', '+', '*', '(' and ')'"  \
-                                        + "are not allowed in the alphabet")
+        raise IllegalCharacterError("'#', '%', '+', '&', '~', '*', '(' and " \
+                                        + "')' are not allowed in the " \
+                                        + "alphabet")
 
     if len(max(fa.alphabet, key=len)) > 1:
         raise IllegalArgumentError("Alphabet symbols must have length" \
                                        + "of exactly 1")
 
+    problems = findDefinitionProblems(fa)
+    if len(problems) > 0:
+        raise AutomatonNotWellDefinedError(' '.join(problems))
+
+    return True
+
+def findDefinitionProblems(fa):
+    """Returns a list describing every way in which the given automaton is not
+    well-defined, or an empty list if it is well-defined. The alphabet itself is
+    not checked (see checkWellDefined).
+
+    The transitions are checked in a single pass: every transition is checked
+    to lead from a state on a symbol to a state, and the transition function is
+    total iff the number of such transitions is |Q| * |\Sigma|.
+    """
+    definition = _summarizeDefinition(fa)
+    problems = list(definition['problems'])
+
+    invalid = definition['invalid']
+    if any(q not in fa.states for q, c in invalid):
+        problems.append("Transitions refer to a state not in state set.")
+    if any(c not in fa.alphabet for q, c in invalid):
+        problems.append("Non-alphabet symbol appears in transitions.")
+    if any(fa.transitions[key] not in fa.states for key in invalid):
+        problems.append("There is a transition to a state which cannot be " \
+                            + "found in the state set.")
+    if definition['missing'] > 0:
+        problems.append("Transition function is not total.")
+
+    return problems
+
+def _summarizeDefinition(fa):
+    """Returns a dictionary summarizing the well-definedness of the automaton:
+    'problems' lists the problems which do not concern the transitions,
+    'missing' is the number of pairs in Q x \Sigma without a transition and
+    'invalid' is the set of transitions that refer to something outside the
+    automaton."""
     if fa.states is None or fa.alphabet is None \
             or fa.initial is None or fa.accept is None \
             or fa.transitions is None:
-        raise AutomatonNotWellDefinedError("An argument was set to None.")
+        return {'problems' : ["An argument was set to None."],
+                'missing' : 0, 'invalid' : set()}
 
+    problems = []
     if fa.initial not in fa.states:
-        raise AutomatonNotWellDefinedError("The initial state is not in " \
-                                               + "the state set.")
+        problems.append("The initial state is not in the state set.")
 
     if len(fa.accept & fa.states) < len(fa.accept):
-        raise AutomatonNotWellDefinedError("Not all accept states are in " \
-                                               + "the state set.")
+        problems.append("Not all accept states are in the state set.")
 
-    for state in fa.states:
-        for symbol in fa.alphabet:
-            try:
-                toState = fa.delta(state, symbol)
-                if toState not in fa.states:
-                    raise AutomatonNotWellDefinedError(\
-                        "There is a transition to a state which cannot be "\
-                            + "found in the state set.")
-            except KeyError:
-                raise AutomatonNotWellDefinedError("Transition function " \
-                                                       + "is not total.")
-
-    for stateSymbolPair, resultState in fa.transitions.items():
-        if stateSymbolPair[0] not in fa.states:
-            raise AutomatonNotWellDefinedError(\
-                "Transitions refer to a state not in state set.")
-        if stateSymbolPair[1] not in fa.alphabet:
-            raise AutomatonNotWellDefinedError(\
-                "Non-alphabet symbol appears in transitions.")
+    states = fa.states
+    alphabet = fa.alphabet
+    defined = 0
+    invalid = set()
+    for key, resultState in fa.transitions.iteritems():
+        if key[0] in states and key[1] in alphabet:
+            defined += 1
+            if resultState not in states:
+                invalid.add(key)
+        else:
+            invalid.add(key)
 
-    return True
+    return {'problems' : problems,
+            'missing' : len(states) * len(alphabet) - defined,
+            'invalid' : invalid}
 
 def toDot(fa, outputFile = "./fa.gv"):
     """Creates a Graphviz Dot file (.gv) at the given path and also tries to
@@ -293,19 +402,19 @@ def toDot(fa, outputFile = "./fa.gv"):
 
     for state in fa.states:
         if state in fa.accept:
-            outputString += "\t" + state + " [shape = doublecircle, " \
-                + "color = black, fontcolor = black, label = \"" + state \
-                + "\"];\n"
+            outputString += "\t" + _dotId(state) \
+                + " [shape = doublecircle, color = black, " \
+                + "fontcolor = black, label = " + _dotId(state) + "];\n"
         else:
-            outputString += "\t" + state + " [shape = circle, " \
-                + "color = black, fontcolor = black, label = \"" + state \
-                + "\"];\n"
+            outputString += "\t" + _dotId(state) + " [shape = circle, " \
+                + "color = black, fontcolor = black, label = " \
+                + _dotId(state) + "];\n"
 
-    outputString += "\tstart -> " + fa.initial + ";\n"
+    outputString += "\tstart -> " + _dotId(fa.initial) + ";\n"
     for state in fa.states:
         for character in fa.alphabet:
             toState = fa.delta(state, character)
-            outputString += "\t" + state + " -> " + toState \
+            outputString += "\t" + _dotId(state) + " -> " + _dotId(toState) \
                 + " [ label = \"" + character + "\" ];\n"
 
     outputString += "}\n"
@@ -318,6 +427,14 @@ def toDot(fa, outputFile = "./fa.gv"):
     pdfFile = outputFile.rstrip('.gv') + '.pdf'
     subprocess.call(["dot", "-Tpdf", outputFile, "-o", pdfFile])
 
+def _dotId(state):
+    """Returns the state as a quoted Graphviz Dot identifier. States which are
+    not strings, like the tuples of a product automaton, are written using
+    their string representation."""
+    if not isinstance(state, basestring):
+        state = str(state)
+    return '"' + state.replace('"', '\\"') + '"'
+
 def complement(fa):
     """Constructs a new automaton that accepts the complement of the
     language of this automaton."""
@@ -327,7 +444,15 @@ def complement(fa):
     initial = fa.initial
     accept = fa.states.difference(fa.accept)
     transitions = copy.copy(fa.transitions)
-    return FiniteAutomata(states, alphabet, initial, accept, transitions)
+    result = FiniteAutomata(states, alphabet, initial, accept, transitions,
+                            check = False)
+
+    # The complement has the same transitions, so the analyses which do not
+    # depend on the accepting states carry over.
+    for key in ['reachable', 'predecessors']:
+        if key in fa._cache:
+            result._cache[key] = fa._cache[key]
+    return result
 
 def removeUnreachableStates(fa):
     """Returns a new automaton with the same language as this automaton
@@ -344,7 +469,8 @@ def removeUnreachableStates(fa):
         if stateSymbolPair[0] in states:
             transitions[stateSymbolPair] = resultState
 
-    return FiniteAutomata(states, alphabet, initial, accept, transitions)
+    return FiniteAutomata(states, alphabet, initial, accept, transitions,
+                          check = False)
 
 
 def intersection(fa1, fa2):
@@ -361,6 +487,8 @@ def intersection(fa1, fa2):
               Q = Q_1 x Q_2
               q_0 = (q_1, q_2)
 
+    (only the pairs reachable from q_0 are constructed, see product)
+
     and the transition function \delta is defined by the formula
 
               \delta((p,q),\sigma) = (\delta_1(p,\sigma),\delta_2(q,\sigma))
@@ -416,9 +544,39 @@ def minus(fa1, fa2):
 
     return _mergeAutomatas(fa1, fa2, acceptCriteria)
 
+def intersectionAll(automatas):
+    """Returns a new automaton whose language is the intersection of the
+    languages of all the given automata, built in a single product
+    construction (see product).
+
+    @param automatas: Finite Automatas to intersect.
+    @type automatas: list of FiniteAutomata.
+    """
+    automatas = list(automatas)
+
+    def acceptCriteria(*qs):
+        return all(q in fa.accept for fa, q in zip(automatas, qs))
+
+    return product(automatas, acceptCriteria)
+
+def unionAll(automatas):
+    """Returns a new automaton whose language is the union of the languages of
+    all the given automata, built in a single product construction (see
+    product).
+
+    @param automatas: Finite Automatas to union.
+    @type automatas: list of FiniteAutomata.
+    """
+    automatas = list(automatas)
+
+    def acceptCriteria(*qs):
+        return any(q in fa.accept for fa, q in zip(automatas, qs))
+
+    return product(automatas, acceptCriteria)
+
 def _mergeAutomatas(fa1, fa2, acceptCriteria):
     """Merges this automata with the given automata based on the specified
-    acceptCriteria.
+    acceptCriteria (see product).
 
     @param fa: A Finite Automata to union with.
     @type fa: FiniteAutomata.
@@ -428,158 +586,447 @@ def _mergeAutomatas(fa1, fa2, acceptCriteria):
     otherwise.
     @type acceptCriteria: function.
     """
+    return product([fa1, fa2], acceptCriteria)
 
-    if fa1.alphabet != fa2.alphabet:
-        raise IllegalArgumentError(fa2.alphabet)
+def product(automatas, acceptCriteria, maxStates = None):
+    """Returns the product automaton of the given automata, whose states are
+    the tuples (q_1, ..., q_n) of states of the automata that are reachable from
+    the tuple of initial states.
 
-    stateDictionary = {}
-    stateList = []
-    alphabet = fa1.alphabet
-    initial = ''
-    acceptList = []
-    transitions = {}
+    Instead of building all of Q_1 x ... x Q_n, the product states are explored
+    with a DFS from the initial tuple, so only the reachable tuples are ever
+    created. Using the tuples themselves as states means that different tuples
+    can never end up with the same name.
 
-    for q in fa1.states:
-        for r in fa2.states:
-            state = q + r
-            stateDictionary[(q,r)] = state
+    @param automatas: Finite Automatas over the same alphabet.
+    @type automatas: list of FiniteAutomata.
 
-            if acceptCriteria(q,r):
-                acceptList.append(state)
+    @param acceptCriteria: A function which takes a state of each automaton as
+    arguments and returns true if the composite state should be an accept
+    state, false otherwise.
+    @type acceptCriteria: function.
+
+    @param maxStates: If given, None is returned as soon as the product has
+    more than maxStates states.
+    @type maxStates: int.
+    """
+    automatas = list(automatas)
+    if len(automatas) == 0:
+        raise IllegalArgumentError(automatas)
+
+    alphabet = automatas[0].alphabet
+    for fa in automatas[1:]:
+        if fa.alphabet != alphabet:
+            raise IllegalArgumentError(fa.alphabet)
 
-    for statePair, compositeState in stateDictionary.items():
-        stateList.append(compositeState)
+    transitionsList = [fa.transitions for fa in automatas]
+    initial = tuple(fa.initial for fa in automatas)
+    transitions = {}
+    states = set([initial])
+    pending = [initial]
+
+    while len(pending) > 0:
+        state = pending.pop()
         for character in alphabet:
-            nextStateFa1 = fa1.delta(statePair[0], character)
-            nextStateFA = fa2.delta(statePair[1], character)
-            transitions[(compositeState,character)] = \
-                stateDictionary[(nextStateFa1, nextStateFA)]
+            nextState = tuple(t[(q, character)]
+                              for t, q in zip(transitionsList, state))
+            transitions[(state, character)] = nextState
+            if nextState not in states:
+                states.add(nextState)
+                pending.append(nextState)
+        if maxStates is not None and len(states) > maxStates:
+            return None
 
-    initial = stateDictionary[(fa1.initial, fa2.initial)]
-    states = frozenset(stateList)
-    accept = frozenset(acceptList)
+    accept = frozenset(state for state in states if acceptCriteria(*state))
 
-    return FiniteAutomata(states, alphabet, initial, accept, transitions)
+    return FiniteAutomata(frozenset(states), alphabet, initial, accept,
+                          transitions, check = False)
 
 def minimize(fa):
+    """Returns a new minimal automaton with the same language as this
+    automaton, see _minimize.
+
+    The minimal automaton is computed once per version of the automaton and
+    cached (see _minimal), and each call returns a copy of it, which takes
+    O(n k) time and can be changed without affecting the cache.
+    """
+    return _copyAutomata(_minimal(fa))
+
+def _minimal(fa):
+    """Returns the minimal automaton cached on the automaton, which is shared
+    and must not be changed."""
+    return _cachedAutomata(fa, 'minimal', _minimize)
+
+def _copyAutomata(fa):
+    """Returns a copy of the automaton which shares the cached properties of
+    the automaton until either is changed."""
+    result = FiniteAutomata(fa.states, fa.alphabet, fa.initial, fa.accept,
+                            copy.copy(fa.transitions), check = False)
+    result._cache.update(fa._cache)
+    return result
+
+def _minimize(fa):
     """Constructs a new minimal automaton with the same language as this
-    automaton."""
-    # Algorithm has to be revised!
-    minimalFA = removeUnreachableStates(fa)
-    marks = []
-    stateList = minimalFA.states
-
-    # First pass
-    # 1. For every pair (p,q) with p != q, if exactly one of the two is in A, then
-    # (p,q) in S_m.
-
-    for p in stateList:
-        for q in stateList:
-            if p == q:
-                break;
-            if (p in minimalFA.accept) != (q in minimalFA.accept) and \
-                    (p,q) not in marks and (q,p) not in marks:
-                marks.append((p,q))
-
-    # Second pass
-    # 2. For every pair (r,s) of distinct states, if there is a symbol sigma in
-    # Sigma such that the pair (delta(r,sigma), delta(s,sigma)) is in S_m, then
-    # (r,s) in S_m.
-    done = False
-    while not done:
-        done = True
-
-        for p in stateList:
-            for q in stateList:
-                if p == q:
-                    break;
-
-                if (p,q) not in marks and (q,p) not in marks:
-                    for a in minimalFA.alphabet:
-                        r = minimalFA.delta(p, a)
-                        s = minimalFA.delta(q, a)
-
-                        if (r,s) in marks or (s,r) in marks and \
-                                (p,q) not in marks and (q,p) not in marks:
-                            marks.append((p,q))
-                            done = False
-                            break;
-
-    # Build new FA
-    newStates = []
-    newAlphabet = minimalFA.alphabet
-    newInitial = ''
-    newAccept = []
+    automaton.
+
+    The unreachable states are removed and the remaining states are partitioned
+    into classes of equivalent states using Hopcroft's partition refinement
+    algorithm, which runs in O(n k log n) time for n states and k symbols.
+
+    Starting from the partition {A, Q - A}, a worklist holds pairs (B, c) of a
+    block B and a symbol c. Each pair is used to split every block Y into the
+    states which go to B on c and those which do not. When Y is split, only the
+    smaller half is added to the worklist, which gives the log n factor.
+    """
+    cfa = fa.compile()
+    n = cfa.numberOfStates
+    k = cfa.numberOfSymbols
+    table = cfa.table
+
+    # Only the states reachable from the initial state are kept.
+    seen = bytearray(n)
+    seen[cfa.initial] = 1
+    reachable = [cfa.initial]
+    for q in reachable:
+        row = q * k
+        for c in xrange(k):
+            p = table[row + c] // k
+            if not seen[p]:
+                seen[p] = 1
+                reachable.append(p)
+
+    # inverse[c][p] is the list of states q with delta(q,c) = p.
+    inverse = [[[] for p in xrange(n)] for c in xrange(k)]
+    for q in reachable:
+        row = q * k
+        for c in xrange(k):
+            inverse[c][table[row + c] // k].append(q)
+
+    accepting = [q for q in reachable if cfa.acceptMask[q] == 1]
+    rejecting = [q for q in reachable if cfa.acceptMask[q] == 0]
+    blocks = [set(b) for b in (accepting, rejecting) if len(b) > 0]
+    blockOf = [0] * n
+    for b, members in enumerate(blocks):
+        for q in members:
+            blockOf[q] = b
+
+    smallest = min(xrange(len(blocks)), key = lambda b: len(blocks[b]))
+    pending = [(smallest, c) for c in xrange(k)]
+
+    while len(pending) > 0:
+        splitter, c = pending.pop()
+
+        # Group the predecessors of the splitter by the block they are in.
+        predecessors = {}
+        inverseC = inverse[c]
+        for p in blocks[splitter]:
+            for q in inverseC[p]:
+                predecessors.setdefault(blockOf[q], []).append(q)
+
+        for b, members in predecessors.items():
+            block = blocks[b]
+            if len(members) == len(block):
+                continue
+
+            # Move the smaller half into a new block. The other half keeps the
+            # number of the block, so any of its pending pairs stay valid and
+            # only the new block has to be added to the worklist.
+            if 2 * len(members) <= len(block):
+                moved = set(members)
+            else:
+                moved = block.difference(members)
+            block -= moved
+            newBlock = len(blocks)
+            blocks.append(moved)
+            for q in moved:
+                blockOf[q] = newBlock
+
+            for d in xrange(k):
+                pending.append((newBlock, d))
+
+    # Build new FA, using the state with the smallest code as the
+    # representative of a block.
+    representatives = [cfa.stateList[min(block)] for block in blocks]
+    newStates = frozenset(representatives)
+    newInitial = representatives[blockOf[cfa.initial]]
+    newAccept = frozenset(representatives[blockOf[q]] for q in accepting)
     newTransitions = {}
+    for b, block in enumerate(blocks):
+        row = min(block) * k
+        for c, a in enumerate(cfa.symbolList):
+            newTransitions[(representatives[b], a)] = \
+                representatives[blockOf[table[row + c] // k]]
 
-    oldToNewTransitions = {} # Dictionary from old states to new states
-    newToOldTransitions = {} # Dictionary from new states to representatives
-                             # in old states
-
-    for r in stateList:
-        repr = True # true if r is representative for its equivalence class
-        for s in stateList:
-            if r == s:
-                break;
-            if (r,s) not in marks and (s,r) not in marks:
-                oldToNewTransitions[r] = oldToNewTransitions[s]
-                repr = False
-                break;
-
-        if repr:
-            p = r
-            newStates.append(p)
-
-            if r in minimalFA.accept:
-                newAccept.append(p)
-            oldToNewTransitions[r] = p
-            newToOldTransitions[p] = r
-
-        if r == minimalFA.initial:
-            newInitial = oldToNewTransitions[r]
-
-    # Make new transitions
-    for p in newStates:
-        r = newToOldTransitions[p]
-        for a in newAlphabet:
-            newTransitions[(p,a)] = oldToNewTransitions.get(minimalFA.delta(r,a))
-
-    print "States: {0}\n".format(newStates)
-    print "Alphabet: {0}\n".format(newAlphabet)
-    print "Initial: {0}\n".format(newInitial)
-    print "newAccept: {0}\n".format(newAccept)
-    print "newTransitions: {0}\n".format(newTransitions)
-
-    return FiniteAutomata(frozenset(newStates), newAlphabet,
-                          newInitial, frozenset(newAccept), newTransitions)
+    return FiniteAutomata(newStates, fa.alphabet, newInitial,
+                          newAccept, newTransitions, check = False)
 
 def subsetOf(fa1, fa2):
     """Returns true if the language of this automaton is a subset of the
     language of the given automaton."""
-    if minus(fa1, fa2).isEmpty():
-        return True
-    return False
+    return findCounterexample(fa1, fa2) is None
+
+def findCounterexample(fa1, fa2):
+    """Returns the shortest string which is accepted by the first automaton but
+    not by the second one, or None if the language of the first automaton is a
+    subset of the language of the second one.
+
+    The pairs of states of the product automaton are explored with a BFS, which
+    stops at the first pair (p,q) with p in A_1 and q not in A_2, so the
+    product is never built in full.
+    """
+
+    def isWitness(p, q):
+        return p in fa1.accept and q not in fa2.accept
+
+    return _findProductWitness(fa1, fa2, isWitness)
 
 def equals(fa1, fa2):
     """Checks whethe the language of this automaton is equal to the
-    language of the given automaton."""
-    if isinstance(fa1, FiniteAutomata) and isinstance(fa2, FiniteAutomata):
-        return subsetOf(fa1, fa2) and subsetOf(fa2, fa1)
-    return False
+    language of the given automaton.
+
+    Uses the algorithm of Hopcroft and Karp: starting from the pair of initial
+    states, pairs of states that have to be equivalent are merged in a
+    union-find structure and only pairs of states which are not yet known to be
+    equivalent are followed. This takes near-linear time in the number of
+    states. The languages differ iff some merged pair disagrees on acceptance.
+    """
+    automataTypes = (FiniteAutomata, CompactFiniteAutomata)
+    if not (isinstance(fa1, automataTypes) and \
+                isinstance(fa2, automataTypes)):
+        return False
+
+    if fa1.alphabet != fa2.alphabet:
+        raise IllegalArgumentError(fa2.alphabet)
+
+    # Equal languages have equal canonical hashes, see canonicalHash.
+    hash1 = fa1._cache.get('canonicalHash')
+    hash2 = fa2._cache.get('canonicalHash')
+    if hash1 is not None and hash2 is not None:
+        return hash1 == hash2
+
+    # The states of the two automata are tagged with 1 and 2 so that states
+    # with the same name are kept apart.
+    parent = {}
+
+    def find(x):
+        root = x
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while x != root:
+            x, parent[x] = parent[x], root
+        return root
+
+    transitions1 = fa1.transitions
+    transitions2 = fa2.transitions
+    parent[(1, fa1.initial)] = (2, fa2.initial)
+    pending = [(fa1.initial, fa2.initial)]
+
+    while len(pending) > 0:
+        p, q = pending.pop()
+        if (p in fa1.accept) != (q in fa2.accept):
+            return False
+
+        for c in fa1.alphabet:
+            r = find((1, transitions1[(p, c)]))
+            s = find((2, transitions2[(q, c)]))
+            if r != s:
+                parent[r] = s
+                pending.append((transitions1[(p, c)], transitions2[(q, c)]))
 
-def toRegularExpression(fa):
-    """Converts this Automaton into an equivalent Regular Expression."""
-    pass
+    return True
+
+def findDistinguishingString(fa1, fa2):
+    """Returns the shortest string which is accepted by exactly one of the two
+    automata, or None if their languages are equal (see findCounterexample)."""
+
+    def isWitness(p, q):
+        return (p in fa1.accept) != (q in fa2.accept)
+
+    return _findProductWitness(fa1, fa2, isWitness)
 
-def _tableLookup(fa, p, q, k, table, statemap):
-    """Finds regular expression in table or computes it if not there yet."""
-    pass
+def _findProductWitness(fa1, fa2, isWitness):
+    """Explores the reachable pairs of states of the product of the two
+    automata in BFS order and returns the string leading to the first pair for
+    which 'isWitness' holds, or None if there is no such pair.
+
+    @param isWitness: A function which takes two states as arguments.
+    @type isWitness: function.
+    """
+    if fa1.alphabet != fa2.alphabet:
+        raise IllegalArgumentError(fa2.alphabet)
+
+    symbols = sorted(fa1.alphabet)
+    transitions1 = fa1.transitions
+    transitions2 = fa2.transitions
+
+    initial = (fa1.initial, fa2.initial)
+    previous = {initial : None} # pair -> (previous pair, symbol)
+    pending = deque([initial])
+
+    while len(pending) > 0:
+        pair = pending.popleft()
+        if isWitness(*pair):
+            symbolList = []
+            while previous[pair] is not None:
+                pair, c = previous[pair]
+                symbolList.append(c)
+            return ''.join(reversed(symbolList))
+
+        p, q = pair
+        for c in symbols:
+            nextPair = (transitions1[(p, c)], transitions2[(q, c)])
+            if nextPair not in previous:
+                previous[nextPair] = (pair, c)
+                pending.append(nextPair)
+
+    return None
+
+def toRegularExpression(fa, maxSize = None):
+    """Converts this Automaton into an equivalent Regular Expression by state
+    elimination.
+
+    Let R(p,q,k) denote the paths from p to q through the first k eliminated
+    states, then R(p,q,k) = R(p,q,k-1) + R(p,r,k-1) R(r,r,k-1)* R(r,q,k-1),
+    where r is the k'th eliminated state. The table holds R(p,q,k) for the
+    current k and only for the pairs with a path between them, so eliminating
+    r only updates the pairs of a predecessor and a successor of r. The state
+    with the fewest predecessors times successors is eliminated first, which
+    keeps the expressions small, and the expressions are simplified as they
+    are built. Only the reachable and live states are eliminated.
+
+    @param maxSize: The largest allowed size of the result, see
+    RegularExpression.size. An IllegalArgumentError is raised as soon as an
+    intermediate expression becomes larger.
+    @type maxSize: int.
+    """
+    from regular_expression import RegularExpression, toPattern
+
+    for c in fa.alphabet:
+        if len(c) != 1:
+            raise IllegalArgumentError("Only single character symbols can " \
+                                           + "be used in a regular " \
+                                           + "expression: '" + c + "'")
+
+    useful = fa.findReachableStates() & fa.findLiveStates()
+    symbols = sorted(fa.alphabet)
+
+    # fresh initial and accept states
+    start = object()
+    end = object()
+
+    table = {}
+    successors = {start : set()}
+    predecessors = {end : set()}
+    for q in useful:
+        successors[q] = set()
+        predecessors[q] = set()
+    statemap = dict((q, i) for i, q in enumerate(fa.compile().stateList))
+
+    def addEntry(p, q, r):
+        r = _regexUnion(_tableLookup(table, p, q), r)
+        if maxSize is not None and r[1] > maxSize:
+            raise IllegalArgumentError("The regular expression is larger " \
+                                           + "than " + str(maxSize))
+        table[(p, q)] = r
+        successors[p].add(q)
+        predecessors[q].add(p)
+
+    if fa.initial in useful:
+        addEntry(start, fa.initial, _LAMBDA_REGEX)
+    for q in useful:
+        for c in symbols:
+            p = fa.transitions[(q, c)]
+            if p in useful:
+                addEntry(q, p, (('symbol', c), 1))
+        if q in fa.accept:
+            addEntry(q, end, _LAMBDA_REGEX)
+
+    def cost(q):
+        loops = int(q in successors[q])
+        return (len(predecessors[q]) - loops) * (len(successors[q]) - loops)
+
+    # a heap of the states by cost, where outdated entries are skipped
+    heap = [(cost(q), statemap[q], q) for q in useful]
+    heapq.heapify(heap)
+    while len(heap) > 0:
+        c, i, r = heapq.heappop(heap)
+        if r not in successors or c != cost(r):
+            continue
+
+        loop = _regexStar(_tableLookup(table, r, r))
+        for p in predecessors[r]:
+            if p != r:
+                successors[p].discard(r)
+        for q in successors[r]:
+            if q != r:
+                predecessors[q].discard(r)
+        for p in predecessors[r]:
+            if p == r:
+                continue
+            prefix = _regexConcat(table.pop((p, r)), loop)
+            for q in successors[r]:
+                if q != r:
+                    addEntry(p, q, _regexConcat(prefix, table[(r, q)]))
+        for q in successors[r]:
+            table.pop((r, q))
+        neighbours = (predecessors[r] | successors[r]) - set([r, start, end])
+        del predecessors[r]
+        del successors[r]
+        for q in neighbours:
+            heapq.heappush(heap, (cost(q), statemap[q], q))
+
+    return RegularExpression(toPattern(_tableLookup(table, start, end)[0]),
+                             fa.alphabet)
+
+# The entries of the table of toRegularExpression are pairs of a syntax tree
+# (see RegularExpression) and its size.
+_EMPTY_REGEX = (('empty',), 1)
+_LAMBDA_REGEX = (('lambda',), 1)
+
+def _tableLookup(table, p, q):
+    """Returns the expression for the paths from p to q in the table of
+    toRegularExpression."""
+    return table.get((p, q), _EMPTY_REGEX)
+
+def _regexUnion(r, s):
+    if r == _EMPTY_REGEX or r[0] == s[0]:
+        return s
+    if s == _EMPTY_REGEX:
+        return r
+    if r == _LAMBDA_REGEX and s[0][0] == 'star':
+        return s
+    if s == _LAMBDA_REGEX and r[0][0] == 'star':
+        return r
+    return (('union', r[0], s[0]), r[1] + s[1] + 1)
+
+def _regexConcat(r, s):
+    if r == _EMPTY_REGEX or s == _EMPTY_REGEX:
+        return _EMPTY_REGEX
+    if r == _LAMBDA_REGEX:
+        return s
+    if s == _LAMBDA_REGEX:
+        return r
+    return (('concat', r[0], s[0]), r[1] + s[1] + 1)
+
+def _regexStar(r):
+    if r == _EMPTY_REGEX or r == _LAMBDA_REGEX:
+        return _LAMBDA_REGEX
+    if r[0][0] == 'star':
+        return r
+    if r[0][0] == 'union' and r[0][1] == _LAMBDA_REGEX[0]:
+        return _regexStar((r[0][2], r[1] - 2))
+    if r[0][0] == 'union' and r[0][2] == _LAMBDA_REGEX[0]:
+        return _regexStar((r[0][1], r[1] - 2))
+    return (('star', r[0]), r[1] + 1)
 
 def toNondeterministicFiniteAutomata(fa):
     """Converts this Finite Automata into an equivalent Nondeterministic
     Finite Automata."""
+    transitions = {}
+    for stateSymbolPair, resultState in fa.transitions.items():
+        transitions[stateSymbolPair] = frozenset([resultState])
+
     return NondeterministicFiniteAutomata(fa.states, fa.alphabet,
-                                          fa.initial, fa.accept,
-                                          copy.copy(fa.transitions))
+                                          fa.initial, fa.accept, transitions)
 
 # end-of-finite_automata.py
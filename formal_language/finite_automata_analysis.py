@@ -0,0 +1,184 @@
+# finite_automata_analysis.py
+
+# Graph analyses of (Deterministic) Finite Automatas: reachability, liveness,
+# strongly connected components and finiteness of the language.
+#
+# All analyses are iterative, so they do not run into the recursion limit on
+# large automatas, and run in time linear in the number of transitions. The
+# results are cached on the automaton, see FiniteAutomata.getVersion.
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+# --*-- Functions --*--
+
+def findReachableStates(fa):
+    """Finds the set of states that are reachable from the initial state, using
+    a BFS from the initial state."""
+    return _cached(fa, 'reachable', _findReachableStates)
+
+def _findReachableStates(fa):
+    transitions = fa.transitions
+    symbols = list(fa.alphabet)
+    reachable = set([fa.initial])
+    pending = [fa.initial]
+
+    while len(pending) > 0:
+        q = pending.pop()
+        for c in symbols:
+            p = transitions[(q, c)]
+            if p not in reachable:
+                reachable.add(p)
+                pending.append(p)
+
+    return frozenset(reachable)
+
+def findPredecessors(fa):
+    """Returns the reverse edges of the automaton as a dictionary, such that
+    p in findPredecessors(fa)[q] iff delta(p,c) = q for some c. Only states of
+    the state set are included."""
+    return _cached(fa, 'predecessors', _findPredecessors)
+
+def _findPredecessors(fa):
+    predecessors = dict((q, []) for q in fa.states)
+    for (p, c), q in fa.transitions.items():
+        if p in predecessors and q in predecessors:
+            predecessors[q].append(p)
+    return predecessors
+
+def findLiveStates(fa):
+    """Finds the set of states that can reach an accept state, using a BFS
+    from the accept states along the reverse edges."""
+    return _cached(fa, 'live', _findLiveStates)
+
+def _findLiveStates(fa):
+    predecessors = findPredecessors(fa)
+    live = set(fa.accept)
+    pending = list(fa.accept)
+
+    while len(pending) > 0:
+        q = pending.pop()
+        for p in predecessors[q]:
+            if p not in live:
+                live.add(p)
+                pending.append(p)
+
+    return frozenset(live)
+
+def findStronglyConnectedComponents(fa, states = None):
+    """Returns the strongly connected components of the automaton as a list of
+    frozensets, using an iterative version of Tarjan's algorithm. The
+    components are listed in reverse topological order.
+
+    @param states: Only the subgraph induced by these states is considered,
+    defaults to all the states.
+    @type states: frozenset
+    """
+    if states is None:
+        states = fa.states
+
+    transitions = fa.transitions
+    symbols = list(fa.alphabet)
+
+    def successors(q):
+        for c in symbols:
+            p = transitions[(q, c)]
+            if p in states:
+                yield p
+
+    index = {}
+    low = {}
+    stack = []
+    onStack = set()
+    components = []
+
+    for root in states:
+        if root in index:
+            continue
+
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        onStack.add(root)
+        work = [(root, successors(root))]
+
+        while len(work) > 0:
+            q, pending = work[-1]
+
+            descended = False
+            for p in pending:
+                if p not in index:
+                    index[p] = low[p] = len(index)
+                    stack.append(p)
+                    onStack.add(p)
+                    work.append((p, successors(p)))
+                    descended = True
+                    break
+                elif p in onStack:
+                    low[q] = min(low[q], index[p])
+
+            if descended:
+                continue
+
+            work.pop()
+            if len(work) > 0:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[q])
+
+            if low[q] == index[q]:
+                component = []
+                p = None
+                while p != q:
+                    p = stack.pop()
+                    onStack.remove(p)
+                    component.append(p)
+                components.append(frozenset(component))
+
+    return components
+
+def isFinite(fa):
+    """Returns true if the language of the automaton is finite.
+
+    The language is infinite iff there is a loop through states that are both
+    reachable and live, i.e. iff the subgraph of those states has a strongly
+    connected component with more than one state or a state with a transition
+    to itself.
+    """
+    return _cached(fa, 'finite', _isFinite)
+
+def _isFinite(fa):
+    useful = findReachableStates(fa) & findLiveStates(fa)
+    for component in findStronglyConnectedComponents(fa, useful):
+        if len(component) > 1:
+            return False
+        for q in component:
+            for c in fa.alphabet:
+                if fa.transitions[(q, c)] == q:
+                    return False
+    return True
+
+def _cached(fa, key, compute):
+    """Returns the result of 'compute(fa)', cached in the '_cache' dictionary
+    of the automaton if it has one."""
+    cache = getattr(fa, '_cache', None)
+    if cache is None:
+        return compute(fa)
+    if key not in cache:
+        cache[key] = compute(fa)
+    return cache[key]
+
+def _cachedAutomata(fa, key, compute):
+    """Returns the automaton 'compute(fa)', cached in the '_cache' dictionary
+    of the automaton along with the version of the result. The result is
+    recomputed if it has been changed since, and it is cached as its own
+    result, as for the minimal automaton of a minimal automaton."""
+    cache = fa._cache
+    if key in cache:
+        result, version = cache[key]
+        if result.getVersion() == version:
+            return result
+
+    result = compute(fa)
+    result._cache[key] = cache[key] = (result, result.getVersion())
+    return result
+
+# end-of-finite_automata_analysis.py
@@ -0,0 +1,273 @@
+# finite_automata_search.py
+
+# Searching a text for the substrings accepted by a (Deterministic) Finite
+# Automata.
+#
+# A substring text[i:j] is a match if it is accepted by the automaton M. The
+# ends j of the matches are found by running a Finite Automata for
+# \Sigma* L(M) over the text once: it is in an accepting state after
+# text[:j] iff some substring ending at j is accepted by M. The text is run in
+# chunks with runCodes, on a table which also records whether an accepting
+# state has been passed, and only the chunks in which a match ends are run a
+# symbol at a time. The smallest start i of each end j is then found by
+# running a Finite Automata for the reverse of L(M) backwards from j until it
+# dies. A backward run which reaches a position in the same state as an
+# earlier one ends the same way, so the results are kept per position and
+# state, and the backward runs of overlapping matches are not repeated.
+#
+# When every string of L(M) starts with the same non-empty prefix, the scan
+# jumps to the next occurrence of the prefix, found with str.find, whenever no
+# match is in progress. This skips most of the text when matches are rare.
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+# --*-- Imports --*--
+
+from array import array
+from exceptions import *
+from compiled_finite_automata import CompiledFiniteAutomata
+from finite_automata_analysis import findLiveStates, _cached
+from nondeterministic_finite_automata import *
+
+# --*-- Constants --*--
+
+# The number of symbols run at a time by runCodes when searching for the ends
+# of the matches.
+CHUNK_SIZE = 256
+
+# --*-- Classes --*--
+
+class FiniteAutomataSearcher(object):
+    """Finds the matches of a Finite Automata in a text, see above.
+
+    A match is a pair (i, j) such that text[i:j] is accepted by the automaton,
+    and for each end j only the match with the smallest start i is reported.
+    """
+
+    # --*-- Constructors --*--
+
+    def __init__(self, fa):
+        """Constructs a new searcher for the given automaton. The searcher does
+        not follow later changes to the automaton.
+
+        @param fa: The automaton to search for.
+        @type fa: FiniteAutomata.
+        """
+        cfa = fa.compile()
+        reverse = _reverse(cfa)
+        live = findLiveStates(reverse)
+        self.forward = forward = _prefixSigmaStar(cfa).compile()
+        self.reverse = reverse = reverse.compile()
+        self.prefix = findRequiredPrefix(fa)
+        if cfa._translation is None:
+            self.prefix = ''
+
+        self._accepting = _offsetMask(forward, forward.acceptMask)
+        self._reverseAccepting = _offsetMask(reverse, reverse.acceptMask)
+        self._reverseLive = _offsetMask(reverse, [q in live for q
+                                                  in reverse.stateList])
+        self._marking = _markingAutomata(forward)
+
+    # --*-- Methods --*--
+
+    def findAll(self, text):
+        """Returns the list of matches (i, j) in the text ordered by j.
+
+        @param text: a string of alphabet symbols
+        @type text: str
+        """
+        return self._scan(text)
+
+    def search(self, text):
+        """Returns the match (i, j) with the smallest end j, or None if there
+        is no match.
+
+        @param text: a string of alphabet symbols
+        @type text: str
+        """
+        matches = self._scan(text, first = True)
+        if len(matches) == 0:
+            return None
+        return matches[0]
+
+    def _scan(self, text, first = False):
+        """Returns the matches ordered by their end, or only the first one,
+        see above."""
+        forward = self.forward
+        table = forward.table
+        k = forward.numberOfSymbols
+        accepting = self._accepting
+        marking = self._marking
+        marked = forward.numberOfStates * k
+        initial = forward.initial * k
+        codes = forward.encode(text)
+        prefix = self.prefix
+        starts = {}
+        # The offset at which to stop stepping a symbol at a time and jump to
+        # the next occurrence of the prefix, if there is one.
+        jump = initial if len(prefix) > 0 else -1
+
+        matches = []
+        offset = initial
+        if accepting[offset]:
+            matches.append((self._findStart(codes, 0, starts), 0))
+            if first:
+                return matches
+
+        j = 0
+        while j < len(codes):
+            if offset == jump:
+                j = text.find(prefix, j)
+                if j < 0:
+                    break
+                # The scan usually returns to the initial state soon after an
+                # occurrence of the prefix, so it is stepped a symbol at a
+                # time for a while rather than a whole chunk.
+                end = min(j + len(prefix) + 64, len(codes))
+            else:
+                # A run of the chunk ends in a marked state iff it passes an
+                # accepting state, i.e. iff a match ends in the chunk.
+                end = min(j + CHUNK_SIZE, len(codes))
+                result = marking.runCodes(offset, codes[j:end])
+                if result < marked:
+                    offset = result
+                    j = end
+                    continue
+
+            while j < end:
+                offset = table[offset + codes[j]]
+                j += 1
+                if accepting[offset]:
+                    matches.append((self._findStart(codes, j, starts), j))
+                    if first:
+                        return matches
+                elif offset == jump:
+                    break
+
+        return matches
+
+    def _findStart(self, codes, j, starts):
+        """Returns the smallest start of a match ending at j, by running the
+        reverse automaton backwards from j. 'starts' maps the pairs (p, offset)
+        of the earlier backward runs to the smallest position at or before p
+        at which they were accepting, or -1."""
+        reverse = self.reverse
+        table = reverse.table
+        accepting = self._reverseAccepting
+        live = self._reverseLive
+
+        path = []
+        start = -1
+        offset = reverse.initial * reverse.numberOfSymbols
+        p = j
+        while True:
+            known = starts.get((p, offset))
+            if known is not None:
+                start = known
+                break
+            path.append((p, offset))
+            if p == 0 or not live[offset]:
+                break
+            p -= 1
+            offset = table[offset + codes[p]]
+
+        # The deepest accepting position of the run is the smallest start.
+        for p, offset in reversed(path):
+            if start < 0 and accepting[offset]:
+                start = p
+            starts[(p, offset)] = start
+        return start
+
+# --*-- Functions --*--
+
+def getSearcher(fa):
+    """Returns the FiniteAutomataSearcher of the automaton, which is cached on
+    the automaton."""
+    return _cached(fa, 'searcher', FiniteAutomataSearcher)
+
+def findRequiredPrefix(fa):
+    """Returns the longest string which every string accepted by the automaton
+    starts with, found by following the initial state as long as it has a
+    single transition to a live state and is not accepting. Returns the empty
+    string if the language is empty."""
+    live = findLiveStates(fa)
+    prefix = []
+    q = fa.initial
+    seen = set()
+    while q in live and q not in fa.accept and q not in seen:
+        seen.add(q)
+        successors = [c for c in fa.alphabet if fa.transitions[(q, c)] in live]
+        if len(successors) != 1:
+            break
+        prefix.append(successors[0])
+        q = fa.transitions[(q, successors[0])]
+    return ''.join(prefix)
+
+def _prefixSigmaStar(cfa):
+    """Returns the minimal Finite Automata of \Sigma* L, where L is the
+    language of the compiled automaton. It is the subset construction of an
+    NFA with a new initial state which loops on every symbol and has a
+    Lambda-transition to the initial state of the automaton."""
+    n = cfa.numberOfStates
+    k = cfa.numberOfSymbols
+    transitions = {(n, EPSILON) : frozenset([cfa.initial])}
+    for j, c in enumerate(cfa.symbolList):
+        transitions[(n, c)] = frozenset([n])
+        for q in xrange(n):
+            transitions[(q, c)] = frozenset([cfa.table[q * k + j] // k])
+    accept = frozenset(q for q in xrange(n) if cfa.acceptMask[q])
+    nfa = NondeterministicFiniteAutomata(frozenset(xrange(n + 1)),
+                                         frozenset(cfa.symbolList), n, accept,
+                                         transitions)
+    return toFiniteAutomata(nfa)
+
+def _reverse(cfa):
+    """Returns the minimal Finite Automata of the reverse of the language of
+    the compiled automaton. It is the subset construction of the NFA with the
+    transitions of the automaton reversed and a new initial state with
+    Lambda-transitions to its accepting states."""
+    n = cfa.numberOfStates
+    k = cfa.numberOfSymbols
+    transitions = {}
+    for q in xrange(n):
+        for j, c in enumerate(cfa.symbolList):
+            p = cfa.table[q * k + j] // k
+            transitions.setdefault((p, c), set()).add(q)
+    transitions[(n, EPSILON)] = set(q for q in xrange(n) if cfa.acceptMask[q])
+    transitions = dict((key, frozenset(states)) for key, states
+                       in transitions.items())
+    nfa = NondeterministicFiniteAutomata(frozenset(xrange(n + 1)),
+                                         frozenset(cfa.symbolList), n,
+                                         frozenset([cfa.initial]), transitions)
+    return toFiniteAutomata(nfa)
+
+def _offsetMask(cfa, mask):
+    """Returns a bytearray indexed by the row offsets of the compiled
+    automaton, which is 1 at the offset of state q iff mask[q] is true."""
+    k = cfa.numberOfSymbols
+    result = bytearray(max(1, cfa.numberOfStates * k))
+    for q in xrange(cfa.numberOfStates):
+        if mask[q]:
+            result[q * k] = 1
+    return result
+
+def _markingAutomata(cfa):
+    """Returns a CompiledFiniteAutomata with two copies of the states of the
+    compiled automaton and the same transitions within each copy, except that
+    every transition to an accepting state goes to the second copy. The states
+    of the first copy have the same codes as in the compiled automaton, so a
+    run from one of them ends in the second copy iff it passes an accepting
+    state."""
+    n = cfa.numberOfStates
+    k = cfa.numberOfSymbols
+    table = array('i', cfa.table) * 2
+    for i in xrange(2 * n * k):
+        offset = table[i]
+        if i >= n * k or cfa.acceptMask[offset // k]:
+            table[i] = offset + n * k
+    return CompiledFiniteAutomata(range(2 * n), list(cfa.symbolList),
+                                  cfa.initial, bytearray(n) + bytearray([1]) * n,
+                                  table)
+
+# end-of-finite_automata_search.py
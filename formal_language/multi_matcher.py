@@ -0,0 +1,133 @@
+# multi_matcher.py
+
+# Matches a string against many (Deterministic) Finite Automatas at once.
+#
+# The automata are merged into product automata (see finite_automata.product)
+# whose states carry a bitmask of the automata accepting in that state, so a
+# single pass over a string finds every automaton accepting it.
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+# --*-- Imports --*--
+
+from exceptions import *
+from finite_automata import FiniteAutomata, product
+
+# --*-- Classes --*--
+
+class MultiMatcher(object):
+    """Matches strings against a list of Finite Automatas over the same
+    alphabet.
+
+    The automata are merged one at a time into a product automaton of the
+    automata before it. When merging the next automaton would give a product
+    with more than maxStates states, a new group is started, such that the
+    matcher consists of a few products of bounded size rather than a single
+    product of possibly exponential size. Each product is compiled, and each
+    of its states has a bitmask where bit i is set iff the i'th automaton
+    accepts in that state.
+    """
+
+    # --*-- Constructors --*--
+
+    def __init__(self, automatas, maxStates = 10000):
+        """Constructs a new Multi Matcher.
+
+        @param automatas: The automata to match against.
+        @type automatas: list of FiniteAutomata.
+
+        @param maxStates: The largest number of states of a product, unless a
+        single automaton is larger.
+        @type maxStates: int.
+        """
+        automatas = list(automatas)
+        if len(automatas) == 0:
+            raise IllegalArgumentError("No automata to match against")
+        for fa in automatas[1:]:
+            if fa.alphabet != automatas[0].alphabet:
+                raise IllegalArgumentError(fa.alphabet)
+
+        self.numberOfAutomatas = len(automatas)
+        self.maxStates = maxStates
+
+        # The groups as pairs of a product and the masks of its states.
+        groups = []
+        merged = None
+        masks = None
+        for i, fa in enumerate(automatas):
+            bit = 1 << i
+            if merged is not None:
+                nextMerged = product([merged, fa], _acceptEither(merged, fa),
+                                     maxStates)
+                if nextMerged is not None:
+                    masks = dict(((p, q), masks[p] | (bit if q in fa.accept
+                                                      else 0))
+                                 for p, q in nextMerged.states)
+                    merged, masks = _renumber(nextMerged, masks)
+                    continue
+                groups.append((merged, masks))
+
+            merged = fa
+            masks = dict((q, bit if q in fa.accept else 0) for q in fa.states)
+        groups.append((merged, masks))
+
+        # compile the groups
+        self.groups = []
+        for merged, masks in groups:
+            cfa = merged.compile()
+            self.groups.append((cfa, [masks[q] for q in cfa.stateList]))
+
+    # --*-- Methods --*--
+
+    def getNumberOfGroups(self):
+        """Returns the number of products the automata were split into."""
+        return len(self.groups)
+
+    def matchMask(self, s):
+        """Returns the bitmask of the automata accepting the given string,
+        where bit i is set iff the i'th automaton accepts the string.
+
+        @param s: a string of alphabet symbols
+        @type s: str
+        """
+        codes = self.groups[0][0].encode(s)
+        mask = 0
+        for cfa, masks in self.groups:
+            mask |= masks[cfa.runCodes(cfa.initial * cfa.numberOfSymbols,
+                                       codes) // cfa.numberOfSymbols]
+        return mask
+
+    def match(self, s):
+        """Returns the sorted list of the indices of the automata accepting the
+        given string.
+
+        @param s: a string of alphabet symbols
+        @type s: str
+        """
+        mask = self.matchMask(s)
+        return [i for i in xrange(self.numberOfAutomatas) if mask >> i & 1]
+
+# --*-- Functions --*--
+
+def _acceptEither(merged, fa):
+    """Returns the accept criteria of the product of a group and an automaton,
+    which accepts when either accepts."""
+    def acceptCriteria(p, q):
+        return p in merged.accept or q in fa.accept
+    return acceptCriteria
+
+def _renumber(fa, masks):
+    """Returns a copy of the automaton with the states numbered 0, 1, ...,
+    and the masks of the new states. This keeps the states of the products
+    flat pairs instead of nesting a level deeper with every merge."""
+    names = dict((q, i) for i, q in enumerate(fa.states))
+    transitions = dict(((names[q], c), names[p])
+                       for (q, c), p in fa.transitions.items())
+    renumbered = FiniteAutomata(frozenset(names.values()), fa.alphabet,
+                                names[fa.initial],
+                                frozenset(names[q] for q in fa.accept),
+                                transitions, check = False)
+    return renumbered, dict((names[q], masks[q]) for q in fa.states)
+
+# end-of-multi_matcher.py
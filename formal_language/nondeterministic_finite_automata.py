@@ -10,10 +10,628 @@ import copy
 import subprocess
 from exceptions import *
 
+# --*-- Constants --*--
+
+# The symbol of the Lambda-transitions, i.e. transitions on the empty string.
+EPSILON = ''
+
+# The largest number of sets of states of the reversed automaton per state of
+# the automaton which toFiniteAutomata constructs to minimize during the
+# subset construction.
+EARLY_MINIMIZATION_FACTOR = 4
+
 # --*-- Nondeterministic Finite Automata --*--
 
 class NondeterministicFiniteAutomata(object):
-    pass
-# TODO
+    """A Nondeterministic Finite Automata.
+
+    Definition 1: A Nondeterministic Finite Automaton with Lambda-transitions
+    A nondeterministic finite automaton (NFA) is a 5-tuple
+    (Q, \Sigma, q_0, A, \delta), where
+
+    Q is a finite set of states;
+    \Sigma is a finite input alphabet;
+    q_0 \in Q is the initial state;
+    A \subseteq Q is the set of accepting states;
+    \delta: Q \times (\Sigma \cup {\Lambda}) \to 2^Q is the transition function.
+
+    The automaton may move from q to any state of \delta(q, \sigma) on the input
+    \sigma, and to any state of \delta(q, \Lambda) without reading any input.
+
+    The simulation keeps the set of active states as a bit-vector in a single
+    Python int, where state number i is bit i. For every symbol the union of
+    the successors of the active states in each group of 16 states,
+    Lambda-closure included, is kept in a table of the group the first time
+    it is needed. One step costs a table lookup and a bitwise or per group
+    with an active state, and at most a string comparison per group without.
+    """
+
+    # --*-- Constructors --*--
+
+    def __init__(self, states, alphabet, initial, accept, transitions):
+        """Constructs a new Nondeterministic Finite Automata.
+
+        @param states: A set of states, 'Q'.
+        @type states: frozenset.
+
+        @param alphabet: The set of symbols, '\Sigma'.
+        @type alphabet: frozenset.
+
+        @param initial: The initial state, 'q_0'.
+        @type initial: str.
+
+        @param accept: The set of accepting states, 'A'.
+        @type accept: frozenset.
+
+        @param transitions: A dictionary of 2-tuples '(Q_old, \Sigma)' mapping to
+        a set of states. The symbol EPSILON denotes a Lambda-transition and a
+        missing pair denotes the empty set.
+        @type transitions: dict.
+        """
+
+        # The bit-vector representation, built on first use after a change.
+        self._bitsets = None
+        # Number of changes to the automaton, see getVersion.
+        self._version = 0
+
+        # input
+        self.states = states
+        self.alphabet = alphabet
+        self.initial = initial
+        self.accept = accept
+        self.transitions = transitions
+
+        _checkWellDefined(self)
+
+    # --*-- Methods --*--
+
+    def __setattr__(self, name, value):
+        """Sets the attribute and drops the bit-vector representation if the
+        attribute is part of the definition of the automaton."""
+        object.__setattr__(self, name, value)
+        if not name.startswith('_'):
+            self._bitsets = None
+            self._version += 1
+
+    def getNumberOfStates(self):
+        """Returns the number of states of the Nondeterministic Finite
+        Automata."""
+        return len(self.states)
+
+    def getVersion(self):
+        """Returns the number of changes made to the automaton through
+        addTransition and assignments to its attributes, see
+        FiniteAutomata.getVersion. A LazyFiniteAutomata drops its cache when
+        the version of its automaton changes.
+
+        Changes made directly to the 'transitions' dictionary are not seen,
+        so the automaton has to be told by assigning the dictionary again."""
+        return self._version
+
+    def addTransition(self, q, c, p):
+        """Adds the state 'p' to the transition from 'q' on 'c'."""
+        if c != EPSILON and c not in self.alphabet:
+            raise IllegalCharacterError(c)
+
+        self.transitions[(q,c)] = frozenset(self.delta(q, c) | set([p]))
+        self._bitsets = None
+        self._version += 1
+
+    def delta(self, q, c):
+        """Looks up the set of states in the transition function."""
+        if c != EPSILON and c not in self.alphabet:
+            raise IllegalCharacterError(c)
+
+        return frozenset(self.transitions.get((q,c), ()))
+
+    def epsilonClosure(self, states):
+        """Returns the Lambda-closure of the given set of states, i.e. the
+        states which can be reached from them using only Lambda-transitions.
+
+        @param states: a set of states
+        @type states: frozenset
+        """
+        bitsets = self._getBitsets()
+        return self.decode(bitsets.close(self.encode(states)))
+
+    def deltaStar(self, states, s):
+        """Runs the given string on the automaton from the given set of states
+        and returns the set of states it ends up in.
+
+        \delta*(S, \Lambda) = \Lambda(S)
+        \delta*(S, y\sigma) = \Lambda(\cup_{p \in \delta*(S,y)} \delta(p,\sigma))
+
+        @param states: a set of states
+        @type states: frozenset
+
+        @param s: a string of alphabet symbols
+        @type s: str
+        """
+        bitsets = self._getBitsets()
+        return self.decode(bitsets.run(bitsets.close(self.encode(states)), s))
+
+    def accepts(self, s):
+        """Returns true if the given string is accepted by the automaton, i.e.
+        if \delta*({q_0}, s) contains an accept state, false otherwise.
+
+        This takes O(|s| |Q| / 16) steps of the interpreter, and a table
+        lookup per group of 16 states with an active state.
+
+        @param s: a string of alphabet symbols
+        @type s: str
+        """
+        bitsets = self._getBitsets()
+        return bitsets.run(bitsets.initial, s) & bitsets.accept != 0
+
+    def encode(self, states):
+        """Returns the bit-vector of the given set of states."""
+        index = self._getBitsets().stateIndex
+        mask = 0
+        for q in states:
+            mask |= 1 << index[q]
+        return mask
+
+    def decode(self, mask):
+        """Returns the set of states of the given bit-vector."""
+        stateList = self._getBitsets().stateList
+        states = []
+        while mask:
+            low = mask & -mask
+            states.append(stateList[low.bit_length() - 1])
+            mask ^= low
+        return frozenset(states)
+
+    def _getBitsets(self):
+        """Returns the bit-vector representation of the automaton, building it
+        on first use after a change."""
+        if self._bitsets is None:
+            self._bitsets = _NondeterministicBitsets(self)
+        return self._bitsets
+
+class LazyFiniteAutomata(object):
+    """A Finite Automata built lazily from a Nondeterministic Finite Automata.
+
+    The states of the Finite Automata are the sets of states of the
+    Nondeterministic Finite Automata reached by the subset construction. Rather
+    than constructing all of them up front, a state and its transitions are only
+    computed when an input reaches them, and then kept in a cache. The cache
+    holds at most 'maxStates' states and is cleared when it is full.
+
+    If the cache fills up before 'minProgress' symbols have been read per
+    cached state since it was last cleared, the cache is thrashing. The rest of
+    the input is then run by simulating the Nondeterministic Finite Automata
+    directly, as building states costs more than it saves.
+
+    The cache is dropped when the Nondeterministic Finite Automata changes,
+    see NondeterministicFiniteAutomata.getVersion.
+    """
+
+    # --*-- Constructors --*--
+
+    def __init__(self, nfa, maxStates = 10000, minProgress = 10):
+        """Constructs a new Lazy Finite Automata.
+
+        @param nfa: The automaton to determinize.
+        @type nfa: NondeterministicFiniteAutomata.
+
+        @param maxStates: The maximum number of states in the cache.
+        @type maxStates: int.
+
+        @param minProgress: The minimum number of symbols to read per cached
+        state between two clears of the cache.
+        @type minProgress: int.
+        """
+        self.nfa = nfa
+        self.maxStates = maxStates
+        self.minProgress = minProgress
+        self.clears = 0
+        self.fallbacks = 0
+        self._bitsets = nfa._getBitsets()
+        self._version = nfa.getVersion() # the version the cache belongs to
+        self._cache = {}
+        self._progress = 0 # symbols read since the cache was cleared
+
+    # --*-- Methods --*--
+
+    def getNumberOfCachedStates(self):
+        """Returns the number of states currently in the cache."""
+        return len(self._cache)
+
+    def clear(self):
+        """Clears the cache."""
+        self._cache = {}
+        self._progress = 0
+        self.clears += 1
+
+    def accepts(self, s):
+        """Returns true if the given string is accepted by the automaton, false
+        otherwise.
+
+        @param s: a string of alphabet symbols
+        @type s: str
+        """
+        if self.nfa.getVersion() != self._version:
+            # The cached states belong to the automaton before the change.
+            self._bitsets = self.nfa._getBitsets()
+            self._version = self.nfa.getVersion()
+            self._cache = {}
+            self._progress = 0
+
+        bitsets = self._bitsets
+        cache = self._cache
+        mask = bitsets.initial
+        progress = self._progress
+
+        for i, c in enumerate(s):
+            row = cache.get(mask)
+            if row is None:
+                if len(cache) >= self.maxStates:
+                    thrashing = progress + i < self.minProgress * self.maxStates
+                    self.clear()
+                    cache = self._cache
+                    progress = -i
+                    if thrashing:
+                        self.fallbacks += 1
+                        mask = bitsets.run(mask, s[i:])
+                        break
+                row = cache[mask] = {}
+
+            nextMask = row.get(c)
+            if nextMask is None:
+                try:
+                    nextMask = row[c] = bitsets.step(mask, c)
+                except KeyError:
+                    raise IllegalCharacterError(c)
+            mask = nextMask
+
+        self._progress = progress + len(s)
+        return mask & bitsets.accept != 0
+
+class _NondeterministicBitsets(object):
+    """The bit-vector representation of a Nondeterministic Finite Automata,
+    see NondeterministicFiniteAutomata."""
+
+    def __init__(self, nfa):
+        self.stateList = [nfa.initial] + \
+            sorted(nfa.states - frozenset([nfa.initial]))
+        self.stateIndex = dict((q, i) for i, q in enumerate(self.stateList))
+        index = self.stateIndex
+
+        def successors(q, c):
+            mask = 0
+            for p in nfa.transitions.get((q, c), ()):
+                mask |= 1 << index[p]
+            return mask
+
+        # closures[i] is the Lambda-closure of state i.
+        epsilon = [successors(q, EPSILON) for q in self.stateList]
+        self.closures = _epsilonClosures(epsilon)
+
+        # successors[c][i] is the Lambda-closure of \delta(i, c).
+        self.successors = {}
+        for c in nfa.alphabet:
+            self.successors[c] = [self.close(successors(q, c))
+                                  for q in self.stateList]
+
+        self.initial = self.closures[0]
+        self.accept = 0
+        for q in nfa.accept:
+            self.accept |= 1 << index[q]
+
+        # The step tables of the symbols, see _buildStepTable.
+        self.stepTables = {}
+
+    def close(self, mask):
+        """Returns the Lambda-closure of the bit-vector."""
+        closures = self.closures
+        result = mask
+        while mask:
+            low = mask & -mask
+            result |= closures[low.bit_length() - 1]
+            mask ^= low
+        return result
+
+    def step(self, mask, c):
+        """Returns the Lambda-closure of the successors on 'c' of the states
+        of the bit-vector."""
+        table = self.stepTables.get(c)
+        if table is None:
+            table = self._buildStepTable(c)
+
+        # The first few groups with active states are found from the lowest
+        # set bit, which skips the groups without active states when there
+        # are few of them. Each of these operations on the bit-vector takes
+        # time linear in |Q| though, so the rest of the groups are read from
+        # the hexadecimal digits of the bit-vector, 4 digits per group.
+        result = 0
+        for i in xrange(4):
+            if mask == 0:
+                return result
+            shift = ((mask & -mask).bit_length() - 1) & ~0xf
+            bits = mask >> shift & 0xffff
+            key = '%04x' % bits
+            group = table[shift >> 4]
+            successors = group.get(key)
+            if successors is None:
+                successors = group[key] = self._union(c, shift, bits)
+            result |= successors
+            mask ^= bits << shift
+
+        digits = '%x' % mask
+        digits = digits.zfill((len(digits) + 3) & ~3)
+        g = len(digits) >> 2
+        for end in xrange(4, len(digits) + 1, 4):
+            g -= 1
+            key = digits[end - 4:end]
+            if key != '0000':
+                group = table[g]
+                successors = group.get(key)
+                if successors is None:
+                    successors = group[key] = \
+                        self._union(c, g << 4, int(key, 16))
+                result |= successors
+        return result
+
+    def run(self, mask, s):
+        """Runs the string from the bit-vector and returns the bit-vector of
+        the states it ends up in."""
+        for c in s:
+            if mask == 0:
+                # No state is active, so none ever will be, but the rest of
+                # the string still has to be checked.
+                for c in s:
+                    if c not in self.successors:
+                        raise IllegalCharacterError(c)
+                break
+            try:
+                mask = self.step(mask, c)
+            except KeyError:
+                raise IllegalCharacterError(c)
+        return mask
+
+    def _buildStepTable(self, c):
+        """Builds the step table of the symbol 'c': a list with a dictionary
+        per group of 16 states, mapping the subsets of the group met so far,
+        as 4 hexadecimal digits, to the union of the successors of their
+        states. The subsets are added by step, as a full table of the 65536
+        subsets of each group would take too long to build."""
+        if c not in self.successors:
+            raise KeyError(c)
+        table = [{} for base in xrange(0, len(self.stateList), 16)]
+        self.stepTables[c] = table
+        return table
+
+    def _union(self, c, shift, bits):
+        """Returns the union of the successors on 'c' of the states of the
+        group starting at state 'shift' given by the bits of 'bits'."""
+        successors = self.successors[c]
+        result = 0
+        while bits:
+            low = bits & -bits
+            result |= successors[shift + low.bit_length() - 1]
+            bits ^= low
+        return result
+
+# --*-- Functions --*--
+
+def toFiniteAutomata(nfa, minimal = True):
+    """Converts the given Nondeterministic Finite Automata into an equivalent
+    Finite Automata using the subset construction. Only the sets of states
+    reachable from the Lambda-closure of the initial state are constructed.
+    The states of the result are these sets as frozensets.
+
+    A minimal result is minimized during the construction: two sets of states
+    accept the same strings iff they meet the same sets of the subset
+    construction of the reversed automaton (see _residualSignatures), so each
+    set is looked up by these and a set equivalent to an earlier one is not
+    constructed. If the reversed automaton has more than
+    EARLY_MINIMIZATION_FACTOR sets per state, the full subset construction is
+    minimized by minimize instead.
+
+    @param minimal: Whether to minimize the result.
+    @type minimal: bool.
+    """
+    from finite_automata import FiniteAutomata, minimize
+
+    bitsets = nfa._getBitsets()
+    symbols = list(nfa.alphabet)
+    signatures = None
+    if minimal:
+        signatures = _residualSignatures(nfa, EARLY_MINIMIZATION_FACTOR *
+                                         nfa.getNumberOfStates())
+
+    def key(mask):
+        if signatures is None:
+            return mask
+        signature = 0
+        while mask:
+            low = mask & -mask
+            signature |= signatures[low.bit_length() - 1]
+            mask ^= low
+        return signature
+
+    initial = nfa.decode(bitsets.initial)
+    names = {key(bitsets.initial) : initial}
+    accept = set()
+    if bitsets.initial & bitsets.accept != 0:
+        accept.add(initial)
+    pending = [(bitsets.initial, initial)]
+    transitions = {}
+
+    while len(pending) > 0:
+        mask, name = pending.pop()
+        for c in symbols:
+            nextMask = bitsets.step(mask, c)
+            nextKey = key(nextMask)
+            nextName = names.get(nextKey)
+            if nextName is None:
+                nextName = names[nextKey] = nfa.decode(nextMask)
+                if nextMask & bitsets.accept != 0:
+                    accept.add(nextName)
+                pending.append((nextMask, nextName))
+            transitions[(name, c)] = nextName
+
+    fa = FiniteAutomata(frozenset(names.values()), nfa.alphabet, initial,
+                        frozenset(accept), transitions, check = False)
+    if minimal and signatures is None:
+        fa = minimize(fa)
+    return fa
+
+def _residualSignatures(nfa, limit):
+    """Returns a list with a bit-vector per state of the automaton, in the
+    order of its bit-vectors, in which bit t is set iff the state is in the
+    t'th set of the subset construction of the reversed automaton. Returns
+    None if the construction has more than 'limit' sets.
+
+    The sets of the reversed automaton are the sets T(w) of the states from
+    which the string w leads to an accepting state. A set of states S accepts
+    w iff S meets T(w), so two sets of states accept the same strings iff the
+    ors of the bit-vectors of their states are the same.
+    """
+    bitsets = nfa._getBitsets()
+    index = bitsets.stateIndex
+    n = len(bitsets.stateList)
+
+    # The reversed automaton with the states numbered as in the bit-vectors
+    # and a new initial state n. Its own bit-vectors number state n as 0 and
+    # state i as i + 1.
+    transitions = {(n, EPSILON) : set(index[q] for q in nfa.accept)}
+    for (q, c), targets in nfa.transitions.items():
+        for p in targets:
+            transitions.setdefault((index[p], c), set()).add(index[q])
+    transitions = dict((key, frozenset(states)) for key, states
+                       in transitions.items())
+    reverse = NondeterministicFiniteAutomata(frozenset(xrange(n + 1)),
+                                             nfa.alphabet, n,
+                                             frozenset([index[nfa.initial]]),
+                                             transitions)
+
+    reverseBitsets = reverse._getBitsets()
+    masks = [reverseBitsets.initial]
+    seen = set(masks)
+    for mask in masks:
+        for c in nfa.alphabet:
+            nextMask = reverseBitsets.step(mask, c)
+            if nextMask not in seen:
+                if len(masks) >= limit:
+                    return None
+                seen.add(nextMask)
+                masks.append(nextMask)
+
+    signatures = [0] * n
+    for t, mask in enumerate(masks):
+        mask >>= 1
+        while mask:
+            low = mask & -mask
+            signatures[low.bit_length() - 1] |= 1 << t
+            mask ^= low
+    return signatures
+
+def _epsilonClosures(epsilon):
+    """Returns the list of the bit-vectors of the Lambda-closures of the
+    states, given the bit-vectors of their Lambda-successors.
+
+    The states of a strongly connected component of the Lambda-transitions
+    have the same closure: the component and the closures of the states it
+    has Lambda-transitions to. Tarjan's algorithm finds the components in
+    reverse topological order, so these closures are known when a component
+    is found, and each closure costs a bitwise or per Lambda-transition
+    rather than a search of its own.
+    """
+    n = len(epsilon)
+    closures = [0] * n
+    number = [-1] * n # the order in which the search reaches the states
+    low = [0] * n
+    onStack = bytearray(n)
+    stack = []
+    counter = 0
+
+    for root in xrange(n):
+        if number[root] >= 0:
+            continue
+        number[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        onStack[root] = 1
+        # The states being searched and their successors not yet tried.
+        search = [(root, epsilon[root])]
+
+        while len(search) > 0:
+            i, rest = search[-1]
+            if rest:
+                bit = rest & -rest
+                search[-1] = (i, rest ^ bit)
+                j = bit.bit_length() - 1
+                if number[j] < 0:
+                    number[j] = low[j] = counter
+                    counter += 1
+                    stack.append(j)
+                    onStack[j] = 1
+                    search.append((j, epsilon[j]))
+                elif onStack[j]:
+                    low[i] = min(low[i], number[j])
+                continue
+
+            search.pop()
+            if len(search) > 0:
+                parent = search[-1][0]
+                low[parent] = min(low[parent], low[i])
+            if low[i] != number[i]:
+                continue
+
+            # i is the first state of a component, which is on top of it.
+            component = []
+            closure = 0
+            while True:
+                j = stack.pop()
+                onStack[j] = 0
+                component.append(j)
+                closure |= 1 << j
+                if j == i:
+                    break
+            for j in component:
+                successors = epsilon[j]
+                while successors:
+                    bit = successors & -successors
+                    closure |= closures[bit.bit_length() - 1]
+                    successors ^= bit
+            for j in component:
+                closures[j] = closure
+
+    return closures
+
+def _checkWellDefined(nfa):
+    """Checks that the given automaton is well-defined."""
+    if nfa.states is None or nfa.alphabet is None \
+            or nfa.initial is None or nfa.accept is None \
+            or nfa.transitions is None:
+        raise AutomatonNotWellDefinedError("An argument was set to None.")
+
+    if EPSILON in nfa.alphabet:
+        raise IllegalArgumentError("The empty string is not allowed in the " \
+                                       + "alphabet")
+
+    if nfa.initial not in nfa.states:
+        raise AutomatonNotWellDefinedError("The initial state is not in " \
+                                               + "the state set.")
+
+    if len(nfa.accept & nfa.states) < len(nfa.accept):
+        raise AutomatonNotWellDefinedError("Not all accept states are in " \
+                                               + "the state set.")
+
+    for (q, c), resultStates in nfa.transitions.items():
+        if q not in nfa.states:
+            raise AutomatonNotWellDefinedError(\
+                "Transitions refer to a state not in state set.")
+        if c != EPSILON and c not in nfa.alphabet:
+            raise AutomatonNotWellDefinedError(\
+                "Non-alphabet symbol appears in transitions.")
+        for p in resultStates:
+            if p not in nfa.states:
+                raise AutomatonNotWellDefinedError(\
+                    "There is a transition to a state which cannot be "\
+                        + "found in the state set.")
+
+    return True
 
 # end-of-nondeterministic_finite_automata.py
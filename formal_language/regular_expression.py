@@ -7,12 +7,678 @@
 # Version: 2012-05-09
 import copy
 import subprocess
+import threading
+from collections import OrderedDict
 from exceptions import *
+from nondeterministic_finite_automata import *
+from finite_automata import FiniteAutomata, _copyAutomata, minimize
+from canonical_form import canonicalize
+
+# --*-- Constants --*--
+
+# The metacharacters of the syntax, see RegularExpression.
+UNION = '+'
+INTERSECTION = '&'
+COMPLEMENT = '~'
+STAR = '*'
+LEFT = '('
+RIGHT = ')'
+LAMBDA = '#'
+EMPTY = '%'
+METACHARACTERS = frozenset([UNION, INTERSECTION, COMPLEMENT, STAR, LEFT, RIGHT,
+                            LAMBDA, EMPTY])
+
+# The maximum number of compiled expressions kept by compileRegularExpression.
+CACHE_SIZE = 256
 
 # --*-- Regular Expression --*--
 
 class RegularExpression(object):
-    pass
-# TODO
+    """A Regular Expression.
+
+    Definition 1: Regular Expressions
+    The regular expressions over \Sigma and the languages they denote are
+    defined as follows:
+
+    % is a regular expression denoting the empty language;
+    # is a regular expression denoting {\Lambda};
+    every \sigma \in \Sigma is a regular expression denoting {\sigma};
+    if r and s are regular expressions denoting R and S, then (r+s), (rs)
+    and (r*) are regular expressions denoting R \cup S, RS and R*.
+
+    As an extension, (r&s) and (~r) denote R \cap S and \Sigma* - R.
+
+    Parentheses may be left out, where * binds tighter than ~, which binds
+    tighter than concatenation, which binds tighter than &, which binds
+    tighter than +.
+
+    The expression is parsed into a syntax tree of tuples, whose first element
+    is one of the node types 'empty', 'lambda', 'symbol', 'union',
+    'intersection', 'concat', 'star' and 'complement'.
+
+    Besides compiling it into a Finite Automata, the expression can be matched
+    directly using Brzozowski derivatives, see accepts.
+    """
+
+    # --*-- Constructors --*--
+
+    def __init__(self, pattern, alphabet):
+        """Constructs a new Regular Expression.
+
+        @param pattern: The expression in the syntax described above.
+        @type pattern: str.
+
+        @param alphabet: The set of symbols, '\Sigma'.
+        @type alphabet: frozenset.
+        """
+
+        # input
+        self.pattern = pattern
+        self.alphabet = frozenset(alphabet)
+
+        if len(METACHARACTERS & self.alphabet) > 0:
+            raise IllegalCharacterError("'#', '%', '+', '&', '~', '*', '(' " \
+                                            + "and ')' are not allowed in " \
+                                            + "the alphabet")
+
+        self.tree = _Parser(pattern, self.alphabet).parse()
+        self._derivatives = None
+
+    # --*-- Methods --*--
+
+    def __str__(self):
+        """Returns the pattern of the expression."""
+        return self.pattern
+
+    def __repr__(self):
+        return 'RegularExpression(%r, %r)' % (self.pattern,
+                                              ''.join(sorted(self.alphabet)))
+
+    def union(self, other):
+        """Returns the expression denoting the union of the two languages."""
+        return self._combine(other, UNION)
+
+    def intersection(self, other):
+        """Returns the expression denoting the intersection of the two
+        languages."""
+        return self._combine(other, INTERSECTION)
+
+    def complement(self):
+        """Returns the expression denoting the complement of the language."""
+        return RegularExpression(COMPLEMENT + '(' + self.pattern + ')',
+                                 self.alphabet)
+
+    def _combine(self, other, operator):
+        if self.alphabet != other.alphabet:
+            raise IllegalArgumentError("The expressions have different " \
+                                           + "alphabets")
+        return RegularExpression('(' + self.pattern + ')' + operator + '(' \
+                                     + other.pattern + ')', self.alphabet)
+
+    def accepts(self, s):
+        """Returns true if the expression matches the string, using
+        Brzozowski derivatives.
+
+        The derivative of an expression r by a symbol c denotes the strings w
+        such that cw is in the language of r, so r matches s iff the derivative
+        of r by s contains Lambda. The derivatives are memoized on the
+        expression, which builds its Finite Automata lazily as strings are
+        matched.
+
+        @param s: The string to match.
+        @type s: str.
+        """
+        if self._derivatives is None:
+            self._derivatives = _Derivatives(self)
+        return self._derivatives.accepts(s)
+
+    def size(self):
+        """Returns the number of nodes in the syntax tree of the expression."""
+        size = 0
+        pending = [self.tree]
+        while len(pending) > 0:
+            tree = pending.pop()
+            size += 1
+            if tree[0] not in ('empty', 'lambda', 'symbol'):
+                pending.extend(tree[1:])
+        return size
+
+    def isExtended(self):
+        """Returns true if the expression uses intersection or complement."""
+        return INTERSECTION in self.pattern or COMPLEMENT in self.pattern
+
+    def toNondeterministicFiniteAutomata(self):
+        """Converts the expression into an equivalent Nondeterministic Finite
+        Automata using Thompson's construction. The states are numbered by
+        integers.
+
+        Intersection and complement are not supported by the construction, see
+        isExtended."""
+        return _ThompsonConstruction(self).build()
+
+    def toFiniteAutomata(self):
+        """Converts the expression into an equivalent minimal Finite Automata,
+        see compileRegularExpression."""
+        return compileRegularExpression(self.pattern, self.alphabet)
+
+# --*-- Parser --*--
+
+class _Parser(object):
+    """A recursive descent parser for the syntax of RegularExpression:
+
+    union        ::= intersection ('+' intersection)*
+    intersection ::= concat ('&' concat)*
+    concat       ::= complement complement*
+    complement   ::= '~' complement | star
+    star         ::= atom '*'*
+    atom         ::= symbol | '#' | '%' | '(' union ')'
+    """
+
+    def __init__(self, pattern, alphabet):
+        self.pattern = pattern
+        self.alphabet = alphabet
+        self.position = 0
+
+    def parse(self):
+        tree = self._union()
+        if self.position < len(self.pattern):
+            self._error("Unexpected '" + self.pattern[self.position] + "'")
+        return tree
+
+    def _peek(self):
+        if self.position < len(self.pattern):
+            return self.pattern[self.position]
+        return None
+
+    def _error(self, message):
+        raise IllegalArgumentError(message + " at position " \
+                                       + str(self.position) + " of '" \
+                                       + self.pattern + "'")
+
+    def _union(self):
+        tree = self._intersection()
+        while self._peek() == UNION:
+            self.position += 1
+            tree = ('union', tree, self._intersection())
+        return tree
+
+    def _intersection(self):
+        tree = self._concat()
+        while self._peek() == INTERSECTION:
+            self.position += 1
+            tree = ('intersection', tree, self._concat())
+        return tree
+
+    def _concat(self):
+        tree = self._complement()
+        while self._peek() not in (None, UNION, INTERSECTION, RIGHT):
+            tree = ('concat', tree, self._complement())
+        return tree
+
+    def _complement(self):
+        if self._peek() == COMPLEMENT:
+            self.position += 1
+            return ('complement', self._complement())
+        return self._star()
+
+    def _star(self):
+        tree = self._atom()
+        while self._peek() == STAR:
+            self.position += 1
+            tree = ('star', tree)
+        return tree
+
+    def _atom(self):
+        c = self._peek()
+        if c is None:
+            self._error("Unexpected end of expression")
+        self.position += 1
+
+        if c == LEFT:
+            tree = self._union()
+            if self._peek() != RIGHT:
+                self._error("Missing ')'")
+            self.position += 1
+            return tree
+        elif c == LAMBDA:
+            return ('lambda',)
+        elif c == EMPTY:
+            return ('empty',)
+        elif c in (UNION, INTERSECTION, STAR, RIGHT):
+            self.position -= 1
+            self._error("Unexpected '" + c + "'")
+        elif c not in self.alphabet:
+            raise IllegalCharacterError(c)
+        return ('symbol', c)
+
+# --*-- Thompson's Construction --*--
+
+class _ThompsonConstruction(object):
+    """Builds a Nondeterministic Finite Automata from the syntax tree of a
+    RegularExpression. Every subexpression becomes a fragment with a single
+    start and a single accept state, which are combined using
+    Lambda-transitions."""
+
+    def __init__(self, regex):
+        self.regex = regex
+        self.transitions = {}
+        self.numberOfStates = 0
+
+    def build(self):
+        start, end = self._fragment(self.regex.tree)
+        transitions = dict((key, frozenset(targets)) for key, targets
+                           in self.transitions.items())
+        return NondeterministicFiniteAutomata(
+            frozenset(range(self.numberOfStates)), self.regex.alphabet,
+            start, frozenset([end]), transitions)
+
+    def _newState(self):
+        self.numberOfStates += 1
+        return self.numberOfStates - 1
+
+    def _connect(self, q, c, p):
+        self.transitions.setdefault((q, c), set()).add(p)
+
+    def _fragment(self, tree):
+        """Returns the start and accept state of the fragment of the syntax
+        tree, using an explicit stack since long concatenations give deep
+        trees. The fragments of the subtrees of a node are built between the
+        two visits of the node and are on top of 'results' at the second."""
+        results = []
+        pending = [(tree, None)]
+        while len(pending) > 0:
+            tree, start = pending.pop()
+            kind = tree[0]
+            if start is None:
+                start = self._newState()
+                if kind in ('union', 'concat', 'star'):
+                    pending.append((tree, start))
+                    for subtree in reversed(tree[1:]):
+                        pending.append((subtree, None))
+                    continue
+
+                end = self._newState()
+                if kind == 'lambda':
+                    self._connect(start, EPSILON, end)
+                elif kind == 'symbol':
+                    self._connect(start, tree[1], end)
+                elif kind != 'empty':
+                    raise IllegalArgumentError("Thompson's construction " \
+                                                   + "does not support '" \
+                                                   + kind + "'")
+                results.append((start, end))
+                continue
+
+            count = len(tree) - 1
+            fragments = results[-count:]
+            del results[-count:]
+            if kind == 'union':
+                end = self._newState()
+                for subStart, subEnd in fragments:
+                    self._connect(start, EPSILON, subStart)
+                    self._connect(subEnd, EPSILON, end)
+            elif kind == 'concat':
+                end = start
+                for subStart, subEnd in fragments:
+                    self._connect(end, EPSILON, subStart)
+                    end = subEnd
+            else:
+                subStart, subEnd = fragments[0]
+                end = self._newState()
+                self._connect(start, EPSILON, subStart)
+                self._connect(start, EPSILON, end)
+                self._connect(subEnd, EPSILON, subStart)
+                self._connect(subEnd, EPSILON, end)
+            results.append((start, end))
+        return results[0]
+
+# --*-- Brzozowski Derivatives --*--
+
+class _Derivatives(object):
+    """The derivatives of a RegularExpression.
+
+    Expressions are hash-consed: every distinct expression is stored once in
+    'nodes' and referred to by its index, so expressions are compared and
+    hashed in constant time. The constructors normalize unions and
+    intersections by associativity, commutativity and idempotence, and apply
+    the usual identities of the empty language, Lambda and \Sigma*. This
+    makes the number of distinct derivatives finite.
+
+    The nodes are the tuples ('empty',), ('lambda',), ('symbol', c),
+    ('concat', r, s), ('star', r), ('complement', r) and ('union', rs) and
+    ('intersection', rs), where rs is a sorted tuple of at least two node
+    indices.
+    """
+
+    def __init__(self, regex):
+        self.alphabet = regex.alphabet
+        self.nodes = []
+        self.index = {}
+        self.nullable = []
+        self.derivatives = {}
+
+        self.empty = self._node(('empty',), False)
+        self.lambda_ = self._node(('lambda',), True)
+        self.everything = self.complement(self.empty)
+        self.initial = self._fromTree(regex.tree)
+
+    # --*-- Constructors --*--
+
+    def _node(self, node, nullable):
+        r = self.index.get(node)
+        if r is None:
+            r = len(self.nodes)
+            self.nodes.append(node)
+            self.nullable.append(nullable)
+            self.index[node] = r
+        return r
+
+    def _fromTree(self, tree):
+        """Converts a syntax tree into a node, using an explicit stack since
+        long concatenations give deep trees."""
+        results = []
+        pending = [(tree, False)]
+        while len(pending) > 0:
+            tree, visited = pending.pop()
+            kind = tree[0]
+            if not visited and kind == 'concat':
+                # the parser nests concatenations to the left
+                factors = []
+                while tree[0] == 'concat':
+                    factors.append(tree[2])
+                    tree = tree[1]
+                factors.append(tree)
+                pending.append((('factors', len(factors)), True))
+                for subtree in factors:
+                    pending.append((subtree, False))
+                continue
+            if not visited and kind not in ('empty', 'lambda', 'symbol'):
+                pending.append((tree, True))
+                for subtree in reversed(tree[1:]):
+                    pending.append((subtree, False))
+                continue
+
+            if kind == 'empty':
+                results.append(self.empty)
+            elif kind == 'lambda':
+                results.append(self.lambda_)
+            elif kind == 'symbol':
+                results.append(self.symbol(tree[1]))
+            elif kind == 'star':
+                results.append(self.star(results.pop()))
+            elif kind == 'complement':
+                results.append(self.complement(results.pop()))
+            elif kind == 'factors':
+                r = self.lambda_
+                for i in range(tree[1]):
+                    r = self.concat(results.pop(), r)
+                results.append(r)
+            else:
+                s = results.pop()
+                r = results.pop()
+                if kind == 'concat':
+                    results.append(self.concat(r, s))
+                elif kind == 'union':
+                    results.append(self.union([r, s]))
+                else:
+                    results.append(self.intersection([r, s]))
+        return results[0]
+
+    def symbol(self, c):
+        return self._node(('symbol', c), False)
+
+    def concat(self, r, s):
+        if r == self.empty or s == self.empty:
+            return self.empty
+        if r == self.lambda_:
+            return s
+        if s == self.lambda_:
+            return r
+        factors = []
+        while self.nodes[r][0] == 'concat':
+            factors.append(self.nodes[r][1])
+            r = self.nodes[r][2]
+        factors.append(r)
+        for r in reversed(factors):
+            s = self._node(('concat', r, s),
+                           self.nullable[r] and self.nullable[s])
+        return s
+
+    def star(self, r):
+        if r == self.empty or r == self.lambda_:
+            return self.lambda_
+        if self.nodes[r][0] == 'star':
+            return r
+        return self._node(('star', r), True)
+
+    def complement(self, r):
+        node = self.nodes[r]
+        if node[0] == 'complement':
+            return node[1]
+        return self._node(('complement', r), not self.nullable[r])
+
+    def union(self, rs):
+        rs = self._flatten('union', rs)
+        rs.discard(self.empty)
+        if self.everything in rs:
+            return self.everything
+        if len(rs) == 0:
+            return self.empty
+        if len(rs) == 1:
+            return rs.pop()
+        return self._node(('union', tuple(sorted(rs))),
+                          any(self.nullable[r] for r in rs))
+
+    def intersection(self, rs):
+        rs = self._flatten('intersection', rs)
+        rs.discard(self.everything)
+        if self.empty in rs:
+            return self.empty
+        if len(rs) == 0:
+            return self.everything
+        if len(rs) == 1:
+            return rs.pop()
+        return self._node(('intersection', tuple(sorted(rs))),
+                          all(self.nullable[r] for r in rs))
+
+    def _flatten(self, kind, rs):
+        flat = set()
+        for r in rs:
+            node = self.nodes[r]
+            if node[0] == kind:
+                flat.update(node[1])
+            else:
+                flat.add(r)
+        return flat
+
+    # --*-- Derivatives --*--
+
+    def derivative(self, r, c):
+        """Returns the derivative of the node r by the symbol c.
+
+        The derivative of a node is built from the derivatives of its
+        subnodes, which are computed first using an explicit stack since long
+        concatenations of nullable expressions give deep dependencies."""
+        derivatives = self.derivatives
+        d = derivatives.get((r, c))
+        if d is not None:
+            return d
+
+        pending = [r]
+        while len(pending) > 0:
+            r = pending[-1]
+            if (r, c) in derivatives:
+                pending.pop()
+                continue
+            missing = [s for s in self._dependencies(r)
+                       if (s, c) not in derivatives]
+            if len(missing) > 0:
+                pending.extend(missing)
+                continue
+            pending.pop()
+            derivatives[(r, c)] = self._derivative(r, c)
+        return derivatives[(r, c)]
+
+    def _dependencies(self, r):
+        """Returns the nodes whose derivatives the derivative of r is built
+        from, see _derivative."""
+        node = self.nodes[r]
+        kind = node[0]
+        if kind == 'concat':
+            if self.nullable[node[1]]:
+                return [node[1], node[2]]
+            return [node[1]]
+        elif kind in ('star', 'complement'):
+            return [node[1]]
+        elif kind in ('union', 'intersection'):
+            return list(node[1])
+        return []
+
+    def _derivative(self, r, c):
+        """Returns the derivative of the node r by the symbol c, given the
+        derivatives of the nodes of _dependencies(r)."""
+        derivatives = self.derivatives
+        node = self.nodes[r]
+        kind = node[0]
+        if kind == 'symbol':
+            if node[1] == c:
+                return self.lambda_
+            return self.empty
+        elif kind == 'concat':
+            d = self.concat(derivatives[(node[1], c)], node[2])
+            if self.nullable[node[1]]:
+                d = self.union([d, derivatives[(node[2], c)]])
+            return d
+        elif kind == 'star':
+            return self.concat(derivatives[(node[1], c)], r)
+        elif kind == 'complement':
+            return self.complement(derivatives[(node[1], c)])
+        elif kind == 'union':
+            return self.union([derivatives[(s, c)] for s in node[1]])
+        elif kind == 'intersection':
+            return self.intersection([derivatives[(s, c)] for s in node[1]])
+        return self.empty
+
+    def accepts(self, s):
+        r = self.initial
+        derivatives = self.derivatives
+        for c in s:
+            d = derivatives.get((r, c))
+            if d is None:
+                if c not in self.alphabet:
+                    raise IllegalCharacterError(c)
+                d = self.derivative(r, c)
+            r = d
+        return self.nullable[r]
+
+    def toFiniteAutomata(self):
+        """Returns the Finite Automata whose states are the derivatives of the
+        expression, named by their node indices."""
+        symbols = sorted(self.alphabet)
+        states = [self.initial]
+        seen = set(states)
+        transitions = {}
+        for r in states:
+            for c in symbols:
+                d = self.derivative(r, c)
+                transitions[(r, c)] = d
+                if d not in seen:
+                    seen.add(d)
+                    states.append(d)
+        accept = frozenset(r for r in states if self.nullable[r])
+        return FiniteAutomata(frozenset(states), self.alphabet, self.initial,
+                              accept, transitions, check = False)
+
+# --*-- Functions --*--
+
+_cache = OrderedDict()
+_cacheLock = threading.Lock()
+
+def compileRegularExpression(pattern, alphabet):
+    """Compiles the given expression into an equivalent minimal Finite
+    Automata in canonical form, see canonicalize.
+
+    The expression is converted by Thompson's construction and the subset
+    construction, or by Brzozowski derivatives if it uses intersection or
+    complement, and then minimized. The results are kept in a process-wide
+    LRU cache of CACHE_SIZE entries keyed by the pattern and the alphabet.
+    Each compile returns a new copy of the cached automaton, which shares its
+    compiled table until either is changed (see minimize).
+
+    @param pattern: The expression, see RegularExpression.
+    @type pattern: str.
+
+    @param alphabet: The set of symbols, '\Sigma'.
+    @type alphabet: frozenset.
+    """
+    key = (pattern, frozenset(alphabet))
+    with _cacheLock:
+        fa = _cache.pop(key, None)
+        if fa is not None:
+            _cache[key] = fa
+            return _copyAutomata(fa)
+
+    regex = RegularExpression(pattern, alphabet)
+    if regex.isExtended():
+        fa = minimize(_Derivatives(regex).toFiniteAutomata())
+    else:
+        fa = toFiniteAutomata(regex.toNondeterministicFiniteAutomata())
+    fa = canonicalize(fa)
+    fa.compile()
+
+    with _cacheLock:
+        _cache[key] = fa
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last = False)
+    return _copyAutomata(fa)
+
+def clearCompileCache():
+    """Empties the cache of compileRegularExpression."""
+    with _cacheLock:
+        _cache.clear()
+
+# The binding strength of each node type, see RegularExpression.
+_PRECEDENCE = {'union' : 0, 'intersection' : 1, 'concat' : 2,
+               'complement' : 3, 'star' : 4, 'empty' : 5, 'lambda' : 5,
+               'symbol' : 5}
+
+def toPattern(tree):
+    """Returns a pattern for the given syntax tree with as few parentheses as
+    possible, such that RegularExpression(toPattern(tree), alphabet).tree is
+    equal to the tree up to the nesting of unions, intersections and
+    concatenations."""
+    output = []
+    pending = [(tree, 0)]
+    while len(pending) > 0:
+        item = pending.pop()
+        if isinstance(item, str):
+            output.append(item)
+            continue
+
+        tree, precedence = item
+        kind = tree[0]
+        if _PRECEDENCE[kind] < precedence:
+            pending.append(RIGHT)
+            pending.append((tree, 0))
+            pending.append(LEFT)
+        elif kind == 'empty':
+            output.append(EMPTY)
+        elif kind == 'lambda':
+            output.append(LAMBDA)
+        elif kind == 'symbol':
+            output.append(tree[1])
+        elif kind == 'star':
+            pending.append(STAR)
+            pending.append((tree[1], _PRECEDENCE['star']))
+        elif kind == 'complement':
+            pending.append((tree[1], _PRECEDENCE['complement']))
+            pending.append(COMPLEMENT)
+        else:
+            operator = {'union' : UNION, 'intersection' : INTERSECTION,
+                        'concat' : ''}[kind]
+            pending.append((tree[2], _PRECEDENCE[kind]))
+            pending.append(operator)
+            pending.append((tree[1], _PRECEDENCE[kind]))
+    return ''.join(output)
 
 # end-of-regular_expression.py
@@ -0,0 +1,231 @@
+# serialization.py
+
+# A compact binary file format for (Deterministic) Finite Automatas.
+#
+# A file consists of a header, a state name table, a symbol table, an accept
+# bitmap and the transition table of the compiled automaton (see
+# compiled_finite_automata.py), all little-endian:
+#
+#   header      '<4sHHIIIII': magic 'FLFA', format version, flags, number of
+#               states n, number of symbols k, code of the initial state, size
+#               of the state name table and size of the symbol table in bytes
+#   names       n uint32 name lengths followed by the n names
+#   symbols     k uint32 symbol lengths followed by the k symbols
+#   accept      ceil(n / 8) bytes, bit 7 - q % 8 of byte q / 8 is set iff state
+#               q is accepting
+#   table       n * k int32 row offsets, aligned to 8 bytes
+#
+# When the flag NAMES_ARE_LITERALS is set, names and symbols are stored as
+# Python literals, which allows states such as the tuples of a product
+# automaton.
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+# --*-- Imports --*--
+
+import ast
+import mmap
+import os
+import struct
+import sys
+from array import array
+from exceptions import *
+from compiled_finite_automata import *
+from finite_automata import FiniteAutomata
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# --*-- Constants --*--
+
+MAGIC = 'FLFA'
+VERSION = 1
+NAMES_ARE_LITERALS = 1
+
+_header = struct.Struct('<4sHHIIIII')
+
+# --*-- Functions --*--
+
+def saveFiniteAutomata(fa, path):
+    """Saves the given automaton to a file in the format described above.
+
+    @param fa: The automaton to save.
+    @type fa: FiniteAutomata or CompiledFiniteAutomata.
+
+    @param path: The path of the file.
+    @type path: str.
+    """
+    if isinstance(fa, FiniteAutomata):
+        fa = fa.compile()
+
+    n = fa.numberOfStates
+    k = fa.numberOfSymbols
+
+    flags = 0
+    if not all(isinstance(x, str) for x in fa.stateList + fa.symbolList):
+        flags |= NAMES_ARE_LITERALS
+    names = _encodeNames(fa.stateList, flags)
+    symbols = _encodeNames(fa.symbolList, flags)
+
+    accept = bytearray((n + 7) // 8)
+    for q in xrange(n):
+        if fa.acceptMask[q]:
+            accept[q // 8] |= 0x80 >> (q % 8)
+
+    table = array('i', fa.table)
+    if sys.byteorder != 'little':
+        table.byteswap()
+
+    f = open(path, 'wb')
+    try:
+        f.write(_header.pack(MAGIC, VERSION, flags, n, k, fa.initial,
+                             len(names), len(symbols)))
+        f.write(names)
+        f.write(symbols)
+        f.write(accept)
+        f.write('\0' * (-f.tell() % 8))
+        f.write(table.tostring())
+    finally:
+        f.close()
+
+def loadCompiledFiniteAutomata(path):
+    """Loads an automaton saved by saveFiniteAutomata as a
+    CompiledFiniteAutomata.
+
+    The file is memory-mapped and, if NumPy is available, the transition
+    table is a read-only NumPy view of the mapping rather than a copy, so the
+    processes which load the same file share its pages. The mapping is closed
+    when the table is garbage collected. Without NumPy the table is copied
+    into an array and the mapping is closed at once.
+
+    The header, the name tables and the transition table are checked before
+    the automaton is returned, so a corrupt file is reported here rather than
+    when the automaton is run.
+
+    @param path: The path of the file.
+    @type path: str.
+
+    @raise IllegalArgumentError: If the file is not a valid automaton file.
+    """
+    f = open(path, 'rb')
+    try:
+        # An empty file cannot be mapped.
+        if os.fstat(f.fileno()).st_size < _header.size:
+            raise IllegalArgumentError("Not an automaton file: " + path)
+        data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+    finally:
+        f.close()
+
+    magic, version, flags, n, k, initial, namesSize, symbolsSize = \
+        _header.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise IllegalArgumentError("Not an automaton file: " + path)
+    if version != VERSION:
+        raise IllegalArgumentError("Unsupported automaton file version: " \
+                                       + str(version))
+
+    bitmapSize = (n + 7) // 8
+    tableStart = _header.size + namesSize + symbolsSize + bitmapSize
+    tableStart += -tableStart % 8
+    if len(data) < tableStart + 4 * n * k or namesSize < 4 * n or \
+            symbolsSize < 4 * k:
+        raise IllegalArgumentError("Truncated automaton file: " + path)
+    if not initial < n:
+        raise IllegalArgumentError("Initial state is unknown in: " + path)
+
+    position = _header.size
+    stateList = _decodeNames(data[position:position + namesSize], n, flags)
+    position += namesSize
+    symbolList = _decodeNames(data[position:position + symbolsSize], k, flags)
+    position += symbolsSize
+    if stateList is None or symbolList is None:
+        raise IllegalArgumentError("Truncated name table in: " + path)
+
+    bitmap = data[position:position + bitmapSize]
+    if numpy is not None:
+        bits = numpy.unpackbits(numpy.frombuffer(bitmap, dtype = numpy.uint8))
+        acceptMask = bytearray(bits[:n].tostring())
+    else:
+        bitmap = bytearray(bitmap)
+        acceptMask = bytearray(n)
+        for q in xrange(n):
+            if bitmap[q // 8] & (0x80 >> (q % 8)):
+                acceptMask[q] = 1
+
+    if numpy is not None:
+        table = numpy.frombuffer(data, dtype = numpy.dtype('<i4'),
+                                 count = n * k, offset = tableStart)
+        valid = n * k == 0 or (table.min() >= 0 and table.max() < n * k and
+                               not (table % k).any())
+    else:
+        table = array('i')
+        table.fromstring(data[tableStart:tableStart + 4 * n * k])
+        data.close()
+        if sys.byteorder != 'little':
+            table.byteswap()
+        valid = all(0 <= offset < n * k and offset % k == 0
+                    for offset in table)
+    if not valid:
+        raise IllegalArgumentError("Transition table maps to unknown states " \
+                                       + "in: " + path)
+
+    return CompiledFiniteAutomata(stateList, symbolList, initial, acceptMask,
+                                  table)
+
+def loadFiniteAutomata(path):
+    """Loads an automaton saved by saveFiniteAutomata as a FiniteAutomata.
+
+    @param path: The path of the file.
+    @type path: str.
+    """
+    cfa = loadCompiledFiniteAutomata(path)
+    k = cfa.numberOfSymbols
+    stateList = cfa.stateList
+    symbolList = cfa.symbolList
+    # A list of ints, as the entries of a NumPy table are slow to read one
+    # at a time.
+    table = cfa.table.tolist()
+
+    transitions = {}
+    for i, q in enumerate(stateList):
+        row = i * k
+        for j, c in enumerate(symbolList):
+            transitions[(q, c)] = stateList[table[row + j] // k]
+
+    accept = frozenset(q for i, q in enumerate(stateList) if cfa.acceptMask[i])
+    return FiniteAutomata(frozenset(stateList), frozenset(symbolList),
+                          stateList[cfa.initial], accept, transitions,
+                          check = False)
+
+def _encodeNames(names, flags):
+    """Encodes a list of names as their lengths followed by the names."""
+    if flags & NAMES_ARE_LITERALS:
+        names = [repr(name) for name in names]
+    lengths = array('I', [len(name) for name in names])
+    if sys.byteorder != 'little':
+        lengths.byteswap()
+    return lengths.tostring() + ''.join(names)
+
+def _decodeNames(data, count, flags):
+    """Decodes 'count' names encoded by _encodeNames, or returns None if the
+    lengths of the names do not fit in the data."""
+    lengths = array('I', data[:4 * count])
+    if sys.byteorder != 'little':
+        lengths.byteswap()
+    if sum(lengths) > len(data) - 4 * count:
+        return None
+
+    names = []
+    position = 4 * count
+    for length in lengths:
+        names.append(data[position:position + length])
+        position += length
+
+    if flags & NAMES_ARE_LITERALS:
+        names = [ast.literal_eval(name) for name in names]
+    return names
+
+# end-of-serialization.py
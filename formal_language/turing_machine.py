@@ -5,6 +5,10 @@
 # Author: Peter Urbak
 # Version: 2012-04-25
 
+import warnings
+from array import array
+from exceptions import *
+
 class TuringMachine(object):
     """A Turing Machine
 
@@ -14,11 +18,6 @@ class TuringMachine(object):
 
     """
 
-    # --*-- Properties --*--
-
-    hasAccepted = False
-    hasHalted = False
-
     # --*-- Constructors --*--
 
     def __init__(self, states, alphabet, blank, transition_function, init_state,
@@ -48,6 +47,9 @@ class TuringMachine(object):
                               specifying which states are the accepting ones.
         @type list of strings.
 
+        The rules are indexed by (state, symbol) when the machine is
+        constructed, see indexTransitions.
+
         """
 
         # input
@@ -58,6 +60,17 @@ class TuringMachine(object):
         self.init_state = init_state
         self.accept_states = accept_states
 
+        # the result of the last call to run
+        self.hasAccepted = False
+        self.hasHalted = False
+
+    def __setattr__(self, name, value):
+        """Reindexes the rules whenever the transition function is
+        replaced."""
+        object.__setattr__(self, name, value)
+        if name == 'transition_function':
+            object.__setattr__(self, '_index', indexTransitions(value))
+
     # --*-- Methods --*--
 
     def lookupAction(self, state, symbol):
@@ -72,58 +85,521 @@ class TuringMachine(object):
 
         """
 
-        for transition in self.transition_function:
-            if transition[0] == state and transition[1] == symbol:
-                return transition
-        return (state, symbol, state, 'HALT', 'N')
+        transition = self._index.get((state, symbol))
+        if transition is None:
+            return (state, symbol, state, 'HALT', 'N')
+        return transition
 
-    def run(self, tape):
-        """Runs the Turing Machine on the specified input tape.
+    def run(self, tape, accelerate = False):
+        """Runs the Turing Machine on the specified input tape until it halts.
+
+        The input is copied onto a Tape, so the given list is not changed, and
+        the tape is exported as a list when the machine halts. The list
+        extends from the leftmost to the rightmost cell which the head has
+        visited or which was part of the input.
+
+        The attributes 'hasAccepted' and 'hasHalted' are set to the outcome,
+        see simulate for a version which returns it instead.
 
         @param tape: The input tape; a list of symbols composing the intended
                      input value for the turing machine.
         @type tape: list of strings
 
+        @param accelerate: Whether to run on a BlockTape, which skips sweeps
+                           over runs of equal symbols in a single step. The
+                           result is the same.
+        @type accelerate: bool
+
         """
         self.hasAccepted = False
         self.hasHalted = False
 
-        state = self.init_state
-        symbol = tape[0]
-        head = 0
+        result = self.simulate(tape, accelerate = accelerate)
+
+        self.hasAccepted = result.accepted
+        self.hasHalted = result.halted
 
-        while self.hasHalted == False:
-            transition = self.lookupAction(state, symbol)
+        return result.tape
 
-            state = transition[2] # update state of TM
-            newSymbol = transition[3] # get symbol from transition function
-            direction = transition[4] # get direction from transition function
+    def simulate(self, tape, maxSteps = None, detectCycles = False,
+                 accelerate = False):
+        """Runs the Turing Machine on the specified input tape and returns a
+        RunResult. The machine is not changed, so it may be simulated by
+        several threads at once.
 
-            # Check for accept state
-            if state in self.accept_states:
-                self.hasAccepted = True
-                self.hasHalted = True
+        @param tape: The input tape, see run.
+        @type tape: list of strings
 
-            # Check for error state
-            if newSymbol == 'HALT':
-                self.hasHalted = True
+        @param maxSteps: The largest number of steps to run. When the machine
+                         has not halted after maxSteps steps, the result
+                         holds a checkpoint from which it can be resumed.
+        @type maxSteps: int
 
-            # Update Head and Tape.
-            tape[head] = newSymbol # write new symbol to tape
+        @param detectCycles: Whether to stop when the machine returns to an
+                             earlier configuration, in which case it never
+                             halts. Configurations are compared at steps
+                             1, 2, 4, 8, ..., which finds every cycle within
+                             a bounded part of the tape, but not machines
+                             which keep moving to new cells.
+        @type detectCycles: bool
 
-            if direction == 'R':
-                head += 1
-            elif direction == 'L':
-                head -= 1
+        @param accelerate: Whether to run on a BlockTape, see run.
+        @type accelerate: bool
+
+        """
+        if accelerate:
+            tape = BlockTape(tape, self.blank)
+        else:
+            tape = Tape(tape, self.blank)
+        return self._simulate(Checkpoint(tape, 0, self.init_state, 0),
+                              maxSteps, detectCycles)
+
+    def resume(self, checkpoint, maxSteps = None, detectCycles = False):
+        """Continues a simulation from the checkpoint of a RunResult and
+        returns a new RunResult. The number of steps includes the steps taken
+        before the checkpoint, whereas maxSteps limits the number of new
+        steps. The checkpoint can be resumed more than once.
+
+        @param checkpoint: The checkpoint to continue from.
+        @type checkpoint: Checkpoint
+
+        @param maxSteps: The largest number of steps to run, see simulate.
+        @type maxSteps: int
+
+        @param detectCycles: Whether to stop on cycles, see simulate.
+        @type detectCycles: bool
+
+        """
+        checkpoint = Checkpoint(checkpoint.tape.copy(), checkpoint.position,
+                                checkpoint.state, checkpoint.steps)
+        return self._simulate(checkpoint, maxSteps, detectCycles)
+
+    def _simulate(self, checkpoint, maxSteps, detectCycles):
+        limit = float('inf')
+        if maxSteps is not None:
+            limit = checkpoint.steps + maxSteps
+
+        tape = checkpoint.tape
+        if isinstance(tape, BlockTape):
+            position, state, steps, accepted, halted, looping = \
+                self._runBlocks(tape, checkpoint.position, checkpoint.state,
+                                checkpoint.steps, limit, detectCycles)
+        else:
+            position, state, steps, accepted, halted, looping = \
+                self._runCells(tape, checkpoint.position, checkpoint.state,
+                               checkpoint.steps, limit, detectCycles)
+
+        result = RunResult(accepted, halted, looping, steps, tape.toList(),
+                           tape.headIndex(position), state)
+        if not halted:
+            result.checkpoint = Checkpoint(tape, position, state, steps)
+        return result
+
+    def _runCells(self, tape, head, state, steps, limit, detectCycles):
+        """Runs the machine on a Tape from the given position of the head
+        until it halts, 'limit' steps have been taken or a cycle is found.
+        Returns the position of the head, the state, the number of steps and
+        whether the machine accepted, halted and cycled."""
+        right = tape.right
+        left = tape.left
+        actions = {}
+
+        accepted = False
+        halted = False
+        looping = False
+
+        # the configuration to compare with, see simulate
+        snapshotState = None
+        snapshotHead = None
+        snapshot = None
+        nextSnapshot = limit
+        if detectCycles:
+            nextSnapshot = steps + 1
+
+        while halted == False and steps < limit:
+            if head >= 0:
+                code = right[head]
+            else:
+                code = left[~head]
+
+            action = actions.get((state, code))
+            if action is None:
+                action = self._compileAction(tape, state, code)
+                actions[(state, code)] = action
+            state, code, move, accepted, halted = action
+
+            # Update Head and Tape.
+            if head >= 0:
+                right[head] = code
+            else:
+                left[~head] = code
+            head += move
 
             # bounds check tape
-            if head < 0:
-                tape.insert(0,self.blank)
-            elif head >= len(tape):
-                tape.append(self.blank)
+            if head >= len(right):
+                right.append(0)
+            elif ~head >= len(left):
+                left.append(0)
+
+            steps += 1
+            if head == snapshotHead and state == snapshotState and \
+                    tape.configuration() == snapshot:
+                looping = not halted
+                break
+            if steps >= nextSnapshot:
+                snapshotState = state
+                snapshotHead = head
+                snapshot = tape.configuration()
+                nextSnapshot = 2 * steps
+
+        return head, state, steps, accepted, halted, looping
+
+    def _runBlocks(self, tape, position, state, steps, limit, detectCycles):
+        """Runs the machine on a BlockTape like _runCells.
+
+        When the rule for the current state and symbol keeps the state and
+        moves the head, and the state is not accepting, the machine repeats
+        the rule over the whole run of the symbol in the direction of the move.
+        The run is then rewritten and passed in one step.
+        """
+        left = tape.left
+        right = tape.right
+        actions = {}
+
+        code = tape.head
+        accepted = False
+        halted = False
+        looping = False
+
+        # the configuration to compare with, see simulate
+        snapshotState = None
+        snapshotPosition = None
+        snapshot = None
+        nextSnapshot = limit
+        if detectCycles:
+            nextSnapshot = steps + 1
+
+        while halted == False and steps < limit:
+            action = actions.get((state, code))
+            if action is None:
+                action = self._compileAction(tape, state, code)
+                actions[(state, code)] = action
+            newState, newCode, move, accepted, halted = action
+
+            count = 1
+            if move == 0:
+                code = newCode
+            else:
+                if move == 1:
+                    behind, ahead = left, right
+                else:
+                    behind, ahead = right, left
+
+                if newState == state and not halted and len(ahead) > 0 \
+                        and ahead[-1][0] == code:
+                    block = ahead[-1]
+                    skipped = min(block[1], limit - steps - 1)
+                    block[1] -= skipped
+                    if block[1] == 0:
+                        ahead.pop()
+                    count += skipped
+
+                # write the run behind the head
+                if len(behind) > 0 and behind[-1][0] == newCode:
+                    behind[-1][1] += count
+                else:
+                    behind.append([newCode, count])
+
+                # read the next cell
+                if len(ahead) == 0:
+                    code = 0
+                else:
+                    block = ahead[-1]
+                    code = block[0]
+                    block[1] -= 1
+                    if block[1] == 0:
+                        ahead.pop()
+
+            state = newState
+            position += move * count
+            steps += count
+
+            if position == snapshotPosition and state == snapshotState:
+                tape.head = code
+                if tape.configuration() == snapshot:
+                    looping = not halted
+                    break
+            if steps >= nextSnapshot:
+                tape.head = code
+                snapshotState = state
+                snapshotPosition = position
+                snapshot = tape.configuration()
+                nextSnapshot = 2 * steps
+
+        tape.head = code
+        return position, state, steps, accepted, halted, looping
+
+    def _compileAction(self, tape, state, code):
+        """Returns the action of the rule governing (state, symbol), where the
+        symbol is given by its code on the tape, as a 5-tuple of the new state,
+        the code of the symbol to write, the move of the head (-1, 0 or 1),
+        whether the new state is accepting and whether the machine halts."""
+        transition = self.lookupAction(state, tape.symbols[code])
+
+        state = transition[2] # update state of TM
+        newSymbol = transition[3] # get symbol from transition function
+        direction = transition[4] # get direction from transition function
+
+        # Check for accept state and error state
+        accepted = state in self.accept_states
+        halted = accepted or newSymbol == 'HALT'
+
+        move = 0
+        if direction == 'R':
+            move = 1
+        elif direction == 'L':
+            move = -1
+
+        return (state, tape.encode(newSymbol), move, accepted, halted)
+
+class Tape(object):
+    """A two-sided tape of a Turing Machine.
+
+    The symbols are coded as integers, where the blank symbol is 0, see
+    encode. The cells at positions 0, 1, 2, ... are stored in the array
+    'right' and the cells at positions -1, -2, ... in the array 'left', such
+    that the cell at position p < 0 is left[~p]. Both arrays grow at their
+    end, so moving the head past either end of the tape takes amortized
+    constant time.
+    """
 
-            symbol = tape[head]
+    def __init__(self, cells, blank):
+        """Initializes a tape holding the given cells from position 0.
 
+        @param cells: The symbols of the tape.
+        @type cells: list of strings.
+
+        @param blank: The blank symbol.
+        @type blank: string.
+        """
+        self.blank = blank
+        self.symbols = [blank]
+        self.codes = {blank : 0}
+        self.right = array('i', [self.encode(symbol) for symbol in cells])
+        self.left = array('i')
+        if len(self.right) == 0:
+            self.right.append(0)
+
+    def encode(self, symbol):
+        """Returns the code of the given symbol, assigning it the next code if
+        it has none yet."""
+        code = self.codes.get(symbol)
+        if code is None:
+            code = len(self.symbols)
+            self.symbols.append(symbol)
+            self.codes[symbol] = code
+        return code
+
+    def copy(self):
+        """Returns a copy of the tape."""
+        tape = Tape([], self.blank)
+        tape.symbols = list(self.symbols)
+        tape.codes = dict(self.codes)
+        tape.right = array('i', self.right)
+        tape.left = array('i', self.left)
         return tape
 
+    def toList(self):
+        """Returns the symbols of the tape from the leftmost to the rightmost
+        cell."""
+        symbols = self.symbols
+        return [symbols[code] for code in reversed(self.left)] + \
+            [symbols[code] for code in self.right]
+
+    def headIndex(self, position):
+        """Returns the index in toList of the cell at the given position."""
+        return position + len(self.left)
+
+    def configuration(self):
+        """Returns a value which is equal for two tapes iff they hold the
+        same symbols at every position, where the blank cells at either end
+        are left out."""
+        # the codes of blank cells are 0, whose bytes are all zero
+        return (self.right.tostring().rstrip('\0'),
+                self.left.tostring().rstrip('\0'))
+
+class BlockTape(Tape):
+    """A two-sided tape of a Turing Machine which stores runs of equal symbols
+    as blocks.
+
+    The code of the symbol under the head is 'head'. The cells to the left of
+    the head are the stack 'left' and the cells to the right of the head are
+    the stack 'right', both of blocks [code, count], such that the top of each
+    stack is the block next to the head. Cells beyond the blocks are blank.
+    """
+
+    def __init__(self, cells, blank):
+        """Initializes a tape holding the given cells from position 0, where
+        the head is at position 0.
+
+        @param cells: The symbols of the tape.
+        @type cells: list of strings.
+
+        @param blank: The blank symbol.
+        @type blank: string.
+        """
+        self.blank = blank
+        self.symbols = [blank]
+        self.codes = {blank : 0}
+        self.left = []
+        self.right = []
+        self.head = 0
+
+        codes = [self.encode(symbol) for symbol in cells]
+        if len(codes) > 0:
+            self.head = codes[0]
+        for code in reversed(codes[1:]):
+            if len(self.right) > 0 and self.right[-1][0] == code:
+                self.right[-1][1] += 1
+            else:
+                self.right.append([code, 1])
+
+    def copy(self):
+        """Returns a copy of the tape."""
+        tape = BlockTape([], self.blank)
+        tape.symbols = list(self.symbols)
+        tape.codes = dict(self.codes)
+        tape.left = [list(block) for block in self.left]
+        tape.right = [list(block) for block in self.right]
+        tape.head = self.head
+        return tape
+
+    def toList(self):
+        """Returns the symbols of the tape from the leftmost to the rightmost
+        cell."""
+        symbols = self.symbols
+        cells = []
+        for code, count in self.left:
+            cells.extend([symbols[code]] * count)
+        cells.append(symbols[self.head])
+        for code, count in reversed(self.right):
+            cells.extend([symbols[code]] * count)
+        return cells
+
+    def headIndex(self, position):
+        """Returns the index in toList of the cell under the head."""
+        return sum(count for code, count in self.left)
+
+    def configuration(self):
+        """Returns a value which is equal for two tapes with the head at the
+        same position iff they hold the same symbols at every position, where
+        the blank cells at either end are left out."""
+        # adjacent blocks have different codes, so only the bottom block of a
+        # stack can be blank cells at the end of the tape
+        left = self.left
+        right = self.right
+        if len(left) > 0 and left[0][0] == 0:
+            left = left[1:]
+        if len(right) > 0 and right[0][0] == 0:
+            right = right[1:]
+        return (self.head, tuple(map(tuple, left)), tuple(map(tuple, right)))
+
+class RunResult(object):
+    """The outcome of simulating a Turing Machine, see
+    TuringMachine.simulate."""
+
+    def __init__(self, accepted, halted, looping, steps, tape, head, state):
+        """Initializes a RunResult.
+
+        @param accepted: Whether the machine entered an accepting state.
+        @type accepted: bool
+
+        @param halted: Whether the machine halted.
+        @type halted: bool
+
+        @param looping: Whether the machine returned to an earlier
+                        configuration, such that it never halts.
+        @type looping: bool
+
+        @param steps: The number of steps taken.
+        @type steps: int
+
+        @param tape: The tape, see TuringMachine.run.
+        @type tape: list of strings
+
+        @param head: The index of the cell under the head in 'tape'.
+        @type head: int
+
+        @param state: The state of the machine.
+        @type state: string
+
+        """
+        self.accepted = accepted
+        self.halted = halted
+        self.looping = looping
+        self.steps = steps
+        self.tape = tape
+        self.head = head
+        self.state = state
+
+        # the point to resume from, when the machine has not halted
+        self.checkpoint = None
+
+class Checkpoint(object):
+    """A point from which the simulation of a Turing Machine can be resumed,
+    see TuringMachine.resume."""
+
+    def __init__(self, tape, position, state, steps):
+        """Initializes a Checkpoint.
+
+        @param tape: The tape.
+        @type tape: Tape or BlockTape
+
+        @param position: The position of the head, where the first cell of the
+                         input is at position 0.
+        @type position: int
+
+        @param state: The state of the machine.
+        @type state: string
+
+        @param steps: The number of steps taken.
+        @type steps: int
+
+        """
+        self.tape = tape
+        self.position = position
+        self.state = state
+        self.steps = steps
+
+# --*-- Functions --*--
+
+def indexTransitions(transition_function):
+    """Returns a dictionary mapping each pair (state, symbol) to the rule
+    (5-tuple) governing it.
+
+    Raises an AutomatonNotWellDefinedError if two different rules govern the
+    same pair, and warns about rules which are listed more than once.
+
+    @param transition_function: The list of rules, see TuringMachine.
+    @type transition_function: list of tuples.
+    """
+    index = {}
+    conflicts = []
+    for transition in transition_function:
+        transition = tuple(transition)
+        key = transition[:2]
+        previous = index.get(key)
+        if previous is None:
+            index[key] = transition
+        elif previous == transition:
+            warnings.warn("The rule " + str(transition) + " is listed more " \
+                              + "than once")
+        else:
+            conflicts.append(str(previous) + " and " + str(transition))
+
+    if len(conflicts) > 0:
+        raise AutomatonNotWellDefinedError("Conflicting rules: " \
+                                               + ", ".join(conflicts))
+    return index
+
 # end-of-turing_machine.py
@@ -0,0 +1,72 @@
+# batch_tests.py
+
+# Test functions for running machines on many inputs in parallel found in
+# batch.py.
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+from nose.tools import *
+from formal_language.batch import *
+from formal_language.turing_machine import TuringMachine
+from tests.finite_automata_tests import returnFreshFA
+
+# -*- Helper Functions -*-
+
+def returnUnaryTM():
+    """Returns the machine which appends a 1 to a unary number, and runs
+    forever on a tape starting with 0."""
+    return TuringMachine(['A', 'F'], ['0', '1', '#'], '#',
+                         [('A', '1', 'A', '1', 'R'), ('A', '#', 'F', '1', 'N'),
+                          ('A', '0', 'A', '0', 'N')], 'A', ['F'])
+
+def helper_strings(n):
+    return [bin(i)[2:] for i in range(n)]
+
+# -*- Tests -*-
+
+def test_runBatchOnFiniteAutomata():
+    strings = helper_strings(200)
+    expected = [s.endswith('11') for s in strings]
+    fa = returnFreshFA()
+    assert_equal(list(runBatch(fa, strings, processes = 1)), expected)
+    assert_equal(list(runBatch(fa, strings, processes = 2, chunksize = 7)),
+                 expected)
+    assert_equal(list(runBatch(fa.compile(), iter(strings), processes = 2)),
+                 expected)
+
+def test_runBatchUnordered():
+    strings = helper_strings(100)
+    results = list(runBatch(returnFreshFA(), strings, processes = 2,
+                            chunksize = 3, ordered = False))
+    assert_equal(sorted(results),
+                 [(i, s.endswith('11')) for i, s in enumerate(strings)])
+
+def test_runBatchOnTuringMachine():
+    tapes = [['1'] * n for n in range(20)] + [['0']]
+    results = list(runBatch(returnUnaryTM(), tapes, processes = 2,
+                            maxSteps = 1000))
+    for n in range(20):
+        assert_true(results[n].accepted)
+        assert_equal(results[n].tape, ['1'] * (n + 1))
+    assert_false(results[20].halted)
+    assert_equal(results[20].steps, 1000)
+    assert_equal(results[20].checkpoint, None)
+
+def test_runBatchChecksArgumentsOnCall():
+    assert_raises(IllegalArgumentError, runBatch, object(), [])
+    assert_raises(IllegalArgumentError, runBatch, returnFreshFA(), [],
+                  processes = 0)
+
+def test_runBatchInProcessIsReentrant():
+    tm = returnUnaryTM()
+    fa = returnFreshFA()
+    outer = runBatch(fa, helper_strings(8), processes = 1)
+    results = []
+    for accepted in outer:
+        results.append(accepted)
+        inner = list(runBatch(tm, [['1']], processes = 1))
+        assert_equal(inner[0].tape, ['1', '1'])
+    assert_equal(results, [s.endswith('11') for s in helper_strings(8)])
+
+# end-of-batch_tests.py
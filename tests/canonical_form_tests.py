@@ -0,0 +1,128 @@
+# canonical_form_tests.py
+
+import random
+from nose.tools import *
+from formal_language.finite_automata import *
+from formal_language.canonical_form import *
+from formal_language.regular_expression import compileRegularExpression
+from tests.finite_automata_tests import returnFreshFA
+
+# -*- Helper Functions -*-
+
+def returnRedundantFA():
+    """Returns an FA for the same language as returnFreshFA with duplicated
+    and unreachable states and different names."""
+    states = frozenset([1, 2, 3, 4, 5, 6])
+    transitions = {(1, '0') : 4, (1, '1') : 2,
+                   (4, '0') : 1, (4, '1') : 2,
+                   (2, '0') : 1, (2, '1') : 5,
+                   (5, '0') : 4, (5, '1') : 3,
+                   (3, '0') : 1, (3, '1') : 5,
+                   (6, '0') : 6, (6, '1') : 3}
+    return FiniteAutomata(states, frozenset(['0', '1']), 1,
+                          frozenset([3, 5, 6]), transitions)
+
+def returnRandomFA(n, seed):
+    rng = random.Random(seed)
+    states = frozenset(range(n))
+    transitions = {}
+    for q in range(n):
+        for c in ['0', '1']:
+            transitions[(q, c)] = rng.randrange(n)
+    accept = frozenset(q for q in range(n) if rng.random() < 0.3)
+    return FiniteAutomata(states, frozenset(['0', '1']), 0, accept,
+                          transitions)
+
+# -*- Tests -*-
+
+# * canonicalize *
+
+def test_canonicalize():
+    canonical = canonicalize(returnFreshFA())
+    assert_equal(canonical.states, frozenset(['q0', 'q1', 'q2']))
+    assert_equal(canonical.initial, 'q0')
+    assert_equal(canonical.accept, frozenset(['q2']))
+    assert_equal(canonical.transitions,
+                 {('q0', '0') : 'q0', ('q0', '1') : 'q1',
+                  ('q1', '0') : 'q0', ('q1', '1') : 'q2',
+                  ('q2', '0') : 'q0', ('q2', '1') : 'q2'})
+
+def test_canonicalizeEquivalentAutomatas():
+    canonical = canonicalize(returnFreshFA())
+    other = canonicalize(returnRedundantFA())
+    assert_equal(other.states, canonical.states)
+    assert_equal(other.accept, canonical.accept)
+    assert_equal(other.transitions, canonical.transitions)
+
+def test_canonicalizeIsCached():
+    fa = returnFreshFA()
+    canonical = canonicalize(fa)
+    other = canonicalize(fa)
+    assert_false(other is canonical)
+    assert_equal(other.transitions, canonical.transitions)
+    assert_equal(canonicalize(canonical).transitions, canonical.transitions)
+
+    canonical.accept = frozenset([])
+    assert_equal(canonicalize(fa).accept, frozenset(['q2']))
+    fa.addTransition('c', '0', 'c')
+    assert_not_equal(canonicalize(fa).transitions, other.transitions)
+
+# * canonicalHash *
+
+def test_canonicalHash():
+    fa = returnFreshFA()
+    assert_equal(len(canonicalHash(fa)), 40)
+    assert_equal(canonicalHash(fa), canonicalHash(returnRedundantFA()))
+    assert_equal(canonicalHash(fa), canonicalHash(canonicalize(fa)))
+    assert_not_equal(canonicalHash(fa), canonicalHash(complement(fa)))
+
+    fa.addTransition('c', '0', 'c')
+    assert_not_equal(canonicalHash(fa), canonicalHash(returnRedundantFA()))
+
+def test_canonicalHashAgreesWithEquals():
+    automatas = [returnRandomFA(6, seed) for seed in range(60)]
+    for fa1 in automatas[:20]:
+        for fa2 in automatas:
+            assert_equal(canonicalHash(fa1) == canonicalHash(fa2),
+                         findDistinguishingString(fa1, fa2) is None)
+            assert_equal(equals(fa1, fa2), canonicalHash(fa1) ==
+                         canonicalHash(fa2))
+
+def test_canonicalHashDependsOnAlphabet():
+    fa1 = compileRegularExpression('a*', frozenset('a'))
+    fa2 = compileRegularExpression('a*', frozenset('ab'))
+    assert_not_equal(canonicalHash(fa1), canonicalHash(fa2))
+
+# * FiniteAutomataStore *
+
+def test_intern():
+    store = FiniteAutomataStore()
+    canonical = store.intern(returnFreshFA())
+    assert_equal(len(store), 1)
+    assert_true(store.intern(returnRedundantFA()) is canonical)
+    assert_true(store.intern(canonical) is canonical)
+    assert_equal(len(store), 1)
+
+    assert_true(returnFreshFA() in store)
+    assert_false(complement(returnFreshFA()) in store)
+    store.intern(complement(returnFreshFA()))
+    assert_equal(len(store), 2)
+
+def test_lookup():
+    store = FiniteAutomataStore()
+    fa = returnFreshFA()
+    assert_equal(store.lookup(canonicalHash(fa)), None)
+    canonical = store.intern(fa)
+    assert_true(store.lookup(canonicalHash(fa)) is canonical)
+
+def test_changedAutomataIsReplaced():
+    store = FiniteAutomataStore()
+    canonical = store.intern(returnFreshFA())
+    canonical.addTransition('q2', '0', 'q2')
+
+    assert_false(returnFreshFA() in store)
+    replacement = store.intern(returnFreshFA())
+    assert_false(replacement is canonical)
+    assert_true(equals(replacement, returnFreshFA()))
+
+# end-of-canonical_form_tests.py
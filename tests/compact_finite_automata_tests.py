@@ -0,0 +1,153 @@
+# compact_finite_automata_tests.py
+
+import copy
+import itertools
+from nose.tools import *
+from formal_language.finite_automata import *
+from formal_language.compact_finite_automata import *
+from tests.finite_automata_tests import returnFreshFA
+
+# -*- Helper Functions -*-
+
+def returnModuloCompactFA(n):
+    """Returns the compact FA accepting the strings over {0,1} with a number
+    of 1s divisible by n, with the states named by their codes."""
+    table = []
+    for q in range(n):
+        table.extend([q, (q + 1) % n])
+    return CompactFiniteAutomata(n, frozenset(['0', '1']), 0, [0], table)
+
+def helper_allStrings(maxLength):
+    strings = []
+    for n in range(maxLength + 1):
+        strings.extend(''.join(s) for s in itertools.product('01', repeat = n))
+    return strings
+
+# -*- Tests -*-
+
+# * compactAutomata *
+
+def test_compactAutomata():
+    fa = returnFreshFA()
+    compact = fa.compact()
+    assert_equal(compact.getNumberOfStates(), 3)
+    assert_equal(compact.states, fa.states)
+    assert_equal(compact.alphabet, fa.alphabet)
+    assert_equal(compact.initial, 'a')
+    assert_equal(compact.accept, fa.accept)
+    assert_equal(dict(compact.transitions), fa.transitions)
+    for s in helper_allStrings(6):
+        assert_equal(compact.accepts(s), fa.accepts(s))
+
+def test_compactAutomataOfNumberedStates():
+    compact = returnModuloCompactFA(3)
+    fa = FiniteAutomata(compact.states, compact.alphabet, compact.initial,
+                        compact.accept, copy.copy(compact.transitions))
+    assert_equal(fa.states, frozenset([0, 1, 2]))
+    other = compactAutomata(fa)
+    assert_equal(other._names, None)
+    assert_equal(list(other.table), list(compact.table))
+
+def test_compactAutomataOfCompiledAutomata():
+    cfa = returnFreshFA().compile()
+    cfa.symbolList.reverse()
+    cfa.symbolIndex = dict((c, i) for i, c in enumerate(cfa.symbolList))
+    k = cfa.numberOfSymbols
+    for row in range(0, len(cfa.table), k):
+        cfa.table[row], cfa.table[row + 1] = cfa.table[row + 1], cfa.table[row]
+
+    compact = compactAutomata(cfa)
+    assert_equal(dict(compact.transitions), returnFreshFA().transitions)
+
+# * CompactFiniteAutomata *
+
+def test_constructorChecksDefinition():
+    assert_raises(AutomatonNotWellDefinedError, CompactFiniteAutomata, 2,
+                  frozenset(['0']), 0, [], [0])
+    assert_raises(AutomatonNotWellDefinedError, CompactFiniteAutomata, 2,
+                  frozenset(['0']), 0, [], [0, 2])
+    assert_raises(AutomatonNotWellDefinedError, CompactFiniteAutomata, 2,
+                  frozenset(['0']), 2, [], [0, 1])
+    assert_raises(AutomatonNotWellDefinedError, CompactFiniteAutomata, 2,
+                  frozenset(['0']), 0, [2], [0, 1])
+    assert_raises(IllegalArgumentError, CompactFiniteAutomata, 2,
+                  frozenset(['0']), 0, [], [0, 1], ['a'])
+
+def test_views():
+    compact = returnFreshFA().compact()
+    assert_true('b' in compact.states)
+    assert_false('d' in compact.states)
+    assert_false(['a'] in compact.states)
+    assert_true('c' in compact.accept)
+    assert_false('b' in compact.accept)
+    assert_equal(len(compact.accept), 1)
+    assert_equal(compact.states - compact.accept, frozenset(['a', 'b']))
+    assert_equal(frozenset(['b', 'c']) & compact.accept, frozenset(['c']))
+    assert_equal(len(compact.transitions), 6)
+    assert_equal(compact.transitions[('b', '1')], 'c')
+    assert_false(('d', '1') in compact.transitions)
+    assert_equal(type(copy.copy(compact.transitions)), dict)
+
+def test_addTransition():
+    compact = returnFreshFA().compact()
+    cfa = compact.compile()
+    version = compact.getVersion()
+    compact.addTransition('c', '0', 'c')
+    assert_equal(compact.getVersion(), version + 1)
+    assert_true(compact.accepts('110'))
+    assert_false(compact.compile() is cfa)
+    assert_true(compact.compile().accepts('110'))
+
+    assert_raises(IllegalCharacterError, compact.addTransition, 'c', '2', 'c')
+    assert_raises(IllegalArgumentError, compact.addTransition, 'c', '0', 'd')
+
+def test_accepts():
+    compact = returnModuloCompactFA(3)
+    for s in helper_allStrings(6):
+        assert_equal(compact.accepts(s), s.count('1') % 3 == 0)
+    assert_raises(IllegalCharacterError, compact.accepts, '012')
+    assert_equal(compact.deltaStar(1, '11'), 0)
+
+def test_analyses():
+    compact = returnModuloCompactFA(4)
+    assert_equal(compact.findReachableStates(), frozenset(range(4)))
+    assert_equal(compact.findLiveStates(), frozenset(range(4)))
+    assert_false(compact.isFinite())
+    assert_false(compact.isEmpty())
+
+# * finite_automata functions *
+
+def test_equals():
+    fa = returnFreshFA()
+    compact = fa.compact()
+    assert_true(equals(fa, compact))
+    assert_true(equals(compact, fa))
+    assert_false(equals(complement(fa), compact))
+    assert_false(equals(returnModuloCompactFA(2), returnModuloCompactFA(4)))
+
+def test_minimize():
+    compact = returnModuloCompactFA(6)
+    compact = CompactFiniteAutomata(6, compact.alphabet, 0, [0, 3],
+                                    compact.table)
+    m = minimize(compact)
+    assert_equal(m.getNumberOfStates(), 3)
+    assert_true(equals(m, returnModuloCompactFA(3)))
+
+def test_minimizeFromOtherInitialState():
+    compact = returnModuloCompactFA(3)
+    shifted = CompactFiniteAutomata(3, compact.alphabet, 2, [0],
+                                    compact.table)
+    m = minimize(shifted)
+    assert_equal(m.initial, 2)
+    for s in helper_allStrings(6):
+        assert_equal(m.accepts(s), s.count('1') % 3 == 1)
+
+def test_complement():
+    compact = returnFreshFA().compact()
+    c = complement(compact)
+    assert_true(c.accepts('0'))
+    c.addTransition('a', '0', 'c')
+    assert_false(c.accepts('0'))
+    assert_equal(compact.deltaStar('a', '0'), 'a')
+
+# end-of-compact_finite_automata_tests.py
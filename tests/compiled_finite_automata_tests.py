@@ -0,0 +1,137 @@
+# compiled_finite_automata_tests.py
+
+# Test functions for the compiled Finite Automata found in
+# compiled_finite_automata.py.
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+import mmap
+import random
+import tempfile
+from StringIO import StringIO
+from nose.tools import *
+from formal_language.finite_automata import *
+import formal_language.compiled_finite_automata as compiled_finite_automata
+from tests.finite_automata_tests import returnFreshFA
+
+# -*- Tests -*-
+
+# * compileAutomata *
+
+def test_compileAutomata():
+    cfa = returnFreshFA().compile()
+    assert_equal(cfa.stateList, ['a', 'b', 'c'])
+    assert_equal(cfa.symbolList, ['0', '1'])
+    assert_equal(cfa.initial, 0)
+    assert_equal(list(cfa.acceptMask), [0, 0, 1])
+    # Rows hold offsets, i.e. state codes times the number of symbols.
+    assert_equal(list(cfa.table), [0, 2, 0, 4, 0, 4])
+
+@raises(AutomatonNotWellDefinedError)
+def test_compileAutomataWithPartialTransitionFunction():
+    fa = returnFreshFA()
+    del fa.transitions[('c', '1')]
+    fa.compile()
+
+# * encode *
+
+@raises(IllegalCharacterError)
+def test_encode():
+    cfa = returnFreshFA().compile()
+    # Positive tests
+    assert_equal(list(cfa.encode('0110')), [0, 1, 1, 0])
+    assert_equal(list(cfa.encode(u'01')), [0, 1])
+    # Exception tests
+    cfa.encode('0120')
+
+# * deltaStar *
+
+def test_deltaStar():
+    fa = returnFreshFA()
+    cfa = fa.compile()
+    for s in ['', '0', '1', '10111', '10110', '0011']:
+        assert_equal(cfa.deltaStar('a', s), fa.deltaStar('a', s))
+    assert_equal(cfa.deltaStar('b', '1'), 'c')
+
+# * accepts *
+
+def test_accepts():
+    cfa = returnFreshFA().compile()
+    # Positive tests
+    assert_true(cfa.accepts('10111'))
+    assert_true(cfa.accepts(bytearray('011')))
+    # Negative tests
+    assert_false(cfa.accepts('10110'))
+    assert_false(cfa.accepts(''))
+
+# * acceptsMany *
+
+def test_acceptsMany():
+    fa = returnFreshFA()
+    rng = random.Random(0)
+    strings = [''.join(rng.choice('01') for i in range(rng.randint(0, 12)))
+               for j in range(500)]
+    expected = [fa.accepts(s) for s in strings]
+    assert_equal(list(fa.acceptsMany(strings)), expected)
+    assert_equal(list(fa.acceptsMany([unicode(s) for s in strings])), expected)
+    assert_equal(len(fa.acceptsMany([])), 0)
+
+def test_acceptsManyWithoutNumpy():
+    fa = returnFreshFA()
+    strings = ['', '11', '011', '110']
+    numpy = compiled_finite_automata.numpy
+    compiled_finite_automata.numpy = None
+    try:
+        assert_equal(fa.acceptsMany(strings), [False, True, True, False])
+    finally:
+        compiled_finite_automata.numpy = numpy
+
+@raises(IllegalCharacterError)
+def test_acceptsManyWithIllegalCharacter():
+    returnFreshFA().acceptsMany(['01', '012'])
+
+# * FiniteAutomataMatcher *
+
+def test_matcherFeed():
+    matcher = returnFreshFA().matcher(chunkSize = 2)
+    assert_equal(matcher.state, 'a')
+    assert_false(matcher.isAccepting())
+    matcher.feed('10')
+    assert_equal(matcher.state, 'a')
+    matcher.feed(bytearray('1'))
+    assert_equal(matcher.state, 'b')
+    matcher.feed(memoryview('0111'))
+    assert_equal(matcher.state, 'c')
+    assert_true(matcher.isAccepting())
+    assert_equal(matcher.consumed, 7)
+    matcher.reset()
+    assert_equal(matcher.state, 'a')
+    assert_equal(matcher.consumed, 0)
+
+def test_matcherFeedFile():
+    matcher = returnFreshFA().matcher(chunkSize = 3)
+    matcher.feed(StringIO('0101011'))
+    assert_true(matcher.isAccepting())
+    matcher.feed(StringIO('0'))
+    assert_false(matcher.isAccepting())
+
+def test_matcherFeedMemoryMappedFile():
+    f = tempfile.TemporaryFile()
+    f.write('01' * 1000 + '1')
+    f.flush()
+    mm = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+    try:
+        matcher = returnFreshFA().matcher(chunkSize = 64)
+        matcher.feed(mm)
+        assert_true(matcher.isAccepting())
+        assert_equal(matcher.consumed, 2001)
+    finally:
+        mm.close()
+        f.close()
+
+@raises(IllegalCharacterError)
+def test_matcherFeedIllegalCharacter():
+    returnFreshFA().matcher().feed('0121')
+
+# end-of-compiled_finite_automata_tests.py
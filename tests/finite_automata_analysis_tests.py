@@ -0,0 +1,161 @@
+# finite_automata_analysis_tests.py
+
+# Test functions for the analyses of Finite Automatas found in
+# finite_automata_analysis.py.
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+from nose.tools import *
+from formal_language.finite_automata import *
+from tests.finite_automata_tests import returnFreshFA
+
+# -*- Helper Functions -*-
+
+def returnChainFA(n):
+    """Returns the FA which accepts exactly the strings of $\{0,1\}*$ with
+    length less than 'n', using a chain of n + 1 states."""
+    states = [str(i) for i in range(n + 1)]
+    transitions = {}
+    for i in range(n + 1):
+        for c in ['0', '1']:
+            transitions[(str(i), c)] = str(min(i + 1, n))
+    return FiniteAutomata(frozenset(states), frozenset(['0', '1']), '0',
+                          frozenset(states[:-1]), transitions)
+
+# -*- Tests -*-
+
+# * findReachableStates *
+
+def test_findReachableStates():
+    fa = returnChainFA(10)
+    assert_equal(findReachableStates(fa), fa.states)
+
+    fa = returnFreshFA()
+    fa.states = frozenset(['a', 'b', 'c', 'd'])
+    fa.transitions[('d', '0')] = 'a'
+    fa.transitions[('d', '1')] = 'd'
+    assert_equal(findReachableStates(fa), frozenset(['a', 'b', 'c']))
+
+# * findPredecessors *
+
+def test_findPredecessors():
+    predecessors = findPredecessors(returnFreshFA())
+    assert_equal(sorted(predecessors['a']), ['a', 'b', 'c'])
+    assert_equal(sorted(predecessors['b']), ['a'])
+    assert_equal(sorted(predecessors['c']), ['b', 'c'])
+
+# * findLiveStates *
+
+def test_findLiveStates():
+    fa = returnChainFA(3)
+    assert_equal(findLiveStates(fa), frozenset(['0', '1', '2']))
+
+    fa = returnFreshFA()
+    assert_equal(findLiveStates(fa), fa.states)
+    fa = FiniteAutomata(fa.states, fa.alphabet, fa.initial, frozenset([]),
+                        fa.transitions)
+    assert_equal(findLiveStates(fa), frozenset([]))
+
+# * findStronglyConnectedComponents *
+
+def test_findStronglyConnectedComponents():
+    components = findStronglyConnectedComponents(returnFreshFA())
+    assert_equal(components, [frozenset(['a', 'b', 'c'])])
+
+    components = findStronglyConnectedComponents(returnChainFA(3))
+    # Reverse topological order, the sink comes first.
+    assert_equal(components, [frozenset([str(i)]) for i in [3, 2, 1, 0]])
+
+def test_findStronglyConnectedComponentsOfLargeFA():
+    # Deep enough to overflow the stack of a recursive implementation.
+    fa = returnChainFA(20000)
+    assert_equal(len(findStronglyConnectedComponents(fa)), 20001)
+
+# * isFinite *
+
+def test_isFinite():
+    assert_false(isFinite(returnFreshFA()))
+    assert_true(isFinite(returnChainFA(5)))
+    assert_true(isFinite(returnChainFA(20000)))
+
+    # A loop which cannot reach an accept state does not matter.
+    fa = returnChainFA(2)
+    fa.addTransition('2', '0', '2')
+    assert_true(isFinite(fa))
+
+# * caching *
+
+def test_cacheIsInvalidatedByAddTransition():
+    fa = returnChainFA(2)
+    assert_true(fa.isFinite())
+    assert_equal(fa.findReachableStates(), frozenset(['0', '1', '2']))
+
+    fa.addTransition('1', '0', '0')
+    assert_false(fa.isFinite())
+
+    fa.addTransition('0', '0', '0')
+    fa.addTransition('0', '1', '0')
+    assert_equal(fa.findReachableStates(), frozenset(['0']))
+
+def test_cacheIsInvalidatedByAssignment():
+    fa = returnFreshFA()
+    assert_false(fa.isEmpty())
+    fa.accept = frozenset([])
+    assert_true(fa.isEmpty())
+
+def test_versionCountsChanges():
+    fa = returnFreshFA()
+    version = fa.getVersion()
+    fa.isEmpty()
+    fa.compile()
+    assert_equal(fa.getVersion(), version)
+
+    fa.addTransition('a', '0', 'b')
+    assert_equal(fa.getVersion(), version + 1)
+    fa.accept = frozenset(['b'])
+    assert_equal(fa.getVersion(), version + 2)
+
+def test_compileIsCached():
+    fa = returnFreshFA()
+    cfa = fa.compile()
+    assert_true(fa.compile() is cfa)
+
+    fa.addTransition('c', '0', 'c')
+    assert_false(fa.compile() is cfa)
+    assert_true(fa.compile().accepts('110'))
+    assert_false(cfa.accepts('110'))
+
+def test_minimizeIsCached():
+    fa = returnChainFA(3)
+    fa.addTransition('2', '1', '3')
+    m = minimize(fa)
+    # Each call returns a copy of the cached minimal automaton.
+    other = minimize(fa)
+    assert_false(other is m)
+    assert_equal(other.transitions, m.transitions)
+    assert_equal(minimize(m).transitions, m.transitions)
+
+    fa.addTransition('2', '1', '2')
+    assert_true(minimize(fa).accepts('1111'))
+    assert_false(m.accepts('1111'))
+
+def test_changingMinimalAutomataDoesNotChangeCache():
+    fa = returnFreshFA()
+    m = minimize(fa)
+    m.accept = frozenset([])
+    m.addTransition(m.initial, '0', m.initial)
+    assert_true(m.isEmpty())
+    assert_false(minimize(fa).isEmpty())
+    assert_true(minimize(m).isEmpty())
+
+def test_complementSharesReachableStates():
+    fa = returnChainFA(2)
+    reachable = fa.findReachableStates()
+    fa.findLiveStates()
+    c = complement(fa)
+    assert_true(c.findReachableStates() is reachable)
+    assert_equal(c.findLiveStates(), fa.states)
+    assert_equal(complement(c).findLiveStates(), frozenset(['0', '1']))
+
+# end-of-finite_automata_analysis_tests.py
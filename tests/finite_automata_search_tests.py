@@ -0,0 +1,116 @@
+# finite_automata_search_tests.py
+
+# Test functions for searching a text for the matches of a Finite Automata
+# found in finite_automata_search.py.
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+import random
+from nose.tools import *
+from formal_language.finite_automata import *
+from formal_language.finite_automata_search import *
+from formal_language.regular_expression import compileRegularExpression
+import formal_language.finite_automata_search as finite_automata_search
+
+# -*- Helper Functions -*-
+
+def helper_bruteForceFindAll(fa, text):
+    matches = []
+    for j in range(len(text) + 1):
+        for i in range(j + 1):
+            if fa.accepts(text[i:j]):
+                matches.append((i, j))
+                break
+    return matches
+
+def helper_assertFindAll(pattern, alphabet, texts):
+    fa = compileRegularExpression(pattern, alphabet)
+    for text in texts:
+        expected = helper_bruteForceFindAll(fa, text)
+        assert_equal(fa.findAll(text), expected)
+        if len(expected) > 0:
+            assert_equal(fa.search(text), expected[0])
+        else:
+            assert_equal(fa.search(text), None)
+
+def helper_randomTexts(alphabet, count = 50, seed = 0):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(alphabet) for i in range(rng.randint(0, 30)))
+            for n in range(count)]
+
+# -*- Tests -*-
+
+# * findRequiredPrefix *
+
+def test_findRequiredPrefix():
+    alphabet = frozenset('abc')
+    assert_equal(findRequiredPrefix(compileRegularExpression('ab(a+c)*b', alphabet)),
+                 'ab')
+    assert_equal(findRequiredPrefix(compileRegularExpression('ab+ac', alphabet)),
+                 'a')
+    assert_equal(findRequiredPrefix(compileRegularExpression('ab*', alphabet)),
+                 'a')
+    assert_equal(findRequiredPrefix(compileRegularExpression('a*b', alphabet)),
+                 '')
+    assert_equal(findRequiredPrefix(compileRegularExpression('%', alphabet)), '')
+
+# * findAll and search *
+
+def test_findAllWithoutPrefix():
+    texts = helper_randomTexts('abc')
+    helper_assertFindAll('(a+b)c*b', frozenset('abc'), texts)
+    helper_assertFindAll('c*', frozenset('abc'), texts)
+    helper_assertFindAll('%', frozenset('abc'), texts)
+
+def test_findAllWithPrefix():
+    texts = helper_randomTexts('abc', seed = 1)
+    assert_equal(getSearcher(compileRegularExpression('ab(a+c)*b',
+                                                      'abc')).prefix, 'ab')
+    helper_assertFindAll('ab(a+c)*b', frozenset('abc'), texts)
+    helper_assertFindAll('a(b+c)*', frozenset('abc'), texts)
+    helper_assertFindAll('cab+cb', frozenset('abc'), texts)
+
+def test_findAll():
+    fa = compileRegularExpression('ab*a', frozenset('abc'))
+    assert_equal(fa.findAll('cabbacaaba'), [(1, 5), (6, 8), (7, 10)])
+    assert_equal(fa.search('cabbacaaba'), (1, 5))
+    assert_equal(fa.search('cbbc'), None)
+
+def test_findAllLongMatches():
+    fa = compileRegularExpression('c*', frozenset('abc'))
+    text = 'c' * 20000
+    assert_equal(fa.findAll(text), [(0, j) for j in range(20001)])
+
+    fa = compileRegularExpression('a(a+b)*', frozenset('ab'))
+    text = 'a' * 20000
+    assert_equal(fa.findAll(text), [(0, j) for j in range(1, 20001)])
+    assert_equal(fa.search('b' + text), (1, 2))
+
+def test_findAllAcrossChunks():
+    texts = helper_randomTexts('abc', seed = 2)
+    chunkSize = finite_automata_search.CHUNK_SIZE
+    finite_automata_search.CHUNK_SIZE = 3
+    try:
+        helper_assertFindAll('(a+b)c*b', frozenset('abc'), texts)
+        helper_assertFindAll('ab(a+c)*b', frozenset('abc'), texts)
+        helper_assertFindAll('(ab+ba)*', frozenset('abc'), texts)
+    finally:
+        finite_automata_search.CHUNK_SIZE = chunkSize
+
+def test_findAllWithStartsBeforeEarlierStarts():
+    # The match ending at 3 starts before the match ending at 2.
+    fa = compileRegularExpression('xay+a', frozenset('axy'))
+    assert_equal(fa.findAll('xay'), [(1, 2), (0, 3)])
+
+def test_searcherFollowsChanges():
+    fa = compileRegularExpression('ab', frozenset('ab'))
+    assert_equal(fa.search('bab'), (1, 3))
+    fa.addTransition(fa.initial, 'a', fa.initial)
+    assert_equal(fa.search('bab'), None)
+
+@raises(IllegalCharacterError)
+def test_findAllSymbolNotInAlphabet():
+    compileRegularExpression('a*b', frozenset('ab')).findAll('abd')
+
+# end-of-finite_automata_search_tests.py
@@ -50,6 +50,12 @@ def test_FAHasIllegalCharacterInAlphabet():
     fa.alphabet = frozenset(['a','b','c','*','d','e'])
     checkWellDefined(fa)
 
+def test_FAHasRegularExpressionOperatorInAlphabet():
+    for c in ['&', '~']:
+        fa = returnFreshFA()
+        fa.alphabet = frozenset(['0', '1', c])
+        assert_raises(IllegalCharacterError, checkWellDefined, fa)
+
 @raises(IllegalArgumentError)
 def test_FAHasAnAlphabetSymbolWithLengthGreaterThan1():
     fa = returnFreshFA()
@@ -102,6 +108,61 @@ def test_NonAlphabetSymbolAppearsInTransitions():
                        ('b', '0') : 'a', ('b', '1') : 'c'}
     checkWellDefined(fa)
 
+def test_checkWellDefinedReportsAllProblems():
+    fa = returnFreshFA()
+    fa.initial = 'd'
+    fa.transitions = {('d', '0') : 'a', ('a', '1') : 'e',
+                      ('b', '0') : 'a', ('b', '1') : 'c'}
+    try:
+        checkWellDefined(fa)
+    except AutomatonNotWellDefinedError, e:
+        message = e.string
+    else:
+        assert_true(False)
+
+    for problem in findDefinitionProblems(fa):
+        assert_true(problem in message)
+
+# * findDefinitionProblems *
+
+def test_findDefinitionProblems():
+    fa = returnFreshFA()
+    assert_equal(findDefinitionProblems(fa), [])
+
+    fa.accept = frozenset(['c', 'd'])
+    fa.transitions = {('d', '0') : 'a', ('a', '1') : 'e',
+                      ('b', '0') : 'a', ('b', '1') : 'c'}
+    assert_equal(findDefinitionProblems(fa),
+                 ["Not all accept states are in the state set.",
+                  "Transitions refer to a state not in state set.",
+                  "There is a transition to a state which cannot be " \
+                      + "found in the state set.",
+                  "Transition function is not total."])
+
+# * isWellDefined *
+
+def test_isWellDefined():
+    fa = returnFreshFA()
+    assert_true(fa.isWellDefined())
+
+    # Kept up to date by addTransition.
+    fa.addTransition('a', '0', 'd')
+    assert_false(fa.isWellDefined())
+    fa.addTransition('a', '0', 'c')
+    assert_true(fa.isWellDefined())
+
+    fa.states = frozenset(['a', 'b', 'c', 'd'])
+    assert_false(fa.isWellDefined())
+    fa.addTransition('d', '0', 'a')
+    assert_false(fa.isWellDefined())
+    fa.addTransition('d', '1', 'd')
+    assert_true(fa.isWellDefined())
+
+def test_constructionWithoutCheck():
+    fa = FiniteAutomata(frozenset(['a']), frozenset(['0']), 'a', frozenset([]),
+                        {}, check = False)
+    assert_false(fa.isWellDefined())
+
 # * toDot *
 
 def test_toDot():
@@ -230,11 +291,31 @@ def test_minimize():
 
     minimizeResult = minimize(largeFA)
     assert_true(equals(minimizeResult, minimalFA))
+    assert_equal(minimizeResult.getNumberOfStates(), 5)
+    assert_equal(minimizeResult.initial, '0')
+
+def test_minimizeMergesEquivalentStates():
+    fa = returnFreshFA()
+    # 'd' behaves like 'a' and 'e' like 'c', but 'e' is unreachable.
+    fa.states = frozenset(['a', 'b', 'c', 'd', 'e'])
+    fa.transitions[('a', '0')] = 'd'
+    fa.transitions[('d', '0')] = 'a'
+    fa.transitions[('d', '1')] = 'b'
+    fa.transitions[('e', '0')] = 'a'
+    fa.transitions[('e', '1')] = 'c'
+    fa.accept = frozenset(['c', 'e'])
+
+    m = minimize(fa)
+    assert_equal(m.states, frozenset(['a', 'b', 'c']))
+    for s in ['', '11', '011', '0011', '110', '1011']:
+        assert_equal(m.accepts(s), fa.accepts(s))
 
 # * isFinite *
 
 def test_isFinite():
-    pass
+    fa = returnFreshFA()
+    assert_false(fa.isFinite())
+    assert_true(complement(unionAll([fa, complement(fa)])).isFinite())
 
 # * isEmpty *
 
@@ -247,18 +328,125 @@ def test_isEmpty():
 
 # * subsetOf *
 
+def returnEndsIn1FA():
+    """Returns the FA which accepts all strings in $\{0,1\}*$ ending in 1."""
+    return FiniteAutomata(frozenset(['x', 'y']), frozenset(['0','1']), 'x',
+                          frozenset(['y']),
+                          {('x', '0') : 'x', ('x', '1') : 'y',
+                           ('y', '0') : 'x', ('y', '1') : 'y'})
+
 def test_subsetOf():
-    pass
+    fa = returnFreshFA()
+    endsIn1 = returnEndsIn1FA()
+    assert_true(subsetOf(fa, endsIn1))
+    assert_true(subsetOf(fa, fa))
+    assert_false(subsetOf(endsIn1, fa))
+
+# * findCounterexample *
+
+def test_findCounterexample():
+    fa = returnFreshFA()
+    endsIn1 = returnEndsIn1FA()
+    assert_equal(findCounterexample(fa, endsIn1), None)
+    assert_equal(findCounterexample(endsIn1, fa), '1')
+    assert_equal(findCounterexample(fa, complement(fa)), '11')
 
 # * equals *
 
 def test_equals():
-    pass
+    fa = returnFreshFA()
+    endsIn1 = returnEndsIn1FA()
+    # Positive tests
+    assert_true(equals(fa, fa))
+    assert_true(equals(fa, minimize(fa)))
+    assert_true(equals(union(fa, endsIn1), endsIn1))
+    assert_true(equals(intersection(fa, endsIn1), fa))
+    # Negative tests
+    assert_false(equals(fa, endsIn1))
+    assert_false(equals(endsIn1, fa))
+    assert_false(equals(fa, complement(fa)))
+    assert_false(equals(fa, 'fa'))
+
+# * findDistinguishingString *
+
+def test_findDistinguishingString():
+    fa = returnFreshFA()
+    endsIn1 = returnEndsIn1FA()
+    assert_equal(findDistinguishingString(fa, minimize(fa)), None)
+    assert_equal(findDistinguishingString(fa, endsIn1), '1')
+    assert_equal(findDistinguishingString(fa, complement(fa)), '')
 
 # * getShortestString *
 
 def test_getShortestString():
-    pass
+    fa = returnFreshFA()
+    assert_equal(fa.getShortestString(), '11')
+    assert_equal(complement(fa).getShortestString(), '')
+    assert_equal(minus(fa, fa).getShortestString(), None)
+    assert_equal(minus(returnEndsIn1FA(), fa).getShortestString(), '1')
+    assert_equal(minus(complement(returnEndsIn1FA()),
+                       returnEndsIn1FA()).getShortestString(), '')
+
+# * acceptedStrings *
+
+def helper_bruteForceAccepted(fa, maxLength):
+    """Returns the accepted strings of length at most 'maxLength' in
+    length-lexicographic order by trying all strings."""
+    strings = ['']
+    accepted = []
+    for length in range(maxLength + 1):
+        accepted.extend(s for s in strings if fa.accepts(s))
+        strings = [s + c for s in strings for c in sorted(fa.alphabet)]
+    return accepted
+
+def test_acceptedStrings():
+    fa = returnFreshFA()
+    generator = fa.acceptedStrings()
+    assert_equal([generator.next() for i in range(4)],
+                 ['11', '011', '111', '0011'])
+
+    for m in [fa, complement(fa), union(fa, returnEndsIn1FA())]:
+        assert_equal(list(m.acceptedStrings(6)),
+                     helper_bruteForceAccepted(m, 6))
+
+def test_acceptedStringsOfFiniteLanguage():
+    fa = returnFreshFA()
+    assert_equal(list(minus(fa, fa).acceptedStrings()), [])
+
+    # All strings of length 2 or 3.
+    states = frozenset(['0', '1', '2', '3', '4'])
+    alphabet = frozenset(['a', 'b'])
+    transitions = {}
+    for i in range(5):
+        for c in alphabet:
+            transitions[(str(i), c)] = str(min(i + 1, 4))
+    finiteFA = FiniteAutomata(states, alphabet, '0', frozenset(['2', '3']),
+                              transitions)
+    strings = list(finiteFA.acceptedStrings())
+    assert_equal(len(strings), 12)
+    assert_equal(strings[:5], ['aa', 'ab', 'ba', 'bb', 'aaa'])
+    assert_equal(strings[-1], 'bbb')
+
+def test_acceptedStringsWithUnreachableCycle():
+    # The language {'a'}, with an unreachable accepting loop at 'x'.
+    states = frozenset(['0', '1', '2', 'x'])
+    alphabet = frozenset(['a'])
+    transitions = {('0', 'a') : '1', ('1', 'a') : '2', ('2', 'a') : '2',
+                   ('x', 'a') : 'x'}
+    fa = FiniteAutomata(states, alphabet, '0', frozenset(['1', 'x']),
+                        transitions)
+    assert_equal(list(fa.compile().acceptedStrings()), ['a'])
+
+# * countAccepted *
+
+def test_countAccepted():
+    fa = returnFreshFA()
+    for length in range(8):
+        assert_equal(fa.countAccepted(length),
+                     len([s for s in helper_bruteForceAccepted(fa, length)
+                          if len(s) == length]))
+    # Strings ending in 11 of length n: 2 ** (n - 2).
+    assert_equal(fa.countAccepted(100), 2 ** 98)
 
 # * intersection *
 
@@ -340,8 +528,118 @@ def test_minus():
     assert_false(compositeFA.accepts('1')) # ar->bs (reject)
     assert_false(compositeFA.accepts('00')) # ar->bs->br (reject)
 
+# * product *
+
+def test_productOnlyBuildsReachableStates():
+    fa = returnFreshFA()
+    m = product([fa, fa], lambda q, r: q in fa.accept and r in fa.accept)
+    assert_equal(m.states, frozenset([('a','a'), ('b','b'), ('c','c')]))
+    assert_equal(m.initial, ('a','a'))
+    assert_equal(m.accept, frozenset([('c','c')]))
+    assert_true(m.accepts('011'))
+    assert_false(m.accepts('010'))
+
+def test_productStateNamesDoNotCollide():
+    alphabet = frozenset(['0'])
+    m1 = FiniteAutomata(frozenset(['a', 'ab']), alphabet, 'a',
+                        frozenset(['ab']), {('a', '0') : 'ab',
+                                            ('ab', '0') : 'a'})
+    m2 = FiniteAutomata(frozenset(['bc', 'c']), alphabet, 'bc',
+                        frozenset(['bc']), {('bc', '0') : 'c',
+                                            ('c', '0') : 'bc'})
+    # 'a' + 'bc' and 'ab' + 'c' used to be the same state 'abc'.
+    compositeFA = union(m1, m2)
+    assert_equal(compositeFA.getNumberOfStates(), 2)
+    assert_true(compositeFA.accepts(''))
+    assert_true(compositeFA.accepts('0'))
+
+@raises(IllegalArgumentError)
+def test_productWithDifferentAlphabets():
+    fa = returnFreshFA()
+    other = FiniteAutomata(frozenset(['a']), frozenset(['0']), 'a',
+                           frozenset([]), {('a', '0') : 'a'})
+    product([fa, other], lambda q, r: True)
+
+def test_intersectionAllAndUnionAll():
+    fa = returnFreshFA() # ends in 11
+    alphabet = fa.alphabet
+    startsWith0 = FiniteAutomata(frozenset(['s', 'y', 'n']), alphabet, 's',
+                                 frozenset(['y']),
+                                 {('s', '0') : 'y', ('s', '1') : 'n',
+                                  ('y', '0') : 'y', ('y', '1') : 'y',
+                                  ('n', '0') : 'n', ('n', '1') : 'n'})
+    evenLength = FiniteAutomata(frozenset(['e', 'o']), alphabet, 'e',
+                                frozenset(['e']),
+                                {('e', '0') : 'o', ('e', '1') : 'o',
+                                 ('o', '0') : 'e', ('o', '1') : 'e'})
+    automatas = [fa, startsWith0, evenLength]
+
+    m = intersectionAll(automatas)
+    assert_true(m.accepts('0111'))
+    assert_false(m.accepts('011'))
+    assert_false(m.accepts('1011'))
+
+    m = unionAll(automatas)
+    assert_true(m.accepts(''))
+    assert_true(m.accepts('0'))
+    assert_true(m.accepts('111'))
+    assert_false(m.accepts('1'))
+    assert_false(m.accepts('101'))
+
 # * toNondeterministicFiniteAutomata *
 
+def test_toNondeterministicFiniteAutomata():
+    fa = returnFreshFA()
+    nfa = toNondeterministicFiniteAutomata(fa)
+    assert_equal(nfa.delta('b', '1'), frozenset(['c']))
+    for s in ['', '11', '011', '110', '10111']:
+        assert_equal(nfa.accepts(s), fa.accepts(s))
+
 # * toRegularExpression *
 
+def test_toRegularExpression():
+    fa = returnFreshFA()
+    regex = toRegularExpression(fa)
+    assert_true(equals(regex.toFiniteAutomata(), fa))
+
+def test_toRegularExpressionOfEmptyLanguage():
+    fa = returnFreshFA()
+    fa.accept = frozenset()
+    assert_equal(str(toRegularExpression(fa)), '%')
+
+def test_toRegularExpressionIsSimplified():
+    states = frozenset(['a', 'b'])
+    alphabet = frozenset(['0', '1'])
+    transitions = {('a', '0') : 'a', ('a', '1') : 'b',
+                   ('b', '0') : 'b', ('b', '1') : 'b'}
+    fa = FiniteAutomata(states, alphabet, 'a', frozenset(['a']), transitions)
+    regex = toRegularExpression(fa)
+    assert_equal(str(regex), '0*')
+    assert_equal(regex.size(), 2)
+
+def test_toRegularExpressionOfLongChain():
+    n = 2000
+    states = frozenset(range(n + 2))
+    transitions = {}
+    for q in range(n + 2):
+        transitions[(q, '0')] = min(q + 1, n + 1)
+    fa = FiniteAutomata(states, frozenset(['0']), 0, frozenset([n]),
+                        transitions)
+    assert_equal(str(toRegularExpression(fa)), '0' * n)
+
+@raises(IllegalArgumentError)
+def test_toRegularExpressionLargerThanMaxSize():
+    toRegularExpression(returnFreshFA(), maxSize = 10)
+
+@raises(IllegalArgumentError)
+def test_toRegularExpressionWithLongSymbols():
+    # The constructor rejects the symbol unless the check is skipped.
+    fa = returnFreshFA()
+    toRegularExpression(FiniteAutomata(fa.states, frozenset(['00', '1']),
+                                       fa.initial, fa.accept,
+                                       dict(((q, '00' if c == '0' else c), p)
+                                            for (q, c), p
+                                            in fa.transitions.items()),
+                                       check = False))
+
 # end-of-finite_automata_tests.py
@@ -0,0 +1,73 @@
+# multi_matcher_tests.py
+
+# Test functions for matching a string against many Finite Automatas at once
+# found in multi_matcher.py.
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+import itertools
+import random
+from nose.tools import *
+from formal_language.finite_automata import FiniteAutomata
+from formal_language.multi_matcher import *
+
+# -*- Helper Functions -*-
+
+def returnModuloFA(n, r, symbol):
+    """Returns the FA accepting the strings over {0,1} in which the number of
+    occurrences of the symbol is r modulo n."""
+    states = frozenset(range(n))
+    transitions = {}
+    for q in range(n):
+        transitions[(q, symbol)] = (q + 1) % n
+        transitions[(q, '1' if symbol == '0' else '0')] = q
+    return FiniteAutomata(states, frozenset(['0', '1']), 0, frozenset([r]),
+                          transitions)
+
+def returnAutomatas():
+    automatas = []
+    for n in range(1, 6):
+        for r in range(n):
+            automatas.append(returnModuloFA(n, r, '0' if n % 2 else '1'))
+    return automatas
+
+def helper_allStrings(maxLength):
+    strings = []
+    for n in range(maxLength + 1):
+        strings.extend(''.join(s) for s in itertools.product('01', repeat = n))
+    return strings
+
+# -*- Tests -*-
+
+def test_match():
+    automatas = returnAutomatas()
+    matcher = MultiMatcher(automatas)
+    assert_equal(matcher.getNumberOfGroups(), 1)
+    for s in helper_allStrings(7):
+        expected = [i for i, fa in enumerate(automatas) if fa.accepts(s)]
+        assert_equal(matcher.match(s), expected)
+        assert_equal(matcher.matchMask(s), sum(1 << i for i in expected))
+
+def test_matchSplitsIntoGroups():
+    automatas = returnAutomatas()
+    matcher = MultiMatcher(automatas, maxStates = 12)
+    assert_true(matcher.getNumberOfGroups() > 1)
+    for cfa, masks in matcher.groups:
+        assert_true(cfa.numberOfStates <= 12)
+    for s in helper_allStrings(7):
+        expected = [i for i, fa in enumerate(automatas) if fa.accepts(s)]
+        assert_equal(matcher.match(s), expected)
+
+@raises(IllegalArgumentError)
+def test_matchWithDifferentAlphabets():
+    fa = returnModuloFA(2, 0, '0')
+    other = FiniteAutomata(frozenset([0]), frozenset(['0']), 0, frozenset([0]),
+                           {(0, '0') : 0})
+    MultiMatcher([fa, other], maxStates = 1)
+
+@raises(IllegalCharacterError)
+def test_matchSymbolNotInAlphabet():
+    MultiMatcher(returnAutomatas()).match('012')
+
+# end-of-multi_matcher_tests.py
@@ -1,16 +1,231 @@
 # nondeterministic_finite_automata_tests.py
 
+import random
 from nose.tools import *
 from formal_language.nondeterministic_finite_automata import *
+import formal_language.nondeterministic_finite_automata as \
+    nondeterministic_finite_automata
 
 # -*- Helper Functions -*-
 
-# def helperFunction():
+def returnFreshNFA():
+    """Returns the NFA which accepts all strings in $\{0,1\}*$ whose third last
+    symbol is 1, or which are empty. The empty string is accepted through the
+    Lambda-transition from 'e' to 'd'."""
+    states = frozenset(['e', 'a', 'b', 'c', 'd'])
+    alphabet = frozenset(['0','1'])
+    initial = 'e'
+    accept = frozenset(['d'])
+    transitions = {('e', EPSILON) : frozenset(['a', 'd']),
+                   ('a', '0') : frozenset(['a']),
+                   ('a', '1') : frozenset(['a', 'b']),
+                   ('b', '0') : frozenset(['c']),
+                   ('b', '1') : frozenset(['c']),
+                   ('c', '0') : frozenset(['d']),
+                   ('c', '1') : frozenset(['d'])}
+
+    return NondeterministicFiniteAutomata(states, alphabet, initial, accept,
+                                          transitions)
+
+def returnChainNFA(n):
+    """Returns an NFA with n + 1 states accepting the strings of $\{0,1\}*$
+    whose n'th last symbol is 1."""
+    states = frozenset(['q' + str(i) for i in range(n + 1)])
+    transitions = {('q0', '0') : frozenset(['q0']),
+                   ('q0', '1') : frozenset(['q0', 'q1'])}
+    for i in range(1, n):
+        for c in ['0', '1']:
+            transitions[('q' + str(i), c)] = frozenset(['q' + str(i + 1)])
+    return NondeterministicFiniteAutomata(states, frozenset(['0', '1']), 'q0',
+                                          frozenset(['q' + str(n)]),
+                                          transitions)
 
 # -*- Tests -*-
 
-# -*- <Testname> -*-
+# * checkWellDefined *
+
+def test_freshNFAIsWellDefined():
+    returnFreshNFA()
+
+@raises(AutomatonNotWellDefinedError)
+def test_NFATransitionToAStateNotFoundInStateSet():
+    nfa = returnFreshNFA()
+    nfa.transitions[('a', '0')] = frozenset(['a', 'f'])
+    NondeterministicFiniteAutomata(nfa.states, nfa.alphabet, nfa.initial,
+                                   nfa.accept, nfa.transitions)
+
+@raises(AutomatonNotWellDefinedError)
+def test_NFANonAlphabetSymbolAppearsInTransitions():
+    nfa = returnFreshNFA()
+    nfa.transitions[('a', '2')] = frozenset(['a'])
+    NondeterministicFiniteAutomata(nfa.states, nfa.alphabet, nfa.initial,
+                                   nfa.accept, nfa.transitions)
+
+# * delta *
+
+@raises(IllegalCharacterError)
+def test_delta():
+    nfa = returnFreshNFA()
+    # Positive tests
+    assert_equal(nfa.delta('a', '1'), frozenset(['a', 'b']))
+    assert_equal(nfa.delta('d', '1'), frozenset([]))
+    # Exception tests
+    nfa.delta('a', '2')
+
+# * epsilonClosure *
+
+def test_epsilonClosure():
+    nfa = returnFreshNFA()
+    assert_equal(nfa.epsilonClosure(frozenset(['e'])),
+                 frozenset(['e', 'a', 'd']))
+    assert_equal(nfa.epsilonClosure(frozenset(['b'])), frozenset(['b']))
+
+def test_epsilonClosureWithCycles():
+    # The Lambda-transitions 0 -> 1 -> 2 -> 0 form a cycle, which also
+    # reaches the cycle 3 <-> 4 and state 5 from it.
+    transitions = {(0, EPSILON) : frozenset([1]), (1, EPSILON) : frozenset([2]),
+                   (2, EPSILON) : frozenset([0, 3]),
+                   (3, EPSILON) : frozenset([4]),
+                   (4, EPSILON) : frozenset([3, 5])}
+    nfa = NondeterministicFiniteAutomata(frozenset(range(7)), frozenset(['0']),
+                                         0, frozenset([5]), transitions)
+    assert_equal(nfa.epsilonClosure(frozenset([1])), frozenset(range(6)))
+    assert_equal(nfa.epsilonClosure(frozenset([4])), frozenset([3, 4, 5]))
+    assert_equal(nfa.epsilonClosure(frozenset([6])), frozenset([6]))
+
+# * deltaStar *
+
+def test_deltaStar():
+    nfa = returnFreshNFA()
+    assert_equal(nfa.deltaStar(frozenset(['e']), ''),
+                 frozenset(['e', 'a', 'd']))
+    assert_equal(nfa.deltaStar(frozenset(['e']), '1'), frozenset(['a', 'b']))
+    assert_equal(nfa.deltaStar(frozenset(['e']), '100'),
+                 frozenset(['a', 'd']))
+
+# * accepts *
+
+@raises(IllegalCharacterError)
+def test_accepts():
+    nfa = returnFreshNFA()
+    # Positive tests
+    assert_true(nfa.accepts(''))
+    assert_true(nfa.accepts('100'))
+    assert_true(nfa.accepts('0110'))
+    # Negative tests
+    assert_false(nfa.accepts('0'))
+    assert_false(nfa.accepts('1000'))
+    # Exception tests
+    nfa.accepts('1020')
+
+def test_acceptsWithManyStates():
+    # More than 16 states, so the step tables have several groups.
+    n = 40
+    nfa = returnChainNFA(n)
+    rng = random.Random(0)
+    for i in range(200):
+        s = ''.join(rng.choice('01') for j in range(rng.randint(0, 40)))
+        assert_equal(nfa.accepts(s), len(s) >= n and s[-n] == '1')
+
+# * addTransition *
+
+def test_addTransition():
+    nfa = returnFreshNFA()
+    assert_false(nfa.accepts('0'))
+    nfa.addTransition('a', '0', 'd')
+    assert_true(nfa.accepts('0'))
+    assert_equal(nfa.delta('a', '0'), frozenset(['a', 'd']))
+
+# * toFiniteAutomata *
+
+def test_toFiniteAutomata():
+    nfa = returnFreshNFA()
+    fa = toFiniteAutomata(nfa, minimal = False)
+    assert_equal(fa.initial, frozenset(['e', 'a', 'd']))
+    rng = random.Random(0)
+    for i in range(200):
+        s = ''.join(rng.choice('01') for j in range(rng.randint(0, 10)))
+        assert_equal(fa.accepts(s), nfa.accepts(s))
+
+def test_toMinimalFiniteAutomata():
+    # The subset construction of the n'th-last-symbol NFA needs 2 ** n states.
+    nfa = returnChainNFA(5)
+    fa = toFiniteAutomata(nfa)
+    assert_equal(fa.getNumberOfStates(), 32)
+    assert_true(fa.accepts('010000'))
+    assert_false(fa.accepts('001000'))
+
+def test_toMinimalFiniteAutomataMergesEquivalentSets():
+    # {a} and {a, b} both accept every string.
+    transitions = {('a', '0') : frozenset(['a', 'b']),
+                   ('a', '1') : frozenset(['a']),
+                   ('b', '0') : frozenset(['b'])}
+    nfa = NondeterministicFiniteAutomata(frozenset(['a', 'b']),
+                                         frozenset(['0', '1']), 'a',
+                                         frozenset(['a', 'b']), transitions)
+    assert_equal(toFiniteAutomata(nfa, minimal = False).getNumberOfStates(),
+                 2)
+    fa = toFiniteAutomata(nfa)
+    assert_equal(fa.states, frozenset([frozenset(['a'])]))
+    assert_equal(fa.accept, fa.states)
+
+def test_toMinimalFiniteAutomataBeyondLimit():
+    nfa = returnChainNFA(5)
+    factor = nondeterministic_finite_automata.EARLY_MINIMIZATION_FACTOR
+    nondeterministic_finite_automata.EARLY_MINIMIZATION_FACTOR = 0
+    try:
+        fa = toFiniteAutomata(nfa)
+    finally:
+        nondeterministic_finite_automata.EARLY_MINIMIZATION_FACTOR = factor
+    assert_equal(fa.getNumberOfStates(), 32)
+    assert_true(fa.accepts('010000'))
+
+# * LazyFiniteAutomata *
+
+def test_lazyFiniteAutomata():
+    nfa = returnChainNFA(5)
+    lazy = LazyFiniteAutomata(nfa)
+    rng = random.Random(0)
+    for i in range(200):
+        s = ''.join(rng.choice('01') for j in range(rng.randint(0, 30)))
+        assert_equal(lazy.accepts(s), nfa.accepts(s))
+    assert_equal(lazy.getNumberOfCachedStates(), 32)
+    assert_equal(lazy.clears, 0)
+
+def test_lazyFiniteAutomataFollowsChanges():
+    nfa = returnFreshNFA()
+    lazy = LazyFiniteAutomata(nfa)
+    assert_false(lazy.accepts('0'))
+    version = nfa.getVersion()
+    nfa.addTransition('a', '0', 'd')
+    assert_equal(nfa.getVersion(), version + 1)
+    assert_true(lazy.accepts('0'))
+
+    nfa.accept = frozenset(['c'])
+    assert_false(lazy.accepts('0'))
+    assert_true(lazy.accepts('10'))
+    assert_equal(lazy.clears, 0)
+
+def test_lazyFiniteAutomataClearsFullCache():
+    nfa = returnChainNFA(5)
+    lazy = LazyFiniteAutomata(nfa, maxStates = 8, minProgress = 1)
+    s = '0110100111010110' * 4
+    assert_equal(lazy.accepts(s), nfa.accepts(s))
+    assert_true(lazy.clears > 0)
+    assert_true(lazy.getNumberOfCachedStates() <= 8)
+    assert_equal(lazy.fallbacks, 0)
+
+def test_lazyFiniteAutomataFallsBackWhenThrashing():
+    nfa = returnChainNFA(12)
+    lazy = LazyFiniteAutomata(nfa, maxStates = 16, minProgress = 10)
+    rng = random.Random(1)
+    for i in range(20):
+        s = ''.join(rng.choice('01') for j in range(200))
+        assert_equal(lazy.accepts(s), nfa.accepts(s))
+    assert_true(lazy.fallbacks > 0)
 
-# def test_someFunctionality():
+@raises(IllegalCharacterError)
+def test_lazyFiniteAutomataWithIllegalCharacter():
+    LazyFiniteAutomata(returnFreshNFA()).accepts('012')
 
 # end-of-nondeterministic_finite_automata_tests.py
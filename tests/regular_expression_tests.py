@@ -1,16 +1,185 @@
 # regular_expression_tests.py
 
+import itertools
 from nose.tools import *
+from formal_language import regular_expression
 from formal_language.regular_expression import *
 
 # -*- Helper Functions -*-
 
-# def helperFunction():
+def helper_allStrings(alphabet, maxLength):
+    """Returns all strings over the alphabet of length at most maxLength."""
+    strings = []
+    for n in range(maxLength + 1):
+        strings.extend(''.join(s) for s in
+                       itertools.product(sorted(alphabet), repeat = n))
+    return strings
+
+def helper_assertLanguage(pattern, alphabet, isMember, maxLength = 6):
+    regex = RegularExpression(pattern, alphabet)
+    fa = compileRegularExpression(pattern, alphabet)
+    for s in helper_allStrings(alphabet, maxLength):
+        assert_equal(fa.accepts(s), isMember(s))
+        assert_equal(regex.accepts(s), isMember(s))
+    if not regex.isExtended():
+        nfa = regex.toNondeterministicFiniteAutomata()
+        for s in helper_allStrings(alphabet, maxLength):
+            assert_equal(nfa.accepts(s), isMember(s))
 
 # -*- Tests -*-
 
-# -*- <Testname> -*-
+# * parsing *
+
+def test_parsePrecedence():
+    regex = RegularExpression('01*+1', frozenset(['0', '1']))
+    assert_equal(regex.tree,
+                 ('union',
+                  ('concat', ('symbol', '0'), ('star', ('symbol', '1'))),
+                  ('symbol', '1')))
+
+def test_parseConstants():
+    assert_equal(RegularExpression('#', frozenset(['0'])).tree, ('lambda',))
+    assert_equal(RegularExpression('%', frozenset(['0'])).tree, ('empty',))
+
+def test_parseExtendedPrecedence():
+    regex = RegularExpression('~0*1&1+0', frozenset(['0', '1']))
+    assert_equal(regex.tree,
+                 ('union',
+                  ('intersection',
+                   ('concat', ('complement', ('star', ('symbol', '0'))),
+                    ('symbol', '1')),
+                   ('symbol', '1')),
+                  ('symbol', '0')))
+
+@raises(IllegalArgumentError)
+def test_parseMissingRightParenthesis():
+    RegularExpression('(01', frozenset(['0', '1']))
+
+@raises(IllegalArgumentError)
+def test_parseUnexpectedOperator():
+    RegularExpression('0+*1', frozenset(['0', '1']))
+
+@raises(IllegalArgumentError)
+def test_parseEmptyPattern():
+    RegularExpression('', frozenset(['0', '1']))
+
+@raises(IllegalCharacterError)
+def test_parseSymbolNotInAlphabet():
+    RegularExpression('012', frozenset(['0', '1']))
+
+@raises(IllegalCharacterError)
+def test_metacharacterInAlphabet():
+    RegularExpression('0', frozenset(['0', '+']))
+
+# * compileRegularExpression *
+
+def test_compileEndsIn11():
+    helper_assertLanguage('(0+1)*11', frozenset(['0', '1']),
+                          lambda s: s.endswith('11'))
+
+def test_compileEvenNumberOfOnes():
+    helper_assertLanguage('(0*10*1)*0*', frozenset(['0', '1']),
+                          lambda s: s.count('1') % 2 == 0)
+
+def test_compileConstants():
+    alphabet = frozenset(['0', '1'])
+    helper_assertLanguage('#', alphabet, lambda s: s == '')
+    helper_assertLanguage('%', alphabet, lambda s: False)
+    helper_assertLanguage('%*', alphabet, lambda s: s == '')
+    helper_assertLanguage('0%+1#', alphabet, lambda s: s == '1')
+
+def test_compileIsMinimal():
+    fa = compileRegularExpression('(0+1)*11', frozenset(['0', '1']))
+    assert_equal(fa.states, frozenset(['q0', 'q1', 'q2']))
+    assert_equal(fa.initial, 'q0')
+
+def test_compileIsCached():
+    alphabet = frozenset(['0', '1'])
+    fa = compileRegularExpression('(01)*', alphabet)
+    other = compileRegularExpression('(01)*', set(alphabet))
+    assert_false(other is fa)
+    assert_true(other.compile() is fa.compile())
+    assert_true(RegularExpression('(01)*', alphabet).toFiniteAutomata()
+                .compile() is fa.compile())
+    assert_false(compileRegularExpression('(01)*', frozenset('012'))
+                 .compile() is fa.compile())
+
+def test_changingCompiledAutomataDoesNotChangeCache():
+    alphabet = frozenset(['0', '1'])
+    fa = compileRegularExpression('(01)*', alphabet)
+    fa.addTransition(fa.initial, '1', fa.initial)
+    assert_true(fa.accepts('1'))
+    assert_false(compileRegularExpression('(01)*', alphabet).accepts('1'))
+
+def test_compileCacheIsBounded():
+    alphabet = frozenset(['0', '1'])
+    clearCompileCache()
+    regular_expression.CACHE_SIZE = 2
+    try:
+        cfa = compileRegularExpression('0', alphabet).compile()
+        compileRegularExpression('1', alphabet)
+        assert_true(compileRegularExpression('0', alphabet).compile() is cfa)
+        compileRegularExpression('01', alphabet)
+        compileRegularExpression('10', alphabet)
+        assert_false(compileRegularExpression('0', alphabet).compile() is cfa)
+    finally:
+        regular_expression.CACHE_SIZE = CACHE_SIZE
+
+def test_compileLongConcatenation():
+    fa = compileRegularExpression('0' * 3000 + '+1', frozenset(['0', '1']))
+    assert_equal(len(fa.states), 3002)
+    assert_true(fa.accepts('0' * 3000))
+    assert_true(fa.accepts('1'))
+    assert_false(fa.accepts('0' * 2999))
+
+# * accepts *
+
+def test_acceptsIntersection():
+    helper_assertLanguage('(0+1)*11&1(0+1)*', frozenset(['0', '1']),
+                          lambda s: s.startswith('1') and s.endswith('11'))
+
+def test_acceptsComplement():
+    helper_assertLanguage('~((0+1)*00(0+1)*)', frozenset(['0', '1']),
+                          lambda s: '00' not in s)
+    helper_assertLanguage('~%', frozenset(['0', '1']), lambda s: True)
+    helper_assertLanguage('~#&~(1(0+1)*)', frozenset(['0', '1']),
+                          lambda s: s.startswith('0'))
+
+def test_combinators():
+    alphabet = frozenset(['a', 'b'])
+    r = RegularExpression('a*', alphabet)
+    s = RegularExpression('(a+b)*b', alphabet)
+    assert_true(r.union(s).accepts('ab'))
+    assert_false(r.intersection(s).accepts('ab'))
+    assert_true(r.intersection(s.complement()).accepts('aa'))
+    assert_false(r.complement().accepts(''))
+
+@raises(IllegalArgumentError)
+def test_combinatorsWithDifferentAlphabets():
+    RegularExpression('a', frozenset('a')).union(
+        RegularExpression('b', frozenset('b')))
+
+@raises(IllegalCharacterError)
+def test_acceptsSymbolNotInAlphabet():
+    RegularExpression('0*', frozenset(['0', '1'])).accepts('02')
+
+def test_acceptsLongConcatenation():
+    regex = RegularExpression('0' * 5000, frozenset(['0']))
+    assert_true(regex.accepts('0' * 5000))
+    assert_false(regex.accepts('0' * 4999))
+
+def test_acceptsLongNullableConcatenation():
+    regex = RegularExpression('(a*b*)' * 600, frozenset('ab'))
+    assert_true(regex.accepts('ab'))
+    assert_true(regex.accepts('ba' * 5))
+    regex = RegularExpression('(a*b)' * 600, frozenset('ab'))
+    assert_false(regex.accepts('a'))
 
-# def test_someFunctionality():
+def test_derivativesAreFinite():
+    regex = RegularExpression('(0+1)*1(0+1)(0+1)&~(0*)', frozenset(['0', '1']))
+    for s in helper_allStrings(regex.alphabet, 8):
+        regex.accepts(s)
+    fa = compileRegularExpression(regex.pattern, regex.alphabet)
+    assert_equal(len(fa.states), 8)
 
 # end-of-regular_expression_tests.py
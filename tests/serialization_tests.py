@@ -0,0 +1,158 @@
+# serialization_tests.py
+
+# Test functions for the file format for Finite Automatas found in
+# serialization.py.
+#
+# Author: Peter Urbak
+# Version: 2012-07-27
+
+import os
+import tempfile
+from array import array
+from nose.tools import *
+from formal_language.finite_automata import *
+from formal_language.serialization import *
+import formal_language.serialization as serialization
+from tests.finite_automata_tests import returnFreshFA
+
+# -*- Helper Functions -*-
+
+def helper_temporaryPath():
+    """Returns the path of a fresh temporary file."""
+    handle, path = tempfile.mkstemp(suffix = '.fa')
+    os.close(handle)
+    return path
+
+# -*- Tests -*-
+
+# * saveFiniteAutomata / loadFiniteAutomata *
+
+def test_saveAndLoadFiniteAutomata():
+    fa = returnFreshFA()
+    path = helper_temporaryPath()
+    try:
+        saveFiniteAutomata(fa, path)
+        loaded = loadFiniteAutomata(path)
+    finally:
+        os.remove(path)
+
+    assert_equal(loaded.states, fa.states)
+    assert_equal(loaded.alphabet, fa.alphabet)
+    assert_equal(loaded.initial, fa.initial)
+    assert_equal(loaded.accept, fa.accept)
+    assert_equal(loaded.transitions, fa.transitions)
+
+def test_saveAndLoadProductAutomata():
+    fa = returnFreshFA()
+    m = intersection(fa, complement(fa))
+    path = helper_temporaryPath()
+    try:
+        saveFiniteAutomata(m, path)
+        loaded = loadFiniteAutomata(path)
+    finally:
+        os.remove(path)
+
+    assert_equal(loaded.states, m.states)
+    assert_equal(loaded.initial, ('a', 'a'))
+    assert_equal(loaded.transitions, m.transitions)
+
+# * loadCompiledFiniteAutomata *
+
+def test_loadCompiledFiniteAutomata():
+    fa = returnFreshFA()
+    path = helper_temporaryPath()
+    try:
+        saveFiniteAutomata(fa, path)
+        cfa = loadCompiledFiniteAutomata(path)
+    finally:
+        os.remove(path)
+
+    assert_equal(cfa.stateList, ['a', 'b', 'c'])
+    assert_equal(list(cfa.acceptMask), [0, 0, 1])
+    assert_equal(list(cfa.table), list(fa.compile().table))
+    if serialization.numpy is not None:
+        # A view of the mapped file rather than a copy.
+        assert_false(cfa.table.flags.owndata)
+        assert_false(cfa.table.flags.writeable)
+    for s in ['', '11', '0110', '10111']:
+        assert_equal(cfa.accepts(s), fa.accepts(s))
+    assert_equal(list(cfa.acceptsMany(['11', '0'])), [True, False])
+
+def test_loadCompiledFiniteAutomataWithoutNumpy():
+    fa = returnFreshFA()
+    path = helper_temporaryPath()
+    numpy = serialization.numpy
+    serialization.numpy = None
+    try:
+        saveFiniteAutomata(fa, path)
+        cfa = loadCompiledFiniteAutomata(path)
+    finally:
+        serialization.numpy = numpy
+        os.remove(path)
+
+    assert_equal(list(cfa.table), list(fa.compile().table))
+    assert_true(isinstance(cfa.table, array))
+    assert_true(cfa.accepts('011'))
+
+@raises(IllegalArgumentError)
+def test_loadFileWhichIsNotAnAutomaton():
+    path = helper_temporaryPath()
+    f = open(path, 'wb')
+    f.write('digraph finite_automaton {}\n')
+    f.close()
+    try:
+        loadFiniteAutomata(path)
+    finally:
+        os.remove(path)
+
+@raises(IllegalArgumentError)
+def test_loadEmptyFile():
+    path = helper_temporaryPath()
+    try:
+        loadCompiledFiniteAutomata(path)
+    finally:
+        os.remove(path)
+
+def test_loadTruncatedFile():
+    path = helper_temporaryPath()
+    try:
+        saveFiniteAutomata(returnFreshFA(), path)
+        f = open(path, 'rb')
+        data = f.read()
+        f.close()
+        for size in [len(data) - 1, len(data) - 24, 40, 30]:
+            f = open(path, 'wb')
+            f.write(data[:size])
+            f.close()
+            assert_raises(IllegalArgumentError, loadCompiledFiniteAutomata,
+                          path)
+    finally:
+        os.remove(path)
+
+def test_loadCorruptFile():
+    path = helper_temporaryPath()
+    try:
+        saveFiniteAutomata(returnFreshFA(), path)
+        f = open(path, 'rb')
+        data = f.read()
+        f.close()
+        corruptions = [(16, '\x03'),          # initial state code 3
+                       (28, '\xff\xff'),      # too long first state name
+                       (len(data) - 4, '\x07'), # offset not a multiple of k
+                       (len(data) - 4, '\x06')] # offset of row 3 of 3
+        for position, patch in corruptions:
+            f = open(path, 'wb')
+            f.write(data[:position] + patch + data[position + len(patch):])
+            f.close()
+            for numpy in [serialization.numpy, None]:
+                saved = serialization.numpy
+                serialization.numpy = numpy
+                try:
+                    assert_raises(IllegalArgumentError,
+                                  loadCompiledFiniteAutomata, path)
+                finally:
+                    serialization.numpy = saved
+    finally:
+        os.remove(path)
+
+# end-of-serialization_tests.py
@@ -1,5 +1,6 @@
 # turing_machine_tests.py
 
+import warnings
 from nose.tools import *
 from formal_language.turing_machine import *
 
@@ -14,14 +15,168 @@ accept_state = 'F'
 tm = TuringMachine(states, alphabet, blank, transition_function, init_state,
                    accept_state)
 
+# -*- Helper Functions -*-
+
+def returnBusyBeaver():
+    """Returns the 4-state busy beaver, which halts after 107 steps leaving 13
+    ones on the tape."""
+    return TuringMachine(['A','B','C','D','H'], ['0','1'], '0',
+                         [('A','0','B','1','R'), ('A','1','B','1','L'),
+                          ('B','0','A','1','L'), ('B','1','C','0','L'),
+                          ('C','0','H','1','R'), ('C','1','D','1','L'),
+                          ('D','0','D','1','R'), ('D','1','A','0','R')],
+                         'A', ['H'])
+
+def returnLeftWriter():
+    """Returns a machine which, for each 1 of its input, erases the 1 and
+    writes a 0 at the left end of the tape."""
+    return TuringMachine(['A','B','C','H'], ['0','1','x','#'], '#',
+                         [('A','1','B','x','L'),
+                          ('B','x','B','x','L'), ('B','0','B','0','L'),
+                          ('B','#','C','0','R'),
+                          ('C','0','C','0','R'), ('C','x','C','x','R'),
+                          ('C','1','B','x','L'), ('C','#','H','#','N')],
+                         'A', ['H'])
+
+# -*- Tests -*-
+
 def test_lookupAction():
     assert_equal(tm.lookupAction('A', '1'), ('A','1','A','1','R'))
     assert_equal(tm.lookupAction('A', '#'), ('A','#','F','1','N'))
     assert_equal(tm.lookupAction('B', '#'), ('B', '#', 'B', 'HALT', 'N'))
 
+@raises(AutomatonNotWellDefinedError)
+def test_conflictingRules():
+    TuringMachine(states, alphabet, blank,
+                  transition_function + [('A','1','F','1','N')], init_state,
+                  accept_state)
+
+def test_duplicateRulesWarn():
+    with warnings.catch_warnings(record = True) as caught:
+        warnings.simplefilter('always')
+        duplicate = TuringMachine(states, alphabet, blank,
+                                  transition_function + [('A','1','A','1','R')],
+                                  init_state, accept_state)
+    assert_equal(len(caught), 1)
+    assert_equal(duplicate.lookupAction('A', '1'), ('A','1','A','1','R'))
+
+def test_replacingTheRulesReindexes():
+    other = TuringMachine(states, alphabet, blank, transition_function,
+                          init_state, accept_state)
+    other.transition_function = [('A','1','F','#','N')]
+    assert_equal(other.lookupAction('A', '1'), ('A','1','F','#','N'))
+    assert_equal(other.lookupAction('A', '#'), ('A', '#', 'A', 'HALT', 'N'))
+
 def test_run():
     assert_equal(tm.run(['1']), ['1','1'])
     assert_equal(tm.run(['1','1','1']), ['1','1','1','1'])
     assert_equal(tm.run(['2']), ['HALT'])
 
+def test_runDoesNotChangeTheInput():
+    tape = ['1', '1']
+    assert_equal(tm.run(tape), ['1', '1', '1'])
+    assert_equal(tape, ['1', '1'])
+
+def test_runOnEmptyTape():
+    assert_equal(tm.run([]), ['1'])
+    assert_true(tm.hasAccepted)
+
+def test_runMovingLeftPastTheStart():
+    busyBeaver = returnBusyBeaver()
+    tape = busyBeaver.run(['0'])
+    assert_equal(''.join(tape), '10111111111111')
+    assert_true(busyBeaver.hasAccepted)
+
+def test_runAccelerated():
+    assert_equal(tm.run(['1','1','1'], accelerate = True), ['1','1','1','1'])
+    assert_equal(tm.run(['2'], accelerate = True), ['HALT'])
+    assert_equal(tm.run([], accelerate = True), ['1'])
+    assert_equal(returnBusyBeaver().run(['0'], accelerate = True),
+                 returnBusyBeaver().run(['0']))
+
+def test_runAcceleratedSkipsSweeps():
+    writer = returnLeftWriter()
+    tape = writer.run(['1'] * 30, accelerate = True)
+    assert_equal(tape, ['0'] * 30 + ['x'] * 30 + ['#'])
+    assert_equal(tape, writer.run(['1'] * 30))
+    assert_true(writer.hasAccepted)
+
+def test_runSetsAttributesOfTheInstance():
+    other = TuringMachine(states, alphabet, blank, transition_function,
+                          init_state, accept_state)
+    tm.run(['1'])
+    other.run(['2'])
+    assert_true(tm.hasAccepted)
+    assert_false(other.hasAccepted)
+
+# * simulate *
+
+def test_simulate():
+    result = tm.simulate(['1','1'])
+    assert_true(result.accepted)
+    assert_true(result.halted)
+    assert_false(result.looping)
+    assert_equal(result.steps, 3)
+    assert_equal(result.tape, ['1','1','1'])
+    assert_equal(result.head, 2)
+    assert_equal(result.state, 'F')
+    assert_equal(result.checkpoint, None)
+
+def test_simulateWithMaxSteps():
+    for accelerate in [False, True]:
+        result = returnBusyBeaver().simulate(['0'], maxSteps = 50,
+                                             accelerate = accelerate)
+        assert_false(result.halted)
+        assert_equal(result.steps, 50)
+        assert_equal(result.tape, returnBusyBeaver().simulate(['0'],
+                                                              maxSteps = 50).tape)
+
+def test_resume():
+    busyBeaver = returnBusyBeaver()
+    for accelerate in [False, True]:
+        result = busyBeaver.simulate(['0'], maxSteps = 10,
+                                     accelerate = accelerate)
+        checkpoint = result.checkpoint
+        while not result.halted:
+            result = busyBeaver.resume(result.checkpoint, maxSteps = 10)
+        assert_equal(result.steps, 107)
+        assert_equal(result.tape, busyBeaver.run(['0']))
+        assert_true(result.accepted)
+
+        # a checkpoint can be resumed again
+        assert_equal(busyBeaver.resume(checkpoint).tape, result.tape)
+
+def test_simulateDetectsCycles():
+    rules = [('A','0','B','1','R'), ('B','0','A','0','L'),
+             ('A','1','B','1','R')]
+    machine = TuringMachine(['A','B'], ['0','1'], '0', rules, 'A', [])
+    for accelerate in [False, True]:
+        result = machine.simulate(['0'], detectCycles = True,
+                                  accelerate = accelerate)
+        assert_true(result.looping)
+        assert_false(result.halted)
+        assert_true(result.steps < 10)
+
+def test_simulateWithoutCycles():
+    result = returnLeftWriter().simulate(['1'] * 10, detectCycles = True)
+    assert_false(result.looping)
+    assert_true(result.accepted)
+
+# * Tape *
+
+def test_tape():
+    tape = Tape(['a', 'b'], '#')
+    assert_equal(tape.encode('#'), 0)
+    assert_equal(tape.encode('c'), 3)
+    tape.left.append(tape.encode('c'))
+    tape.left.append(tape.encode('a'))
+    assert_equal(tape.toList(), ['a', 'c', 'a', 'b'])
+
+def test_blockTape():
+    tape = BlockTape(['a', 'b', 'b', 'a'], '#')
+    assert_equal(tape.head, 1)
+    assert_equal(tape.right, [[1, 1], [2, 2]])
+    tape.left.append([tape.encode('c'), 2])
+    assert_equal(tape.toList(), ['c', 'c', 'a', 'b', 'b', 'a'])
+
 # end-of-turing_machine_tests.py